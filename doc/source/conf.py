@@ -229,6 +229,7 @@ rst_epilog = """
 .. |Atom| replace:: :class:`~scm.plams.core.basemol.Atom`
 .. |Bond| replace:: :class:`~scm.plams.core.basemol.Bond`
 .. |Molecule| replace:: :class:`~scm.plams.core.basemol.Molecule`
+.. |Trajectory| replace:: :class:`~scm.plams.core.trajectory.Trajectory`
 
 .. |PeriodicTable| replace:: :class:`~scm.plams.tools.periodic_table.PeriodicTable`
 .. |Units| replace:: :class:`~scm.plams.tools.units.Units`
@@ -238,10 +239,12 @@ rst_epilog = """
 
 .. |JobRunner| replace:: :class:`~scm.plams.core.jobrunner.JobRunner`
 .. |GridRunner| replace:: :class:`~scm.plams.core.jobrunner.GridRunner`
+.. |PoolRunner| replace:: :class:`~scm.plams.core.jobrunner.PoolRunner`
 
 .. |Settings| replace:: :class:`~scm.plams.core.settings.Settings`
 .. |Results| replace:: :class:`~scm.plams.core.results.Results`
 .. |KFReader| replace:: :class:`~scm.plams.tools.kftools.KFReader`
+.. |KFWriter| replace:: :class:`~scm.plams.tools.kftools.KFWriter`
 .. |KFFile| replace:: :class:`~scm.plams.tools.kftools.KFFile`
 
 .. |SCMJob| replace:: :class:`~scm.plams.interfaces.adfsuite.SCMJob`
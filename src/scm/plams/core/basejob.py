@@ -2,7 +2,6 @@ import copy
 import os
 import stat
 import threading
-import time
 
 try:
     import dill as pickle
@@ -15,7 +14,7 @@ from .basemol import Molecule
 from .errors import JobError, PlamsError, ResultsError
 from .functions import log
 from .private import sha256
-from .results import Results
+from .results import Results, _privileged_section
 from .settings import Settings
 
 __all__ = ['SingleJob','MultiJob']
@@ -71,6 +70,7 @@ class Job(object):
         self.default_settings = [config.job]
         self.depend = depend or []
         self._dont_pickle = []
+        self._cache = {}
         if settings is not None:
             if isinstance(settings, Settings):
                 self.settings = settings.copy()
@@ -82,9 +82,9 @@ class Job(object):
     def __getstate__(self):
         """Prepare an instance for pickling.
 
-        Attributes ``jobmanager``, ``parent``, ``default_settings`` and ``_lock`` are removed, as well as all attributes listed in ``self._dont_pickle``.
+        Attributes ``jobmanager``, ``parent``, ``default_settings``, ``_lock`` and ``_cache`` are removed, as well as all attributes listed in ``self._dont_pickle``.
         """
-        remove = ['jobmanager', 'parent', 'default_settings', '_lock'] + self._dont_pickle
+        remove = ['jobmanager', 'parent', 'default_settings', '_lock', '_cache'] + self._dont_pickle
         return {k:v for k,v in self.__dict__.items() if k not in remove}
 
 
@@ -117,13 +117,22 @@ class Job(object):
 
 
     def pickle(self, filename=None):
-        """Pickle this instance and save to a file indicated by *filename*. If ``None``, save to ``[jobname].dill`` in the job folder."""
+        """Pickle this instance and save to a file indicated by *filename*. If ``None``, save to ``[jobname].dill`` in the job folder.
+
+        If the job has a hash, it is also written (together with the current hashing method) to a small text file ``[filename].hash``. That file is used by |load_all| to index jobs without unpickling them.
+        """
         filename = filename or opj(self.path, self.name+'.dill')
         with open(filename, 'wb') as f:
             try:
                 pickle.dump(self, f, -1)
             except:
                 log("Pickling of %s failed" % self.name, 1)
+                return
+        h = self.hash()
+        if h is not None:
+            mode = self.jobmanager.settings.hashing if self.jobmanager else config.jobmanager.hashing
+            with open(filename+'.hash', 'w') as f:
+                f.write('{}\n{}\n'.format(mode, h))
 
 
 
@@ -144,6 +153,24 @@ class Job(object):
 
 
 
+    def reset_hash(self):
+        """Forget the cached hash (and other values derived from ``settings`` and ``molecule``, like the input text) of this instance.
+
+        Hash and input are calculated once and reused afterwards. The cache is automatically reset just before |RPM| checks the job (after |prerun|), so this method needs to be called only if ``settings`` or ``molecule`` are changed after a hash was requested by hand and this new hash is needed before |run|.
+        """
+        self._cache = {}
+
+
+
+    def _cached(self, key, func):
+        """Return the value stored under *key* in this instance's cache. If not present, call *func* (without arguments) and store the returned value first."""
+        cache = self.__dict__.setdefault('_cache', {})
+        if key not in cache:
+            cache[key] = func()
+        return cache[key]
+
+
+
     def prerun(self):
         """Actions to take before the actual job execution.
 
@@ -180,6 +207,7 @@ class Job(object):
 
         for i in reversed(self.default_settings):
             self.settings.soft_update(i)
+        self.reset_hash()
 
         prev = jobmanager._check_hash(self)
         if prev is not None:
@@ -226,16 +254,20 @@ class Job(object):
             self.results.finished.set()
             if self.status != 'crashed':
                 self.status = 'finished'
-                if self.check():
+                with _privileged_section():
+                    success = self.check()
+                if success:
                     log('%s.check() success. Cleaning results with keep = %s' % (self.name, self.settings.keep), 7)
                     self.results._clean(self.settings.keep)
                     log('Starting %s.postrun()' % self.name, 5)
-                    self.postrun()
+                    with _privileged_section():
+                        self.postrun()
                     log('%s.postrun() finished' % self.name, 5)
                     self.status = 'successful'
                     log('Pickling %s' % self.name, 7)
                     if self.settings.pickle:
                         self.pickle()
+                        self.jobmanager._store_hash(self)
                 else:
                     log('%s.check() failed' % self.name, 7)
                     self.status = 'failed'
@@ -265,10 +297,13 @@ class SingleJob(Job):
 
         >>> _filenames = {'inp':'$JN.in', 'run':'$JN.run', 'out':'$JN.out', 'err': '$JN.err'}
 
+    Class attribute ``_hash_attributes`` is a list of names of other attributes of the job that are used by :meth:`~SingleJob.get_input`. Their values are included in :meth:`~SingleJob.hash_structure`. Subclasses whose input depends on anything else than ``settings`` and ``molecule`` (for example the job name) should list such attributes there.
+
     This class defines no new methods that could be directly called in your script. Methods that can and should be overridden are :meth:`~SingleJob.get_input` and :meth:`~SingleJob.get_runscript`.
 
     """
     _filenames = {'inp':'$JN.in', 'run':'$JN.run', 'out':'$JN.out', 'err': '$JN.err'}
+    _hash_attributes = []
 
     def __init__(self, molecule=None, **kwargs):
         Job.__init__(self, **kwargs)
@@ -309,17 +344,37 @@ class SingleJob(Job):
 
     def hash_input(self):
         """Calculate SHA256 hash of the input file."""
-        return sha256(self.get_input())
+        return sha256(self._cached('input', self.get_input))
 
     def hash_runscript(self):
         """Calculate SHA256 hash of the runscript."""
         return sha256(self._full_runscript())
 
+    def hash_structure(self):
+        """Calculate SHA256 hash of this job directly from its class, ``settings``, ``molecule`` and attributes listed in ``_hash_attributes``, without generating the input file.
+
+        Branches of ``settings`` present in ``config.job`` (like ``runscript`` or ``keep``) and the ``run`` branch are ignored, since they do not affect the input. Instances of |Job| and |Results| found in ``settings`` are represented by hashes of corresponding jobs and instances of |Molecule| by their :meth:`~scm.plams.core.basemol.Molecule.fingerprint`. If ``settings`` or ``molecule`` contain a value that cannot be hashed this way, the hash of the input file is returned instead (see :meth:`~SingleJob.hash_input`).
+        """
+        special = {
+            Job: lambda x: x.hash(),
+            Results: lambda x: x.job.hash(),
+            Molecule: lambda x: x.fingerprint()
+        }
+        ignore = set(config.job) | {'run'}
+        settings = Settings()
+        dict.update(settings, {k:v for k,v in dict.items(self.settings) if k not in ignore})
+        data = Settings()
+        dict.update(data, {'type': self.__class__.__module__ + '.' + self.__class__.__qualname__, 'settings': settings, 'molecule': self.molecule,
+            'attributes': {name: getattr(self, name) for name in self._hash_attributes}})
+        return data.content_hash(special) or self._cached('hash_input', self.hash_input)
+
     def hash(self):
         """Calculate unique hash of this instance.
 
         The behavior of this method is adjusted by the value of ``hashing`` key in |JobManager| settings. If no |JobManager| is yet associated with this job, default setting from ``config.jobmanager.hashing`` is used.
 
+        Calculated hashes (as well as the input text) are cached, see :meth:`~Job.reset_hash`.
+
         Methods :meth:`~SingleJob.hash_input` and :meth:`~SingleJob.hash_runscript` are used to obtain hashes of, respectively, input and runscript.
 
         Currently supported values for ``hashing`` are:
@@ -328,6 +383,7 @@ class SingleJob(Job):
         *   ``input`` -- returns hash of the input file.
         *   ``runscript`` -- returns hash of the runscript.
         *   ``input+runscript`` -- returns SHA256 hash of the concatenation of **hashes** of input and runscript.
+        *   ``structural`` -- returns hash of ``settings`` and ``molecule``, calculated without generating the input file (see :meth:`~SingleJob.hash_structure`).
         """
         if self.jobmanager:
             mode = self.jobmanager.settings.hashing
@@ -337,11 +393,13 @@ class SingleJob(Job):
         if not mode:
             return None
         if mode == 'input':
-            return self.hash_input()
+            return self._cached('hash_input', self.hash_input)
         elif mode == 'runscript':
-            return self.hash_runscript()
+            return self._cached('hash_runscript', self.hash_runscript)
         elif mode == 'input+runscript':
-            return sha256(self.hash_input() + self.hash_runscript())
+            return sha256(self._cached('hash_input', self.hash_input) + self._cached('hash_runscript', self.hash_runscript))
+        elif mode == 'structural':
+            return self._cached('hash_structure', self.hash_structure)
         else:
             raise PlamsError('Unsupported hashing method: ' + str(mode))
 
@@ -368,7 +426,7 @@ class SingleJob(Job):
         runfile = opj(self.path, self._filename('run'))
 
         with open(inpfile, 'w') as inp:
-            inp.write(self.get_input())
+            inp.write(self._cached('input', self.get_input))
 
         with open(runfile, 'w') as run:
             run.write(self._full_runscript())
@@ -423,7 +481,7 @@ class MultiJob(Job):
         self.children = [] if children is None else children
         self.childrunner = childrunner
         self._active_children = 0
-        self._lock =  threading.Lock()
+        self._lock = threading.Condition()
 
 
     def new_children(self):
@@ -479,14 +537,16 @@ class MultiJob(Job):
     def _notify(self):
         """Notify this job that one of its children has finished.
 
-        Decrement ``_active_children`` by one. Use ``_lock`` to ensure thread safety.
+        Decrement ``_active_children`` by one. Use ``_lock`` to ensure thread safety. ``_lock`` is a :class:`~threading.Condition`, the thread executing :meth:`~MultiJob._execute` is woken up as soon as the last active child finishes.
         """
         with self._lock:
             self._active_children -= 1
+            if self._active_children <= 0:
+                self._lock.notify_all()
 
 
     def _execute(self, jobrunner):
-        """Run all children from ``children``. Then use :meth:`~MultiJob.new_children` and run all jobs produced by it. Repeat this procedure until :meth:`~MultiJob.new_children` returns an empty list. Wait for all started jobs to finish."""
+        """Run all children from ``children``. Then use :meth:`~MultiJob.new_children` and run all jobs produced by it. Repeat this procedure until :meth:`~MultiJob.new_children` returns an empty list. Wait for all started jobs to finish (children signal their completion with :meth:`~MultiJob._notify`, so there is no polling)."""
         log('Starting %s._execute()' % self.name, 7)
         jr = self.childrunner or jobrunner
 
@@ -513,6 +573,7 @@ class MultiJob(Job):
 
             new = self.new_children()
 
-        while self._active_children > 0:
-            time.sleep(config.sleepstep)
+        with self._lock:
+            while self._active_children > 0:
+                self._lock.wait()
         log('%s._execute() finished' % self.name, 7)
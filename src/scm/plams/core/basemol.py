@@ -1,5 +1,7 @@
 import copy
+import hashlib
 import heapq
+import itertools
 import math
 import numpy as np
 import os
@@ -8,9 +10,9 @@ from os.path import join as opj
 
 from .errors import MoleculeError, PTError, FileError
 from .functions import log
-from .private import smart_copy
+from .private import smart_copy, _atomic, _immutable
 from .settings import Settings
-from ..tools.geometry import rotation_matrix
+from ..tools.geometry import rotation_matrix, neighbor_pairs, minimum_image
 from ..tools.pdbtools import PDBHandler, PDBRecord
 from ..tools.periodic_table import PT
 from ..tools.units import Units
@@ -18,6 +20,45 @@ from ..tools.units import Units
 __all__ = ['Atom', 'Bond', 'Molecule', 'read_molecules']
 
 
+def _slots_getstate(obj):
+    """Return the state of *obj* (an |Atom| or a |Bond|) as a dictionary, just like ``__dict__`` of a regular object would be. ``properties`` are included only if not empty."""
+    cls = type(obj)
+    if cls not in _slot_names:
+        _slot_names[cls] = [name for c in cls.__mro__ for name in c.__dict__.get('__slots__', ()) if name not in ('_properties', '__dict__', '__weakref__')]
+    state = {}
+    if cls.__dictoffset__:
+        #reading obj.__dict__ would create an empty dictionary for every instance without custom attributes
+        d = object.__getstate__(obj) if hasattr(object, '__getstate__') else obj.__dict__
+        if isinstance(d, tuple):
+            d = d[0]
+        if d:
+            state.update(d)
+    for name in _slot_names[cls]:
+        try:
+            state[name] = getattr(obj, name)
+        except AttributeError:
+            pass
+    if obj._properties:
+        state['properties'] = obj._properties
+    return state
+
+_slot_names = {}
+
+
+def _slots_setstate(obj, state):
+    """Restore *obj* from *state* obtained with :func:`_slots_getstate`. States of objects pickled before |Atom| and |Bond| used ``__slots__`` are also accepted. Entries that cannot be set as attributes are moved to ``properties``."""
+    obj._properties = None
+    unknown = []
+    for name, value in state.items():
+        try:
+            setattr(obj, name, value)
+        except AttributeError:
+            unknown.append((name, value))
+    for name, value in unknown:
+        obj.properties[name] = value
+
+
+
 
 class Atom(object):
     """A class representing a single atom in three dimensional space.
@@ -30,6 +71,8 @@ class Atom(object):
     *   ``mol`` -- a |Molecule| this atom belongs to
     *   ``properties`` -- a |Settings| instance storing all other information about this atom (initially it is populated with *\*\*other* keyword arguments passed to the constructor)
 
+    To keep big molecules small in memory, |Atom| stores the attributes listed above (and ``id``, see :meth:`Molecule.set_atoms_id`) in ``__slots__``. Other attributes can still be added to an atom, the dictionary holding them is created only for atoms that actually have some. The |Settings| instance for ``properties`` is also created only when it is accessed for the first time.
+
     All the above attributes can be accessed either directly or using one of the following properties:
 
     *   ``x``, ``y``, ``z`` -- allow to read or modify each coordinate separately
@@ -64,6 +107,8 @@ class Atom(object):
 
     Internally, atomic coordinates are always expressed in angstroms. Most of methods that read or modify atomic coordinates accept keyword argument ``unit`` allowing to choose unit in which results and/or arguments are expressed (see |Units| for details). Throughout the entire code angstrom is the default length unit. If you don't specify ``unit`` parameter in any place of your script, all automatic unit handling described above boils down to occasional multiplication/division by 1.0.
     """
+    __slots__ = ('atnum', 'coords', 'bonds', 'mol', 'id', '_properties', '__dict__')
+
     def __init__(self, atnum=0, symbol=None, coords=None, unit='angstrom', bonds=None, mol=None, **other):
         if symbol is not None:
             self.symbol = symbol
@@ -71,15 +116,16 @@ class Atom(object):
             self.atnum = atnum
         self.mol = mol
         self.bonds = bonds or []
-        self.properties = Settings(other)
+        self._properties = Settings(other) if other else None
 
         if coords is None:
             self.coords = (0.0, 0.0, 0.0)
         elif len(coords) == 3:
+            ratio = Units.conversion_ratio(unit, 'angstrom')
             tmp = []
             for i in coords:
                 try:
-                    i = Units.convert(float(i), unit, 'angstrom')
+                    i = float(i) * ratio
                 except ValueError: pass
                 tmp.append(i)
             self.coords = tuple(tmp)
@@ -163,6 +209,21 @@ class Atom(object):
         return PT.get_connectors(self.atnum)
     connectors = property(_getconnectors)
 
+    def _getproperties(self):
+        if self._properties is None:
+            self._properties = Settings()
+        return self._properties
+    def _setproperties(self, value):
+        self._properties = value
+    properties = property(_getproperties, _setproperties)
+
+
+    def __getstate__(self):
+        return _slots_getstate(self)
+
+    def __setstate__(self, state):
+        _slots_setstate(self, state)
+
 
     def translate(self, vector, unit='angstrom'):
         """Move this atom in space by *vector*, expressed in *unit*.
@@ -258,14 +319,23 @@ class Bond (object):
 
         Newly created bond is **not** added to ``atom1.bonds`` or ``atom2.bonds``. Storing information about |Bond| in |Atom| is relevant only in the context of the whole |Molecule|, so this information is updated by :meth:`~Molecule.add_bond`.
 
+    Just like |Atom|, |Bond| uses ``__slots__``, accepts other attributes and creates ``properties`` only when they are accessed for the first time.
+
     """
     AR = 1.5
+    __slots__ = ('atom1', 'atom2', 'order', 'mol', '_properties', '__dict__')
+
     def __init__(self, atom1=None, atom2=None, order=1, mol=None, **other):
         self.atom1 = atom1
         self.atom2 = atom2
         self.order = order
         self.mol = mol
-        self.properties = Settings(other)
+        self._properties = Settings(other) if other else None
+
+
+    properties = Atom.properties
+    __getstate__ = Atom.__getstate__
+    __setstate__ = Atom.__setstate__
 
 
     def __str__(self):
@@ -331,7 +401,9 @@ class Molecule (object):
 
     .. note::
 
-        Each |Atom| in ``atoms`` list and each |Bond| in ``bonds`` list has a reference to the parent molecule. Moreover, each atom stores the list of bonds it's a part of and each bond stores references to atoms it bonds. That creates a complex net of references between objects that are part of a molecule. Consistency of this data is crucial for proper functioning of many methods. Because of that it is advised not to modify contents of ``atoms`` and ``bonds`` by hand. When you need to alter your molecule, methods :meth:`add_atom`, :meth:`delete_atom`, :meth:`add_bond` and :meth:`delete_bond` can be used to ensure that all these references are updated properly.
+        Each |Atom| in ``atoms`` list and each |Bond| in ``bonds`` list has a reference to the parent molecule. Moreover, each atom stores the list of bonds it's a part of and each bond stores references to atoms it bonds. That creates a complex net of references between objects that are part of a molecule. Consistency of this data is crucial for proper functioning of many methods. Because of that it is advised not to modify contents of ``atoms`` and ``bonds`` by hand. When you need to alter your molecule, methods :meth:`add_atom`, :meth:`delete_atom`, :meth:`add_bond` and :meth:`delete_bond` (or their batch counterparts :meth:`delete_atoms` and :meth:`add_bonds`) can be used to ensure that all these references are updated properly.
+
+        Deleted atoms and bonds are removed from ``atoms`` and ``bonds`` lazily, all at once, the next time one of these lists is accessed. Thanks to that, deleting many atoms or bonds one by one takes time proportional to the size of the molecule, not to its square. A reference to ``atoms`` or ``bonds`` obtained before a deletion is updated in place, but only when the list is accessed again through the molecule.
 
     Creating a |Molecule| object for your calculation can be done in two ways. You can start with an empty molecule and manually add all atoms (and bonds, if needed)::
 
@@ -412,6 +484,29 @@ class Molecule (object):
             self.properties.name = os.path.splitext(os.path.basename(filename))[0]
 
 
+    def _getatoms(self):
+        if self._deleted_atoms:
+            deleted = self._deleted_atoms
+            self._atoms[:] = [at for at in self._atoms if at not in deleted]
+            self._deleted_atoms = set()
+        return self._atoms
+    def _setatoms(self, value):
+        self._atoms = value
+        self._deleted_atoms = set()
+    atoms = property(_getatoms, _setatoms)
+
+    def _getbonds(self):
+        if self._deleted_bonds:
+            deleted = self._deleted_bonds
+            self._bonds[:] = [b for b in self._bonds if b not in deleted]
+            self._deleted_bonds = set()
+        return self._bonds
+    def _setbonds(self, value):
+        self._bonds = value
+        self._deleted_bonds = set()
+    bonds = property(_getbonds, _setbonds)
+
+
 #===========================================================================
 #==== Atoms/bonds manipulation =============================================
 #===========================================================================
@@ -426,22 +521,35 @@ class Molecule (object):
         if atoms is None:
             atoms = self.atoms
 
-        ret = smart_copy(self, owncopy=['properties'], without=['atoms','bonds'])
-
+        ret = smart_copy(self, owncopy=['properties'], without=['_atoms','_bonds','_deleted_atoms','_deleted_bonds'])
+        ret.atoms = []
+        ret.bonds = []
+
+        def copy_attributes(obj, replace):
+            new = obj.__class__.__new__(obj.__class__)
+            state = _slots_getstate(obj)
+            for k,v in state.items():
+                if k == 'properties':
+                    state[k] = v.copy()
+                elif k not in replace and type(v) not in _atomic and not _immutable(v):
+                    state[k] = copy.deepcopy(v)
+            state.update(replace)
+            _slots_setstate(new, state)
+            return new
+
+        bro = {}
         for at in atoms:
-            at_copy = smart_copy(at, owncopy=['properties'], without=['mol','bonds'])
-            ret.add_atom(at_copy)
-            at._bro = at_copy
+            at_copy = copy_attributes(at, {'mol': ret, 'bonds': []})
+            ret.atoms.append(at_copy)
+            bro[id(at)] = at_copy
 
         for bo in self.bonds:
-            if hasattr(bo.atom1, '_bro') and hasattr(bo.atom2, '_bro'):
-                bo_copy = smart_copy(bo, owncopy=['properties'], without=['atom1', 'atom2', 'mol'])
-                bo_copy.atom1 = bo.atom1._bro
-                bo_copy.atom2 = bo.atom2._bro
-                ret.add_bond(bo_copy)
-
-        for at in atoms:
-            del at._bro
+            at1, at2 = bro.get(id(bo.atom1)), bro.get(id(bo.atom2))
+            if at1 is not None and at2 is not None:
+                bo_copy = copy_attributes(bo, {'atom1': at1, 'atom2': at2, 'mol': ret})
+                at1.bonds.append(bo_copy)
+                at2.bonds.append(bo_copy)
+                ret.bonds.append(bo_copy)
 
         return ret
 
@@ -464,7 +572,9 @@ class Molecule (object):
             >>> mol.add_atom(Atom(symbol='C', coords=(0.0, 0.0, 0.0)), adjacent=[h1, h2, (o,2)])
 
         """
-        self.atoms.append(atom)
+        if atom in self._deleted_atoms:
+            self.atoms #flush pending deletions, atom is added again
+        self._atoms.append(atom)
         atom.mol = self
         if adjacent is not None:
             for adj in adjacent:
@@ -494,17 +604,34 @@ class Molecule (object):
             >>> mol.delete_atom(mol[1]) #since the second atom of original molecule is now the first
 
         """
+        if not isinstance(atom, Atom):
+            raise MoleculeError('delete_atom: invalid argument passed as atom')
         if atom.mol != self:
             raise MoleculeError('delete_atom: passed atom should belong to the molecule')
-        try:
-            self.atoms.remove(atom)
-        except:
-            raise MoleculeError('delete_atom: invalid argument passed as atom')
+        self._deleted_atoms.add(atom)
         atom.mol = None
         for b in reversed(atom.bonds):
             self.delete_bond(b)
 
 
+    def delete_atoms(self, atoms):
+        """Delete all atoms from *atoms* (any iterable of |Atom| instances) from this molecule.
+
+        All atoms have to belong to the molecule, otherwise an exception is raised and the molecule is not modified. All bonds containing these atoms are removed too. This is equivalent to calling :meth:`delete_atom` for each atom, but ``atoms`` and ``bonds`` lists are rebuilt only once::
+
+            >>> mol.delete_atoms(at for at in mol if at.atnum == 1)
+
+        """
+        atoms = list(dict.fromkeys(atoms))
+        for at in atoms:
+            if not isinstance(at, Atom):
+                raise MoleculeError('delete_atoms: invalid argument passed as atom')
+            if at.mol != self:
+                raise MoleculeError('delete_atoms: passed atoms should belong to the molecule')
+        for at in atoms:
+            self.delete_atom(at)
+
+
     def add_bond(self, arg1, arg2=None, order=1):
         """Add new bond to this molecule.
 
@@ -527,14 +654,45 @@ class Molecule (object):
             raise MoleculeError('add_bond: invalid arguments passed')
 
         if newbond.atom1.mol == self and newbond.atom2.mol == self:
+            if newbond in self._deleted_bonds:
+                self.bonds #flush pending deletions, bond is added again
             newbond.mol = self
-            self.bonds.append(newbond)
+            self._bonds.append(newbond)
             newbond.atom1.bonds.append(newbond)
             newbond.atom2.bonds.append(newbond)
         else:
             raise MoleculeError('add_bond: bonded atoms have to belong to the molecule')
 
 
+    def add_bonds(self, bonds):
+        """Add many bonds to this molecule at once.
+
+        *bonds* should be an iterable. Each of its elements can be either a |Bond| instance, a pair of atoms ``(Atom, Atom)`` (a single bond is inserted in this case) or a triple ``(Atom, Atom, order)``. All bonded atoms have to belong to the molecule, otherwise an exception is raised and no bond is added::
+
+            >>> mol.add_bonds([(mol[1], mol[2]), (mol[2], mol[3], 2)])
+
+        """
+        new = []
+        for arg in bonds:
+            if isinstance(arg, Bond):
+                newbond = arg
+            elif isinstance(arg, tuple) and len(arg) in (2,3) and isinstance(arg[0], Atom) and isinstance(arg[1], Atom):
+                newbond = Bond(*arg)
+            else:
+                raise MoleculeError('add_bonds: invalid arguments passed')
+            if newbond.atom1.mol != self or newbond.atom2.mol != self:
+                raise MoleculeError('add_bonds: bonded atoms have to belong to the molecule')
+            new.append(newbond)
+
+        if self._deleted_bonds.intersection(new):
+            self.bonds #flush pending deletions, some bonds are added again
+        for b in new:
+            b.mol = self
+            b.atom1.bonds.append(b)
+            b.atom2.bonds.append(b)
+        self._bonds += new
+
+
     def delete_bond(self, arg1, arg2=None):
         """Delete bond from this molecule
 
@@ -546,23 +704,34 @@ class Molecule (object):
             delbond = arg1
         else:
             raise MoleculeError('delete_bond: invalid arguments passed')
-        if delbond in self.bonds:
+        if delbond is not None and delbond.mol is self and delbond in delbond.atom1.bonds:
             delbond.mol = None
-            self.bonds.remove(delbond)
+            self._deleted_bonds.add(delbond)
             delbond.atom1.bonds.remove(delbond)
             delbond.atom2.bonds.remove(delbond)
 
 
     def delete_all_bonds(self):
         """Delete all bonds from the molecule."""
-        for b in reversed(self.bonds):
-            self.delete_bond(b)
+        bonds = self.bonds
+        for b in bonds:
+            b.mol = None
+        deleted = set(bonds)
+        for at in self.atoms:
+            if at.bonds:
+                at.bonds[:] = [b for b in at.bonds if b not in deleted]
+        del bonds[:]
 
 
     def find_bond(self, atom1, atom2):
-        """Find and return a bond between *atom1* and *atom2*. Both atoms have to belong to the molecule. If a bond between chosen atoms does not exist, ``None`` is returned."""
+        """Find and return a bond between *atom1* and *atom2*. Both atoms have to belong to the molecule. If a bond between chosen atoms does not exist, ``None`` is returned.
+
+        Only bonds of the atom with fewer bonds are checked, so the cost of this method does not depend on the size of the molecule.
+        """
         if atom1.mol != self or atom2.mol != self:
             raise MoleculeError('find_bond: atoms passed as arguments have to belong to the molecule')
+        if len(atom2.bonds) < len(atom1.bonds):
+            atom1, atom2 = atom2, atom1
         for b in atom1.bonds:
             if atom2 is b.other_end(atom1):
                 return b
@@ -640,26 +809,24 @@ class Molecule (object):
         """
         frags = []
         clone = self.copy()
-        for at in clone:
-            at._visited = False
+        visited = set()
 
         def dfs(v, mol):
-            v._visited = True
+            visited.add(v)
             v.mol = mol
             for e in v.bonds:
                 e.mol = mol
                 u = e.other_end(v)
-                if not u._visited:
+                if u not in visited:
                     dfs(u, mol)
 
         for src in clone.atoms:
-            if not src._visited:
+            if src not in visited:
                 m = Molecule()
                 dfs(src, m)
                 frags.append(m)
 
         for at in clone.atoms:
-            del at._visited
             at.mol.atoms.append(at)
         for b in clone.bonds:
             b.mol.bonds.append(b)
@@ -674,7 +841,7 @@ class Molecule (object):
 
         The problem of finding molecular bonds for a given set of atoms in space does not have a general solution, especially considering the fact the chemical bond is itself not a precisely defined concept. For every method, no matter how sophisticated, there will always be corner cases for which the method produces disputable results. Moreover, depending on the context (area of application) the desired solution for a particular geometry may vary. Please do not treat this method as an oracle always providing proper solution. Algorithm used here gives very good results for geometries that are not very far from optimal geometry, especially consisting of lighter atoms. All kinds of organic molecules, including aromatic ones, usually work very well. Problematic results can emerge for transition metal complexes, transition states, incomplete molecules etc.
 
-        The algorithm used scales as *n log n* where *n* is the number of atoms.
+        The algorithm used scales as *n log n* where *n* is the number of atoms. Candidate pairs of atoms are found with :func:`~scm.plams.tools.geometry.neighbor_pairs`. For periodic systems (non-empty ``lattice``) the minimum image convention is used, so bonds crossing the cell boundary are also found.
 
         .. warning::
 
@@ -682,102 +849,70 @@ class Molecule (object):
 
         """
 
-        class HeapElement(object):
-            def __init__(self, order, ratio, atom1, atom2):
-                eff_ord = order
-                if order == 1.5: #effective order for aromatic bonds
-                    eff_ord = 1.15
-                elif order == 1 and {atom1.symbol, atom2.symbol} == {'C', 'N'}:
-                    eff_ord = 1.11 #effective order for single C-N bond
-                value = (eff_ord + 0.9) * ratio
-                self.data = (value, order, ratio)
-                self.atoms = (atom1, atom2)
-            def unpack(self):
-                val, o, r = self.data
-                at1, at2 = self.atoms
-                return val, o, r, at1, at2
-            def __lt__(self, other): return self.data < other.data
-            def __le__(self, other): return self.data <= other.data
-            def __eq__(self, other): return self.data == other.data
-            def __ne__(self, other): return self.data != other.data
-            def __gt__(self, other): return self.data > other.data
-            def __ge__(self, other): return self.data >= other.data
+        def heap_element(order, ratio, i, j):
+            eff_ord = order
+            if order == 1.5: #effective order for aromatic bonds
+                eff_ord = 1.15
+            elif order == 1 and {atnum[i], atnum[j]} == {6, 7}:
+                eff_ord = 1.11 #effective order for single C-N bond
+            return ((eff_ord + 0.9) * ratio, order, ratio, i, j)
 
         self.delete_all_bonds()
+        if not self.atoms:
+            return
 
         dmax = 1.28
 
-        cubesize = dmax*2.1*max([at.radius for at in self.atoms])
-
-        cubes = {}
-        for i,at in enumerate(self.atoms):
-            at._id = i+1
-            at.free = at.connectors
-            at.cube = tuple(map(lambda x: int(math.floor(x/cubesize)), at.coords))
-            if at.cube in cubes:
-                cubes[at.cube].append(at)
-            else:
-                cubes[at.cube] = [at]
-
-        neighbors = {}
-        for cube in cubes:
-            neighbors[cube] = []
-            for i in range(cube[0]-1, cube[0]+2):
-                for j in range(cube[1]-1, cube[1]+2):
-                    for k in range(cube[2]-1, cube[2]+2):
-                        if (i,j,k) in cubes:
-                            neighbors[cube] += cubes[(i,j,k)]
-
-        heap = []
-        for at1 in self.atoms:
-            if at1.free > 0:
-                for at2 in neighbors[at1.cube]:
-                    if (at2.free > 0) and (at1._id < at2._id):
-                        ratio = at1.distance_to(at2)/(at1.radius+at2.radius)
-                        if (ratio < dmax):
-                            heap.append(HeapElement(0, ratio, at1, at2))
-                            #I hate to do this, but I guess there's no other way :/ [MH]
-                            if (at1.atnum == 16 and at2.atnum == 8):
-                                at1.free = 6
-                            elif (at2.atnum == 16 and at1.atnum == 8):
-                                at2.free = 6
-                            elif (at1.atnum == 7):
-                                at1.free += 1
-                            elif (at2.atnum == 7):
-                                at2.free += 1
+        an = np.array([at.atnum for at in self.atoms], dtype=int)
+        atnum = an.tolist()
+        radius = PT.radii(an)
+        free = PT.connectors(an).astype(float)
+
+        i, j, d = neighbor_pairs(self.as_array(), dmax*2*radius.max(), self.lattice)
+        ratio = d / (radius[i] + radius[j])
+        mask = (ratio < dmax) & (free[i] > 0) & (free[j] > 0)
+        i, j, ratio = i[mask], j[mask], ratio[mask]
+
+        #I hate to do this, but I guess there's no other way :/ [MH]
+        sulfur_i = (an[i] == 16) & (an[j] == 8)
+        sulfur_j = (an[j] == 16) & (an[i] == 8) & ~sulfur_i
+        nitrogen_i = (an[i] == 7) & ~sulfur_i & ~sulfur_j
+        nitrogen_j = (an[j] == 7) & ~sulfur_i & ~sulfur_j & ~nitrogen_i
+        free[i[sulfur_i]] = 6
+        free[j[sulfur_j]] = 6
+        np.add.at(free, i[nitrogen_i], 1)
+        np.add.at(free, j[nitrogen_j], 1)
+        free[an == 7] = np.where(free[an == 7] > 6, 4, 3)
+        free = free.tolist()
+
+        heap = [heap_element(0, r, a, b) for a, b, r in zip(i.tolist(), j.tolist(), ratio.tolist())]
         heapq.heapify(heap)
 
-        for at in self.atoms:
-            if at.atnum == 7:
-                if at.free > 6:
-                    at.free = 4
-                else:
-                    at.free = 3
-
         while heap:
-            val, o, r, at1, at2 = heapq.heappop(heap).unpack()
+            val, o, r, a, b = heapq.heappop(heap)
             step = 1 if o in [0,2] else 0.5
-            if at1.free >= step and at2.free >= step:
+            if free[a] >= step and free[b] >= step:
                 o += step
-                at1.free -= step
-                at2.free -= step
+                free[a] -= step
+                free[b] -= step
                 if o < 3:
-                    heapq.heappush(heap, HeapElement(o,r,at1,at2))
+                    heapq.heappush(heap, heap_element(o, r, a, b))
                 else:
-                    self.add_bond(at1,at2,o)
+                    self.add_bond(self.atoms[a], self.atoms[b], o)
             elif o > 0:
                 if o == 1.5:
                     o = Bond.AR
-                self.add_bond(at1,at2,o)
+                self.add_bond(self.atoms[a], self.atoms[b], o)
 
+        arom = {}
         def dfs(atom, par):
-            atom.arom += 1000
+            arom[atom] += 1000
             for b in atom.bonds:
                 oe = b.other_end(atom)
-                if b.is_aromatic() and oe.arom < 1000:
-                    if oe.arom > 2:
+                if b.is_aromatic() and arom[oe] < 1000:
+                    if arom[oe] > 2:
                         return False
-                    if par and oe.arom == 1:
+                    if par and arom[oe] == 1:
                         b.order = 2
                         return True
                     if dfs(oe, 1-par):
@@ -785,15 +920,12 @@ class Molecule (object):
                         return True
 
         for at in self.atoms:
-            at.arom = len(list(filter(Bond.is_aromatic, at.bonds)))
+            arom[at] = len(list(filter(Bond.is_aromatic, at.bonds)))
 
         for at in self.atoms:
-            if at.arom == 1:
+            if arom[at] == 1:
                 dfs(at, 1)
 
-        for at in self.atoms:
-            del at.cube,at.free,at._id,at.arom
-
 
 
 
@@ -803,13 +935,42 @@ class Molecule (object):
 
 
 
+    def as_array(self, atom_subset=None):
+        """Return the coordinates of all atoms of this molecule (or atoms from *atom_subset*, if supplied) as a numpy array of shape (N,3), expressed in angstroms.
+
+        This is the preferred way of processing coordinates of big molecules: do the work on the array with numpy and store the result back with :meth:`from_array`::
+
+            >>> xyz = mol.as_array()
+            >>> xyz[:,2] *= -1   #mirror image
+            >>> mol.from_array(xyz)
+
+        All coordinates of atoms involved have to be numerical values, :exc:`~exceptions.ValueError` is raised otherwise.
+        """
+        atoms = self.atoms if atom_subset is None else atom_subset
+        coords = itertools.chain.from_iterable([at.coords for at in atoms])
+        return np.fromiter(coords, dtype=float, count=3*len(atoms)).reshape(-1,3)
+
+
+    def from_array(self, xyz, atom_subset=None):
+        """Update the coordinates of all atoms of this molecule (or atoms from *atom_subset*, if supplied) with values from *xyz*, expressed in angstroms.
+
+        *xyz* should be a numpy array (or any other container convertible to it) of shape (N,3), where N is the number of atoms to update. The order of rows follows the order of atoms in ``atoms`` (or *atom_subset*), just like in :meth:`as_array`.
+        """
+        atoms = self.atoms if atom_subset is None else atom_subset
+        xyz = np.asarray(xyz, dtype=float)
+        if xyz.shape != (len(atoms), 3):
+            raise MoleculeError('from_array: coordinates of shape {} cannot be assigned to {} atoms'.format(xyz.shape, len(atoms)))
+        for at, coords in zip(atoms, xyz.tolist()):
+            at.coords = tuple(coords)
+
+
     def translate(self, vector, unit='angstrom'):
         """Move this molecule in space by *vector*, expressed in *unit*.
 
         *vector* should be an iterable container of length 3 (usually tuple, list or numpy array). *unit* describes unit of values stored in *vector*.
         """
-        for at in self.atoms:
-            at.translate(vector, unit)
+        ratio = Units.conversion_ratio(unit, 'angstrom')
+        self.from_array(self.as_array() + np.array(vector, dtype=float)*ratio)
 
 
     def rotate_lattice(self, matrix):
@@ -833,8 +994,8 @@ class Molecule (object):
 
             This method does not check if supplied matrix is a proper rotation matrix.
         """
-        for at in self.atoms:
-            at.rotate(matrix)
+        matrix = np.array(matrix, dtype=float).reshape(3,3)
+        self.from_array(self.as_array() @ matrix.T)
         if lattice:
             self.rotate_lattice(matrix)
 
@@ -925,56 +1086,93 @@ class Molecule (object):
         rotmat = np.identity(3) + a1 * W + a2 * np.dot(W,W)
 
         trans = np.array(other_end.vector_to((0,0,0)))
-        for at in atoms_to_rotate:
-            at.translate(trans)
-            at.rotate(rotmat)
-            at.translate(-trans)
+        atoms_to_rotate = list(atoms_to_rotate)
+        xyz = self.as_array(atoms_to_rotate)
+        self.from_array((xyz + trans) @ rotmat.T - trans, atoms_to_rotate)
 
 
-    def closest_atom(self, point, unit='angstrom'):
+    def closest_atom(self, point, unit='angstrom', periodic=False):
         """Return the atom of this molecule that is the closest one to some *point* in space.
 
-        *point* should be an iterable container of length 3 (for example: tuple, |Atom|, list, numpy array). *unit* describes unit of values stored in *point*.
+        *point* should be an iterable container of length 3 (for example: tuple, |Atom|, list, numpy array). *unit* describes unit of values stored in *point*. If *periodic* is ``True``, distances are calculated with the minimum image convention using ``lattice`` of this molecule.
         """
-        dist = float('inf')
-        for at in self.atoms:
-            newdist = at.distance_to(point, unit=unit)
-            if newdist < dist:
-                dist = newdist
-                ret = at
-        return ret
+        return self.atoms[int(np.argmin(self._distances_to(point, unit, periodic)))]
 
 
-    def distance_to_point(self, point, unit='angstrom', result_unit='angstrom'):
+    def distance_to_point(self, point, unit='angstrom', result_unit='angstrom', periodic=False):
         """Calculate the distance between this molecule and some *point* in space (distance between *point* and :meth:`closest_atom`).
 
-        *point* should be an iterable container of length 3 (for example: tuple, |Atom|, list, numpy array). *unit* describes unit of values stored in *point*. Returned value is expressed in *result_unit*.
+        *point* should be an iterable container of length 3 (for example: tuple, |Atom|, list, numpy array). *unit* describes unit of values stored in *point*. Returned value is expressed in *result_unit*. If *periodic* is ``True``, the minimum image convention is used (see :meth:`closest_atom`).
         """
-        at = self.closest_atom(point, unit)
-        return at.distance_to(point, unit, result_uni)
+        dist = self._distances_to(point, unit, periodic).min()
+        return Units.convert(float(dist), 'angstrom', result_unit)
 
 
-    def distance_to_mol(self, other, result_unit='angstrom', return_atoms=False):
+    def distance_to_mol(self, other, result_unit='angstrom', return_atoms=False, periodic=False):
         """Calculate the distance between this molecule and some *other* molecule.
 
         The distance is measured as the smallest distance between a pair of atoms, one belonging to each of the molecules. Returned distance is expressed in *result_unit*.
 
         If *return_atoms* is ``False``, only a single number is returned.  If *return_atoms* is ``True``, this method returns a tuple ``(distance, atom1, atom2)`` where ``atom1`` and ``atom2`` are atoms fulfilling the minimal distance, with atom1 belonging to this molecule and atom2 to *other*.
+
+        If *periodic* is ``True``, distances are calculated with the minimum image convention using ``lattice`` of this molecule.
         """
-        dist = float('inf')
-        for at1 in self.atoms:
-            for at2 in other.atoms:
-                newdist = (at1.x-at2.x)**2 + (at1.y-at2.y)**2 + (at1.z-at2.z)**2
-                if newdist < dist:
-                    dist = newdist
-                    atom1 = at1
-                    atom2 = at2
+        if not self.atoms or not other.atoms:
+            raise MoleculeError('distance_to_mol: both molecules need to contain at least one atom')
+        xyz1, xyz2 = self.as_array(), other.as_array()
+        lattice = self.lattice if periodic else None
+        step = max(1, (1<<20) // len(xyz2))
+        dist, atom1, atom2 = float('inf'), None, None
+        for start in range(0, len(xyz1), step):
+            block = xyz1[start:start+step]
+            vectors = (xyz2[None,:,:] - block[:,None,:]).reshape(-1,3)
+            if lattice:
+                vectors = minimum_image(vectors, lattice)
+            sq = np.einsum('ij,ij->i', vectors, vectors)
+            k = int(np.argmin(sq))
+            if sq[k] < dist:
+                dist = sq[k]
+                atom1, atom2 = self.atoms[start + k//len(xyz2)], other.atoms[k%len(xyz2)]
         res = Units.convert(math.sqrt(dist), 'angstrom', result_unit)
         if return_atoms:
             return res, atom1, atom2
         return res
 
 
+    def atoms_within(self, point, radius, unit='angstrom', periodic=False):
+        """Return a list of atoms of this molecule that are closer to some *point* in space than *radius*.
+
+        *point* should be an iterable container of length 3 (for example: tuple, |Atom|, list, numpy array). Both *point* and *radius* are expressed in *unit*. Returned atoms follow the order of ``atoms``. If *periodic* is ``True``, the minimum image convention is used (see :meth:`closest_atom`).
+        """
+        radius = Units.convert(radius, unit, 'angstrom')
+        if not self.atoms:
+            return []
+        return [self.atoms[i] for i in np.nonzero(self._distances_to(point, unit, periodic) < radius)[0].tolist()]
+
+
+    def pairs_within(self, radius, unit='angstrom', periodic=False):
+        """Return a list of all pairs of atoms of this molecule that are closer to each other than *radius*, expressed in *unit*.
+
+        Every pair is a tuple ``(atom1, atom2)`` with ``atom1`` preceding ``atom2`` in ``atoms``. If *periodic* is ``True``, the minimum image convention is used with ``lattice`` of this molecule and each pair of atoms is listed at most once (see :func:`~scm.plams.tools.geometry.neighbor_pairs` for details).
+
+        Pairs are found using a grid of cells, so this method remains fast also for very big molecules.
+        """
+        radius = Units.convert(radius, unit, 'angstrom')
+        i, j, _ = neighbor_pairs(self.as_array(), radius, self.lattice if periodic else None)
+        return [(self.atoms[a], self.atoms[b]) for a, b in zip(i.tolist(), j.tolist())]
+
+
+    def _distances_to(self, point, unit, periodic):
+        """Return a numpy array with distances (in angstroms) between *point* (expressed in *unit*) and all atoms of this molecule."""
+        if not self.atoms:
+            raise MoleculeError('Distance to an empty molecule cannot be calculated')
+        point = np.array(tuple(point), dtype=float) * Units.conversion_ratio(unit, 'angstrom')
+        vectors = self.as_array() - point
+        if periodic and self.lattice:
+            vectors = minimum_image(vectors, self.lattice)
+        return np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
+
+
     def wrap(self, length, angle=2*math.pi, length_unit='angstrom', angle_unit='radian'):
         """wrap(self, length, angle=2*pi, length_unit='angstrom', angle_unit='radian')
 
@@ -1001,8 +1199,8 @@ class Molecule (object):
         length = Units.convert(length, length_unit, 'angstrom')
         angle = Units.convert(angle, angle_unit, 'radian')
 
-        xs = [atom.x for atom in self.atoms]
-        if max(xs)-min(xs) > length:
+        xyz = self.as_array()
+        if xyz[:,0].max() - xyz[:,0].min() > length:
             raise MoleculeError('wrap: x-extension of the molecule is larger than length')
 
         if angle < 0 or angle > 2*math.pi:
@@ -1010,29 +1208,21 @@ class Molecule (object):
 
         R = length / angle
 
-        def map_ring(x,y):
-            return ((R-y) * math.cos(x/R), (R-y) * math.sin(x/R))
-
-        for at in self.atoms:
-            at.x, at.y = map_ring(at.x, at.y)
+        x, y = xyz[:,0] / R, R - xyz[:,1]
+        xyz[:,0], xyz[:,1] = y * np.cos(x), y * np.sin(x)
+        self.from_array(xyz)
 
 
     def get_center_of_mass(self, unit='angstrom'):
         """Return the center of mass of this molecule (as a tuple). Returned coordinates are expressed in *unit*."""
-        center = [0.0,0.0,0.0]
-        total_mass = 0.0
-        for at in self.atoms:
-            total_mass += at.mass
-            for i in range(3):
-                center[i] += at.mass*at.coords[i]
-        for i in range(3):
-            center[i] = Units.convert(center[i]/total_mass, 'angstrom', unit)
-        return tuple(center)
+        masses = PT.masses([at.atnum for at in self.atoms])
+        center = masses @ self.as_array() / masses.sum()
+        return tuple((center * Units.conversion_ratio('angstrom', unit)).tolist())
 
 
     def get_mass(self):
         """Return mass of the molecule, expressed in atomic units."""
-        return sum([at.mass for at in self.atoms])
+        return float(PT.masses([at.atnum for at in self.atoms]).sum())
 
 
     def get_formula(self):
@@ -1047,6 +1237,44 @@ class Molecule (object):
         return formula
 
 
+    def fingerprint(self):
+        """Return SHA256 hash (hexadecimal string) of the contents of this molecule. The hash is calculated directly from the data, without producing any text representation.
+
+        The hash covers atomic numbers, coordinates and ``properties`` of all atoms (in the order of ``atoms``), all bonds with their orders and ``properties``, the ``lattice`` and ``properties`` of the molecule. If any of these ``properties`` contains a value that cannot be hashed, ``None`` is returned (see :meth:`Settings.content_hash<scm.plams.core.settings.Settings.content_hash>`).
+        """
+        atoms, bonds = self.atoms, self.bonds
+        index = {id(at):i for i,at in enumerate(atoms)}
+        h = hashlib.sha256()
+        h.update(b'%d %d %d;' % (len(atoms), len(bonds), len(self.lattice)))
+        h.update(np.array([at.atnum for at in atoms], dtype=np.int64).tobytes())
+        try:
+            h.update(self.as_array().tobytes())
+        except (TypeError, ValueError):
+            #coordinates given as strings (e.g. parameter names used in the input)
+            coords = Settings()
+            dict.__setitem__(coords, 'coords', [tuple(at.coords) for at in atoms])
+            prop = coords.content_hash()
+            if prop is None:
+                return None
+            h.update(('c:%s;' % prop).encode())
+        h.update(np.array([(index[id(b.atom1)], index[id(b.atom2)]) for b in bonds], dtype=np.int64).tobytes())
+        h.update(np.array([b.order for b in bonds], dtype=float).tobytes())
+        h.update(np.array(self.lattice, dtype=float).tobytes())
+
+        for tag, objects in (('a', atoms), ('b', bonds)):
+            for i, obj in enumerate(objects):
+                if obj._properties:
+                    prop = obj._properties.content_hash()
+                    if prop is None:
+                        return None
+                    h.update(('%s%d:%s;' % (tag, i, prop)).encode())
+        prop = self.properties.content_hash()
+        if prop is None:
+            return None
+        h.update(prop.encode())
+        return h.hexdigest()
+
+
     def apply_strain(self, strain):
         """Apply a strain deformation to a periodic system.
 
@@ -1067,10 +1295,8 @@ class Molecule (object):
         frac_coords_transf = np.linalg.inv(lattice_np.T)
         deformed_lattice = np.dot(lattice_np, np.eye(n) + np.array(strain))
 
-        for atom in self.atoms:
-            coord_np = np.array(atom.coords)
-            fractional_coords = np.matmul(frac_coords_transf, coord_np.T)
-            atom.coords = tuple(np.matmul(fractional_coords,deformed_lattice))
+        fractional_coords = self.as_array() @ frac_coords_transf.T
+        self.from_array(fractional_coords @ deformed_lattice)
 
         self.lattice = [tuple(vec) for vec in deformed_lattice.tolist()]
 
@@ -1106,13 +1332,10 @@ class Molecule (object):
         for i,atom in enumerate(self.atoms):
             s += ('%5i'%(i+1)) + str(atom) + '\n'
         if len(self.bonds) > 0:
-            for j,atom in enumerate(self.atoms):
-                atom._tmpid = j+1
+            tmpid = {atom: j+1 for j,atom in enumerate(self.atoms)}
             s += '  Bonds: \n'
             for bond in self.bonds:
-                s += '   (%d)--%1.1f--(%d)\n'%(bond.atom1._tmpid, bond.order, bond.atom2._tmpid)
-            for atom in self.atoms:
-                del atom._tmpid
+                s += '   (%d)--%1.1f--(%d)\n'%(tmpid[bond.atom1], bond.order, tmpid[bond.atom2])
         if self.lattice:
             s += '  Lattice:\n'
             for vec in self.lattice:
@@ -1178,6 +1401,23 @@ class Molecule (object):
         return self.copy()
 
 
+    def __getstate__(self):
+        """Prepare the state of this molecule for pickling. ``atoms`` and ``bonds`` are stored as regular lists, with pending deletions already applied."""
+        state = {k:v for k,v in self.__dict__.items() if k not in ('_atoms','_bonds','_deleted_atoms','_deleted_bonds')}
+        state['atoms'] = self.atoms
+        state['bonds'] = self.bonds
+        return state
+
+
+    def __setstate__(self, state):
+        state = dict(state)
+        atoms = state.pop('atoms', [])
+        bonds = state.pop('bonds', [])
+        self.__dict__.update(state)
+        self.atoms = atoms
+        self.bonds = bonds
+
+
 
 #===========================================================================
 #==== File/format IO =======================================================
@@ -1532,16 +1772,18 @@ class Molecule (object):
         """
         Store all the information about this |Molecule| in a dictionary.
 
-        Returned dictionary is, in principle, identical to ``self.__dict__`` of the current instance, apart from the fact that all |Atom| and |Bond| instances in ``atoms`` and ``bonds`` lists are replaced with dictionaries storing corresponing information.
+        Returned dictionary is, in principle, identical to the pickled state of the current instance (see :meth:`__getstate__`), apart from the fact that all |Atom| and |Bond| instances in ``atoms`` and ``bonds`` lists are replaced with dictionaries storing corresponing information.
 
         This method is a counterpart of :meth:`~scm.plams.core.basemol.Molecule.from_dict`.
 
         """
-        mol_dict = copy.copy(self.__dict__)
+        mol_dict = self.__getstate__()
         atom_indices = {id(a): i for i, a in enumerate(mol_dict['atoms'])}
         bond_indices = {id(b): i for i, b in enumerate(mol_dict['bonds'])}
-        atom_dicts = [copy.copy(a.__dict__) for a in mol_dict['atoms']]
-        bond_dicts = [copy.copy(b.__dict__) for b in mol_dict['bonds']]
+        atom_dicts = [_slots_getstate(a) for a in mol_dict['atoms']]
+        bond_dicts = [_slots_getstate(b) for b in mol_dict['bonds']]
+        for a_dict in atom_dicts + bond_dicts:
+            a_dict.setdefault('properties', Settings())
         for a_dict in atom_dicts:
             a_dict['bonds'] = [bond_indices[id(b)] for b in a_dict['bonds']]
             del(a_dict['mol'])
@@ -1563,14 +1805,14 @@ class Molecule (object):
         This method is a counterpart of :meth:`~scm.plams.core.basemol.Molecule.as_dict`.
         """
         mol = cls()
-        mol.__dict__ = copy.copy(dictionary)
+        mol.__setstate__(dictionary)
         atom_dicts = mol.atoms
         bond_dicts = mol.bonds
         mol.atoms=[]
         mol.bonds=[]
         for a_dict in atom_dicts:
             a = Atom()
-            a.__dict__ = a_dict
+            _slots_setstate(a, a_dict)
             a.mol = mol
             a.bonds=[]
             mol.add_atom(a)
@@ -1578,7 +1820,7 @@ class Molecule (object):
             b = Bond(None, None)
             b_dict['atom1'] = mol.atoms[b_dict['atom1']]
             b_dict['atom2'] = mol.atoms[b_dict['atom2']]
-            b.__dict__ = b_dict
+            _slots_setstate(b, b_dict)
             b.mol = mol
             mol.add_bond(b)
         return mol
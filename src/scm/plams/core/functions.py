@@ -7,6 +7,7 @@ import threading
 import time
 import types
 
+from collections.abc import Mapping
 from os.path import join as opj
 from os.path import isfile, isdir, expandvars, dirname
 
@@ -101,7 +102,7 @@ def load(filename):
 #===========================================================================
 
 
-def load_all(path, jobmanager=None):
+def load_all(path, jobmanager=None, lazy=False, workers=1):
     """Load all jobs from *path*.
 
     This function works as a multiple execution of |load_job|. It searches for ``.dill`` files inside the directory given by *path*, yet not directly in it, but one level deeper. In other words, all files matching ``path/*/*.dill`` are used. That way a path to the main working folder of a previously run script can be used to import all the jobs run by that script.
@@ -112,19 +113,68 @@ def load_all(path, jobmanager=None):
 
     Jobs are loaded using default job manager stored in ``config.jm``. If you wish to use a different one you can pass it as *jobmanager* argument of this function.
 
-    Returned value is a dictionary containing all loaded jobs as values and absolute paths to ``.dill`` files as keys.
+    If *lazy* is ``True``, jobs are only indexed with :meth:`~scm.plams.core.jobmanager.JobManager.index_job`: the hash stored next to each ``.dill`` file is read, but the job is not unpickled until |RPM| finds a new job with the same hash or until it is accessed in the returned dictionary. Jobs that cannot be indexed that way (for example pickled by an older version of PLAMS) are loaded immediately. For big restart folders this makes the startup almost instantaneous.
+
+    Jobs that have to be loaded (all of them if *lazy* is ``False``) are loaded using *workers* threads.
+
+    Returned value is a dictionary containing all loaded jobs as values and absolute paths to ``.dill`` files as keys. In the lazy mode it is a read-only dictionary-like object that loads jobs on first access.
     """
     jm = jobmanager or config.jm
-    loaded_jobs = {}
+    dills = _find_dills(path)
+
+    indexed = {}
+    if lazy:
+        indexed = {dill: h for dill, h in ((dill, jm.index_job(dill)) for dill in dills) if h is not None}
+        dills = [dill for dill in dills if dill not in indexed]
+
+    if workers > 1 and len(dills) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(workers) as executor:
+            jobs = list(executor.map(jm.load_job, dills))
+    else:
+        jobs = [jm.load_job(dill) for dill in dills]
+    loaded_jobs = {dill: job for dill, job in zip(dills, jobs) if job}
+
+    if lazy:
+        return _LazyJobs(jm, loaded_jobs, indexed)
+    return loaded_jobs
+
+
+def _find_dills(path):
+    """Return a list of absolute paths to ``.dill`` files that should be loaded by |load_all|."""
+    ret = []
     for foldername in filter(lambda x: isdir(opj(path,x)), os.listdir(path)):
         maybedill = opj(path,foldername,foldername+'.dill')
         if isfile(maybedill):
-            job = jm.load_job(maybedill)
-            if job:
-                loaded_jobs[os.path.abspath(maybedill)] = job
+            ret.append(os.path.abspath(maybedill))
         else:
-            loaded_jobs.update(load_all(path=opj(path,foldername), jobmanager=jm))
-    return loaded_jobs
+            ret += _find_dills(opj(path,foldername))
+    return ret
+
+
+class _LazyJobs(Mapping):
+    """Read-only dictionary returned by :func:`load_all` in the lazy mode. Keys are absolute paths to ``.dill`` files. Jobs already loaded are stored in *loaded*, jobs only indexed are stored in *indexed* (with their hashes as values) and loaded with |load_job| on first access."""
+
+    def __init__(self, jobmanager, loaded, indexed):
+        self.jobmanager = jobmanager
+        self.loaded = loaded
+        self.indexed = indexed
+
+    def __getitem__(self, key):
+        if key in self.indexed:
+            h = self.indexed.pop(key)
+            job = self.jobmanager.hashes.get(h)
+            if job is None or opj(job.path, job.name+'.dill') != key:
+                job = self.jobmanager.load_job(key)
+            self.loaded[key] = job
+        return self.loaded[key]
+
+    def __iter__(self):
+        yield from list(self.loaded)
+        yield from list(self.indexed)
+
+    def __len__(self):
+        return len(self.loaded) + len(self.indexed)
 
 
 #===========================================================================
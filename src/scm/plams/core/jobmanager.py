@@ -1,12 +1,14 @@
 import glob
 import os
 import shutil
+import sqlite3
 import threading
 try:
     import dill as pickle
 except ImportError:
     import pickle
 
+from contextlib import closing
 from os.path import join as opj
 
 from .basejob import MultiJob
@@ -29,6 +31,7 @@ class JobManager(object):
     *   ``jobs`` -- a list of all jobs managed with this instance (in order of |run| calls).
     *   ``names`` -- a dictionary with names of jobs. For each name an integer value is stored indicating how many jobs with that name have already been run.
     *   ``hashes`` -- a dictionary working as a hash-table for jobs.
+    *   ``_indexed`` -- a dictionary with hashes of jobs indexed with :meth:`index_job` (but not loaded yet) as keys and paths to their ``.dill`` files as values.
 
     ``path`` and ``folder`` can be adjusted with constructor arguments *path* and *folder*. If not supplied, Python current working directory and string ``plams.`` appended with PID of the current process are used.
 
@@ -37,6 +40,9 @@ class JobManager(object):
     *   ``hashing`` -- chosen hashing method (see |RPM|).
     *   ``counter_len`` -- length of number appended to the job name in case of name conflict.
     *   ``remove_empty_directories`` -- if ``True``, all empty subdirectories of the working folder are removed on |finish|.
+    *   ``hashcache`` -- path to an SQLite database file used as a persistent hash index shared by all PLAMS scripts using the same file. ``None`` disables the persistent index.
+
+    The persistent hash index maps hashes of successful jobs to their ``.dill`` files. When |RPM| does not find a job in ``hashes``, it looks it up in that index and, if the ``.dill`` file is still there, loads just that one job and uses its results. That way results of any earlier run, in any working folder, are reused without calling |load_all| first.
 
     """
 
@@ -46,6 +52,7 @@ class JobManager(object):
         self.jobs = []
         self.names = {}
         self.hashes = {}
+        self._indexed = {}
 
         if path is None:
             self.path = os.getcwd()
@@ -128,11 +135,58 @@ class JobManager(object):
                 prev = self.hashes[h]
                 log('Job {} previously run as {}, using old results'.format(job.name, prev.name), 1)
                 return prev
-            else:
-                self.hashes[h] = job
+            if h in self._indexed:
+                prev = self.load_job(self._indexed.pop(h))
+                if prev is not None:
+                    log('Job {} previously run as {}, using old results'.format(job.name, prev.name), 1)
+                    return prev
+            prev = self._lookup_hash(h)
+            if prev is not None:
+                log('Job {} previously run as {} in {}, using old results'.format(job.name, prev.name, prev.path), 1)
+                return prev
+            self.hashes[h] = job
+        return None
+
+
+    def _connect(self):
+        """Open a new connection to the persistent hash index given by ``hashcache`` in ``settings``. Return ``None`` if the index is disabled. A fresh connection is used for every operation, so the index can be safely accessed from many threads and processes at the same time."""
+        if not self.settings.get('hashcache'):
+            return None
+        conn = sqlite3.connect(os.path.expanduser(self.settings.hashcache), timeout=60)
+        conn.execute('CREATE TABLE IF NOT EXISTS hashes (hash TEXT PRIMARY KEY, dill TEXT NOT NULL)')
+        return conn
+
+
+    def _lookup_hash(self, h):
+        """Search the persistent hash index for *h*. If found and the corresponding ``.dill`` file still exists, load that job and return it. Otherwise return ``None`` (and forget the stale entry, if any)."""
+        conn = self._connect()
+        if conn is None:
+            return None
+        with closing(conn):
+            row = conn.execute('SELECT dill FROM hashes WHERE hash = ?', (h,)).fetchone()
+        if row is None:
+            return None
+        if os.path.isfile(row[0]):
+            prev = self.load_job(row[0])
+            if prev is not None and prev.hash() == h:
+                return prev
+        log('Removing stale entry {} from hash index {}'.format(row[0], self.settings.hashcache), 5)
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM hashes WHERE hash = ? AND dill = ?', (h, row[0]))
         return None
 
 
+    def _store_hash(self, job):
+        """Add successful and pickled *job* to the persistent hash index."""
+        if not self.settings.get('hashcache'):
+            return
+        h = job.hash()
+        dill = opj(job.path, job.name+'.dill')
+        if h is not None and os.path.isfile(dill):
+            with closing(self._connect()) as conn, conn:
+                conn.execute('INSERT OR REPLACE INTO hashes (hash, dill) VALUES (?, ?)', (h, dill))
+
+
     def load_job(self, filename):
         """Load previously saved job from *filename*.
 
@@ -146,16 +200,19 @@ class JobManager(object):
             job.default_settings = [config.job]
             job.path = path
             if isinstance(job, MultiJob):
-                job._lock = threading.Lock()
+                job._lock = threading.Condition()
                 for child in job:
                     setstate(child, opj(path, child.name), job)
                 for otherjob in job.other_jobs():
                     setstate(otherjob, opj(path, otherjob.name), job)
 
             job.results.refresh()
-            h = job.hash()
+            dill = opj(path, job.name+'.dill')
+            h = self._stored_hash(dill) or job.hash()
             if h is not None:
                 self.hashes[h] = job
+                if self._indexed.get(h) == dill:
+                    del self._indexed[h]
             for key in job._dont_pickle:
                 job.__dict__[key] = None
 
@@ -175,6 +232,28 @@ class JobManager(object):
         return job
 
 
+    def index_job(self, filename):
+        """Index previously saved job from *filename* without loading it.
+
+        *Filename* should be a path to ``.dill`` file in some job folder. The hash of the job stored there is read from the accompanying ``.dill.hash`` file (see :meth:`Job.pickle<scm.plams.core.basejob.Job.pickle>`) and remembered. The job is loaded with :meth:`load_job` only when |RPM| finds a new job with the same hash. Returned value is the hash, or ``None`` if the job could not be indexed (no ``.dill.hash`` file or hash calculated with a different hashing method), in which case it should be loaded in a regular way.
+        """
+        filename = os.path.abspath(filename)
+        h = self._stored_hash(filename)
+        if h is not None and h not in self.hashes:
+            self._indexed.setdefault(h, filename)
+        return h
+
+
+    def _stored_hash(self, filename):
+        """Return the hash saved next to the ``.dill`` file *filename*, if it was calculated with the current hashing method. Otherwise return ``None``."""
+        try:
+            with open(filename+'.hash') as f:
+                mode, h = f.read().split()
+        except (OSError, ValueError):
+            return None
+        return h if mode == str(self.settings.hashing) else None
+
+
     def remove_job(self, job):
         """Remove *job* from job manager. Forget its hash."""
         if job in self.jobs:
@@ -1,7 +1,12 @@
+import collections
 import os
 import functools
+import shlex
+import stat
+import subprocess
 import threading
 import time
+import traceback
 
 from os.path import join as opj
 from subprocess import DEVNULL, PIPE
@@ -13,7 +18,7 @@ from .private import saferun
 from .settings import Settings
 
 
-__all__ = ['JobRunner', 'GridRunner']
+__all__ = ['JobRunner', 'PoolRunner', 'GridRunner']
 
 
 
@@ -120,6 +125,208 @@ class JobRunner(metaclass=_MetaRunner):
 
 
 
+class PoolRunner(JobRunner):
+    """Subclass of |JobRunner| that executes jobs in parallel without dedicating a separate thread to each of them.
+
+    A regular parallel |JobRunner| spawns a new thread for every executed job and this thread stays blocked until the runscript finishes. For large numbers of single jobs that means thousands of idle threads competing for the GIL. |PoolRunner| separates waiting for runscripts from executing Python code:
+
+    *   One event loop thread starts runscripts as non-blocking subprocesses and periodically collects exit codes of finished ones (with :meth:`~subprocess.Popen.poll`, which is a non-blocking ``waitpid``). The interval between two consecutive checks starts very short and grows up to *pollstep* seconds when nothing happens.
+    *   Worker threads execute the Python parts of the job life cycle (:meth:`~scm.plams.core.basejob.Job._prepare` with |prerun| and :meth:`~scm.plams.core.basejob.Job._finalize` with |postrun|). A worker that is done with its task picks the next waiting one, and a new worker is started whenever a task appears and all existing workers are busy. The number of workers is not limited: |prerun| or |postrun| can wait for results of other jobs (see :ref:`prerun-postrun`), so a fixed number of workers could all get blocked by jobs waiting for a job that never gets a worker.
+
+    A job is handed over to a worker only after all the jobs from its ``depend`` list are done. Hence the number of worker threads stays close to the number of jobs that are being prepared or finalized at the given moment, rather than the number of jobs that are running. Instances of |MultiJob| are containers that wait for their children, they are still executed in separate threads, exactly like with ``JobRunner(parallel=True)``.
+
+    The *maxjobs* argument has the same meaning as for |JobRunner|: it limits the number of runscripts executed at the same time (0 means no limit). Jobs exceeding the limit are started in the order in which they became ready. |PoolRunner| is always parallel.
+
+    The method :meth:`call` is still available and follows the regular |JobRunner| contract, so |PoolRunner| can be used in any context where a |JobRunner| is expected::
+
+        >>> config.default_jobrunner = PoolRunner(maxjobs=8)
+    """
+    def __init__(self, maxjobs=0, pollstep=0.1):
+        JobRunner.__init__(self, parallel=True, maxjobs=maxjobs)
+        self.pollstep = pollstep
+        self._cond = threading.Condition()
+        self._tasks = collections.deque()
+        self._nworkers = 0
+        self._busy = 0
+        self._inflight = 0
+        self._deferred = []
+        self._queued = collections.deque()
+        self._running = {}
+        self._loop = None
+
+
+    def call(self, runscript, workdir, out, err, **kwargs):
+        """call(runscript, workdir, out, err, **kwargs)
+        Execute the *runscript* in the folder *workdir* and wait for it to finish. Redirect output and error streams to *out* and *err*, respectively. Returned value is the exit code of *runscript*.
+
+        This method works exactly like :meth:`JobRunner.call`. It is not used by |PoolRunner| itself for running jobs, but it is kept for compatibility with code that calls the job runner directly.
+        """
+        process, files = self._popen(runscript, workdir, out, err)
+        retcode = process.wait()
+        for f in files:
+            f.close()
+        log('Execution of {} finished with returncode {}'.format(runscript, retcode), 5)
+        return retcode
+
+
+    def _run_job(self, job, jobmanager):
+        """_run_job(job, jobmanager)
+        Schedule *job* for execution and return immediately. Instances of |SingleJob| are added to the list of jobs waiting for their dependencies, all other jobs are passed to the regular :meth:`JobRunner._run_job` (and hence executed in a separate thread).
+        """
+        if not isinstance(job, SingleJob):
+            return JobRunner._run_job(self, job, jobmanager)
+        with self._cond:
+            self._deferred.append((job, jobmanager))
+            if self._loop is None:
+                self._loop = self._start_thread(self._mainloop)
+            self._cond.notify()
+
+
+    def _start_thread(self, target):
+        t = threading.Thread(name='plamsthread', target=target)
+        t.daemon = config.daemon_threads
+        t.start()
+        return t
+
+
+    def _submit(self, func, *args):
+        """Add a task to the worker queue and start a new worker thread if there is no free worker to pick it up. Has to be called with ``_cond`` acquired."""
+        self._tasks.append((func, args))
+        self._inflight += 1
+        if len(self._tasks) > self._nworkers - self._busy:
+            self._nworkers += 1
+            self._start_thread(self._worker)
+
+
+    def _worker(self):
+        """Main function of a worker thread. Execute tasks from the queue until it is empty."""
+        while True:
+            with self._cond:
+                if not self._tasks:
+                    self._nworkers -= 1
+                    return
+                func, args = self._tasks.popleft()
+                self._busy += 1
+            try:
+                func(*args)
+            except Exception:
+                log('Exception raised in a PoolRunner worker:\n{}'.format(traceback.format_exc()), 1)
+            with self._cond:
+                self._busy -= 1
+                self._inflight -= 1
+                self._cond.notify()
+
+
+    def _prepare_job(self, job, jobmanager):
+        """Worker task: prepare *job* and queue its runscript for execution (or finalize it right away in case of preview mode)."""
+        if job._prepare(jobmanager):
+            if config.preview is False:
+                with self._cond:
+                    self._queued.append(job)
+                    self._cond.notify()
+            else:
+                job._finalize()
+
+
+    def _mainloop(self):
+        """Main function of the event loop thread.
+
+        In each iteration: pass jobs with resolved dependencies to workers, start queued runscripts (as long as *maxjobs* allows) and check which of the running ones finished. The loop ends when there is nothing more to do for this runner. Between iterations the thread waits on ``_cond``, which is notified whenever a new job or task appears.
+        """
+        delay = 0.0
+        while True:
+            with self._cond:
+                changed = self._dispatch()
+                if not (self._deferred or self._queued or self._running or self._inflight):
+                    self._loop = None
+                    return
+                delay = 0.001 if changed else min(max(2*delay, 0.001), self.pollstep)
+                self._cond.wait(delay)
+            if self._reap():
+                delay = 0.0
+
+
+    def _dispatch(self):
+        """Submit jobs with resolved dependencies to workers and start queued runscripts. Has to be called with ``_cond`` acquired. Returned value indicates if anything happened."""
+        changed = False
+        waiting = []
+        for job, jobmanager in self._deferred:
+            if config.preview or all(dep.results.done.is_set() for dep in job.depend):
+                self._submit(self._prepare_job, job, jobmanager)
+                changed = True
+            else:
+                waiting.append((job, jobmanager))
+        self._deferred = waiting
+
+        while self._queued and (self.semaphore is None or self.semaphore.acquire(blocking=False)):
+            job = self._queued.popleft()
+            o = job._filename('out') if not job.settings.runscript.stdout_redirect else None
+            try:
+                self._running[job] = self._popen(job._filename('run'), job.path, o, job._filename('err'))
+            except BlockingIOError as e:
+                log('Starting {} failed with {}, trying again later'.format(job._filename('run'), e), 5)
+                self._queued.appendleft(job)
+                if self.semaphore:
+                    self.semaphore.release()
+                break
+            except OSError as e:
+                log('Starting {} failed with {}'.format(job._filename('run'), e), 1)
+                self._finish_job(job, 1)
+            changed = True
+        return changed
+
+
+    def _reap(self):
+        """Check all running runscripts and handle the finished ones. Returned value indicates if any runscript finished."""
+        finished = []
+        for job, (process, files) in self._running.items():
+            retcode = process.poll()
+            if retcode is not None:
+                for f in files:
+                    f.close()
+                log('Execution of {} finished with returncode {}'.format(job._filename('run'), retcode), 5)
+                finished.append((job, retcode))
+        if finished:
+            with self._cond:
+                for job, retcode in finished:
+                    del self._running[job]
+                    self._finish_job(job, retcode)
+        return bool(finished)
+
+
+    def _finish_job(self, job, retcode):
+        """Release the *maxjobs* slot taken by *job*, mark it as crashed if *retcode* is nonzero and submit :meth:`~scm.plams.core.basejob.Job._finalize` to workers. Has to be called with ``_cond`` acquired."""
+        if self.semaphore:
+            self.semaphore.release()
+        if retcode != 0:
+            log('WARNING: Job %s finished with nonzero return code' % job.name, 1)
+            job.status = 'crashed'
+        self._submit(job._finalize)
+
+
+    @staticmethod
+    def _popen(runscript, workdir, out, err):
+        """Start *runscript* in *workdir* as a subprocess, without waiting for it to finish. Return a pair: :class:`~subprocess.Popen` instance and a list of opened output files."""
+        log('Executing {}'.format(runscript), 5)
+        command = ['./'+runscript] if os.name == 'posix' else ['sh', runscript]
+        files = [open(opj(workdir, err), 'w')]
+        if out is not None:
+            files.append(open(opj(workdir, out), 'w'))
+        try:
+            process = subprocess.Popen(command, cwd=workdir, stderr=files[0], stdout=files[1] if out is not None else None)
+        except:
+            for f in files:
+                f.close()
+            raise
+        return process, files
+
+
+#===========================================================================
+#===========================================================================
+#===========================================================================
+
+
+
 class GridRunner(JobRunner):
     """Subclass of |JobRunner| that submits the runscript to a job scheduler instead of executing it locally. Besides two new keyword arguments (*grid* and *sleepstep*) and different :meth:`call` method it behaves and is meant to be used just like a regular |JobRunner|.
 
@@ -139,23 +346,38 @@ class GridRunner(JobRunner):
     *   ``.error`` -- flag for specifying error file path.
     *   ``.workdir`` -- flag for specifying path to working directory.
     *   ``.commands.submit`` -- submit command.
-    *   ``.commands.check`` -- queue status check command.
+    *   ``.commands.check`` -- queue status check command. Either a string or a function that takes a list of IDs of active jobs and returns the command as a list of strings.
     *   ``.commands.getid`` -- function extracting submitted job's ID from the output of the submit command.
     *   ``.commands.running`` -- function extracting a list of all running jobs from the output of queue check command
+    *   ``.commands.accounting`` -- (optional) function that takes a list of job IDs and returns a command (list of strings) reporting the final state of these jobs.
+    *   ``.commands.exitcodes`` -- (optional) function extracting exit codes of finished jobs from the output of the accounting command. Returned value should be a dictionary with job IDs as keys and integer exit codes as values.
     *   ``.commands.special.`` -- branch storing definitions of special |run| keyword arguments.
+    *   ``.array`` -- (optional) flag for submitting a job array, followed by the range of task indices.
+    *   ``.arrayindex`` -- (optional) name of the environment variable storing the index of the array task.
+    *   ``.commands.arraytaskid`` -- (optional) function that takes the ID of a submitted job array and an integer index, and returns the ID of the corresponding array task (as reported by the queue check command).
 
     See :meth:`call` for more technical details and examples.
 
-    The *sleepstep* parameter defines how often the queue check is performed. It should be a numerical value telling how many seconds should the interval between two consecutive checks last. If ``None`` is used, the global default from ``config.sleepstep`` is copied.
+    The *sleepstep* parameter defines how often the queue check is performed. It should be a numerical value telling how many seconds should the interval between two consecutive checks last. If ``None`` is used, the global default from ``config.sleepstep`` is copied. When consecutive checks show no change in the queue, the interval is gradually increased, up to *maxsleepstep* seconds (10 times *sleepstep* by default). It drops back to *sleepstep* as soon as some job is submitted or finished.
+
+    Many small jobs can be submitted as job arrays instead of separate jobs, which is much faster and avoids hitting submission limits of the job scheduler. To enable that, pass the *arraywindow* argument: a time (in seconds) during which runscripts with the same |run| keyword arguments are gathered and then submitted together, as a single job array. Each job is still tracked separately, as a single array task, so |Results| and |MultiJob| work exactly like with regular submission::
+
+        >>> gr = GridRunner(grid='slurm', arraywindow=2)
+        >>> NumGradJob(...).run(jobrunner=gr)   # all children end up in one job array
 
     .. note::
         Usually job schedulers are configured in such a way that output of your job is captured somewhere else and copied to the location indicated by output flag when the job is finished. Because of that it is not possible to have a peek at your output while your job is running (for example to see if your calculation is going well). This limitation can be worked around with ``[Job].settings.runscript.stdout_redirect``. If set to ``True``, the output redirection will not be handled by a job scheduler, but built in the runscript using the shell redirection ``>``. That forces the output file to be created directly in *workdir* and updated live as the job proceeds.
     """
-    def __init__(self, grid='auto', sleepstep=None, parallel=True, maxjobs=0):
+    def __init__(self, grid='auto', sleepstep=None, parallel=True, maxjobs=0, maxsleepstep=None, arraywindow=None):
         JobRunner.__init__(self, parallel=parallel, maxjobs=maxjobs)
         self.sleepstep = sleepstep or config.sleepstep
+        self.maxsleepstep = maxsleepstep or 10*self.sleepstep
+        self.arraywindow = arraywindow
         self._active_jobs = {}
+        self._exitcodes = {}
+        self._batches = {}
         self._active_lock = threading.Lock()
+        self._array_lock = threading.Lock()
         self._mainlock = threading.Lock()
 
         if grid == 'auto':
@@ -171,6 +393,9 @@ class GridRunner(JobRunner):
         else:
             raise PlamsError("GridRunner: invalid 'grid' argument. 'grid' should be either a Settings instance (see documentations for details) or a string occurring in config.gridrunner or 'auto' for autodetection")
 
+        if self.arraywindow and not ('array' in self.settings and 'arrayindex' in self.settings and 'arraytaskid' in self.settings.commands):
+            raise PlamsError("GridRunner: job arrays require 'array', 'arrayindex' and 'commands.arraytaskid' entries in GridRunner settings")
+
 
     def call(self, runscript, workdir, out, err, runflags, **kwargs):
         """call(runscript, workdir, out, err, runflags, **kwargs)
@@ -191,7 +416,7 @@ class GridRunner(JobRunner):
             .special.walltime = '-t '
             .special.queue    = '-p '
             .commands.submit  = 'sbatch'
-            .commands.check   = 'squeue'
+            .commands.check   = <function returning ['squeue', '-h', '-o', '%i', '-u', username]>
 
         The submit command produced in such case::
 
@@ -211,13 +436,27 @@ class GridRunner(JobRunner):
 
         The submit command produced in the way explained above is then executed and returned output is used to determine submitted job's ID. The function stored in ``.commands.getid`` is used for that purpose, it should take a single string (the whole output of the submit command) and return a string with job's ID.
 
-        The submitted job's ID is then added to ``_active_jobs`` dictionary, with the key being job's ID and the value being an instance of :class:`threading.Lock`. This lock is used to singal the fact that the job is finished and the thread handling it can continue. :meth:`_check_queue` method is then used to start the thread querying the queue and unlocking finished jobs.
+        The submitted job's ID is then added to ``_active_jobs`` dictionary, with the key being job's ID and the value being an instance of :class:`threading.Event`. This event is used to singal the fact that the job is finished and the thread handling it can continue. :meth:`_check_queue` method is then used to start the thread querying the queue and releasing finished jobs.
 
-        Since it is difficult (on some systems even impossible) to automatically obtain job's exit code, the returned value is 0 (unless the submit command failed, in that case 1 is returned). From |run| perspective it means that a job executed with |GridRunner| is *crashed* only if it never entered the queue (usually due to wrong submit command).
+        The returned value is the exit code of the job obtained with ``.commands.accounting`` and ``.commands.exitcodes`` (see above). If these entries are not defined or the job scheduler does not report the exit code, the returned value is 0. If the submit command failed, 1 is returned. From |run| perspective it means that a job executed with |GridRunner| is *crashed* if it never entered the queue (usually due to wrong submit command) or if the job scheduler reported that it failed.
 
         .. note::
             This method is used automatically during |run| and should never be explicitly called in your script.
         """
+        if self.arraywindow:
+            return self._call_array(runscript, workdir, out, err, runflags)
+
+        jobid = self._submit(runscript, workdir, out, err, runflags)
+        if jobid is None:
+            return 1
+        log('{} submitted successfully as job {}'.format(runscript, jobid), 3)
+        retcode = self._wait(jobid)
+        log('Execution of {} finished with returncode {}'.format(runscript, retcode), 5)
+        return retcode
+
+
+    def _submit(self, runscript, workdir, out, err, runflags, extra=''):
+        """Build the submit command (see :meth:`call`), execute it and return the ID of the submitted job (or ``None`` if submitting failed). *extra* is a string with additional flags placed just before the runscript path."""
         s = self.settings
         cmd = ' '.join([s.commands.submit, s.workdir, workdir, s.error, err])
         if out is not None:
@@ -227,6 +466,8 @@ class GridRunner(JobRunner):
                 cmd += ' '+s.special[k]+str(v)
             else:
                 cmd += ' -'+k+' '+str(v)
+        if extra:
+            cmd += ' ' + extra
         cmd += ' ' + opj(workdir,runscript)
 
         log('Submitting {} with command {}'.format(runscript, cmd), 5)
@@ -237,43 +478,146 @@ class GridRunner(JobRunner):
         jobid = s.commands.getid(subout)
         if jobid is None:
             log('Submitting of {} failed. Stderr of submit command:\n{}'.format(runscript, process.stderr.decode()), 1)
-            return 1
-        log('{} submitted successfully as job {}'.format(runscript, jobid), 3)
+        return jobid
 
+
+    def _wait(self, jobid):
+        """Register *jobid* in ``_active_jobs``, make sure the queue is being checked and wait until the job leaves the queue. Return its exit code."""
         event = threading.Event()
         with self._active_lock:
             self._active_jobs[jobid] = event
         self._check_queue()
         event.wait()
 
-        log('Execution of {} finished'.format(runscript), 5)
-        return 0
+        with self._active_lock:
+            return self._exitcodes.pop(jobid, 0)
+
+
+    def _call_array(self, runscript, workdir, out, err, runflags):
+        """Job array version of :meth:`call`.
+
+        The runscript is added to a batch of runscripts with the same *runflags*. The first thread that adds something to a batch becomes its leader: it waits ``arraywindow`` seconds and then submits the whole batch with :meth:`_submit_array`. Other threads wait until that happens. Then every thread waits for its own array task, just like :meth:`call` waits for a regular job. If submitting fails (also with an exception in the leader thread), all runscripts of the batch get exit code 1.
+        """
+        key = (tuple(sorted((k, str(v)) for k,v in runflags.items())), out is None)
+        task = {'runscript': runscript, 'workdir': workdir, 'out': out, 'err': err, 'jobid': None, 'submitted': threading.Event()}
+        with self._array_lock:
+            leader = key not in self._batches
+            if leader:
+                self._batches[key] = []
+            self._batches[key].append(task)
+
+        if leader:
+            time.sleep(self.arraywindow)
+            with self._array_lock:
+                batch = self._batches.pop(key)
+            try:
+                if len(batch) == 1:
+                    task['jobid'] = self._submit(runscript, workdir, out, err, runflags)
+                else:
+                    self._submit_array(batch, runflags)
+            finally:
+                for t in batch:
+                    t['submitted'].set()
+        else:
+            task['submitted'].wait()
+
+        if task['jobid'] is None:
+            return 1
+        log('{} submitted successfully as job {}'.format(runscript, task['jobid']), 3)
+        retcode = self._wait(task['jobid'])
+        log('Execution of {} finished with returncode {}'.format(runscript, retcode), 5)
+        return retcode
+
+
+    def _submit_array(self, batch, runflags):
+        """Submit a *batch* of runscripts (a list of dictionaries prepared by :meth:`_call_array`) as a single job array.
+
+        A small shell script is created in the job folder of the first runscript. Depending on the array task index (taken from the environment variable given by ``.arrayindex``) it enters the proper job folder and executes the proper runscript there, with output and error streams redirected to the usual files. This script is submitted once, with ``.array`` flag followed by ``0-[N-1]``. The script is removed just after submission (job schedulers keep their own copy). Each element of *batch* gets its array task ID (obtained with ``.commands.arraytaskid``) stored under ``'jobid'``.
+        """
+        s = self.settings
+        first = batch[0]
+        lines = ['#!/bin/sh', '', 'case ${} in'.format(s.arrayindex)]
+        for i, t in enumerate(batch):
+            cmd = 'cd {} && ./{}'.format(shlex.quote(t['workdir']), shlex.quote(t['runscript']))
+            if t['out'] is not None:
+                cmd += ' >{}'.format(shlex.quote(t['out']))
+            cmd += ' 2>{}'.format(shlex.quote(t['err']))
+            lines.append('  {}) {} ;;'.format(i, cmd))
+        lines.append('esac')
+
+        arrayscript = first['runscript'] + '.array'
+        arraypath = opj(first['workdir'], arrayscript)
+        with open(arraypath, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.chmod(arraypath, os.stat(arraypath).st_mode | stat.S_IEXEC)
+
+        try:
+            jobid = self._submit(arrayscript, first['workdir'], os.devnull, os.devnull, runflags, extra='{}0-{}'.format(s.array, len(batch)-1))
+        finally:
+            os.remove(arraypath)
+        if jobid is not None:
+            log('Job array {} contains: {}'.format(jobid, ', '.join(t['runscript'] for t in batch)), 5)
+            taskids = [s.commands.arraytaskid(jobid, i) for i in range(len(batch))]
+            for t, taskid in zip(batch, taskids):
+                t['jobid'] = taskid
 
 
     @_in_thread
     def _check_queue(self):
-        """Query the job scheduler to obtain a list of currently running jobs. Check for active jobs that are not any more in the queue and release their locks. Repeat this procedure every ``sleepstep`` seconds until there are no more active jobs. The ``_mainlock`` lock ensures that there is at most one thread executing the main loop of this method at the same time."""
+        """Query the job scheduler to obtain a list of currently running jobs. Check for active jobs that are not any more in the queue, obtain their exit codes with :meth:`_get_exitcodes` and release their events. Repeat this procedure until there are no more active jobs. The interval between two consecutive checks is ``sleepstep`` seconds, increased up to ``maxsleepstep`` when nothing changes. The ``_mainlock`` lock ensures that there is at most one thread executing the main loop of this method at the same time."""
         if self._mainlock.acquire(blocking=False):
             try:
+                delay = self.sleepstep
+                previous = None
                 while True:
                     with self._active_lock:
                         active_jobs = set(self._active_jobs.keys())
 
-                    process = saferun([self.settings.commands.check], stdout=PIPE)
+                    check = self.settings.commands.check
+                    cmd = check(sorted(active_jobs)) if callable(check) else [check]
+                    process = saferun(cmd, stdout=PIPE)
                     output = process.stdout.decode()
                     running_jobs = set(self.settings.commands.running(output))
 
+                    finished = active_jobs - running_jobs
+                    exitcodes = self._get_exitcodes(sorted(finished)) if finished else {}
                     with self._active_lock:
-                        for jobid in active_jobs - running_jobs:
+                        for jobid in finished:
+                            self._exitcodes[jobid] = exitcodes.get(jobid, 0)
                             self._active_jobs[jobid].set()
                             del self._active_jobs[jobid]
                         if len(self._active_jobs) == 0:
                             return
-                    time.sleep(self.sleepstep)
+
+                    if finished or active_jobs != previous:
+                        delay = self.sleepstep
+                    else:
+                        delay = min(1.5*delay, self.maxsleepstep)
+                    previous = active_jobs - finished
+                    time.sleep(delay)
             finally:
                 self._mainlock.release()
 
 
+    def _get_exitcodes(self, jobids):
+        """Obtain exit codes of finished jobs with IDs given by *jobids* (list of strings). A single command produced by ``.commands.accounting`` is used for the whole list. Returned value is a dictionary with job IDs as keys and exit codes as values. Jobs for which the exit code could not be determined are not present there."""
+        s = self.settings.commands
+        if 'accounting' not in s or 'exitcodes' not in s:
+            return {}
+        try:
+            process = saferun(s.accounting(jobids), stdout=PIPE, stderr=DEVNULL)
+        except OSError as e:
+            log('Obtaining exit codes of jobs {} failed with {}'.format(', '.join(jobids), e), 5)
+            return {}
+        ret = s.exitcodes(process.stdout.decode())
+        for jobid in jobids:
+            if jobid in ret:
+                log('Job {} left the queue with exit code {}'.format(jobid, ret[jobid]), 7)
+            else:
+                log('Exit code of job {} unknown, assuming 0'.format(jobid), 5)
+        return ret
+
+
     def _autodetect(self):
         """Try to autodetect the type of job scheduler.
 
@@ -13,17 +13,28 @@ __all__ = []
 
 
 def smart_copy(obj, owncopy=[], without=[]):
-    """Return a copy of *obj*. Attributes of *obj* listed in *without* are ignored. Attributes listed in *owncopy* are copied by calling their own ``copy()`` methods. All other attributes are copied using :func:`copy.deepcopy`."""
+    """Return a copy of *obj*. Attributes of *obj* listed in *without* are ignored. Attributes listed in *owncopy* are copied by calling their own ``copy()`` methods. All other attributes are copied using :func:`copy.deepcopy`, apart from immutable values (numbers, strings, tuples of those etc.) which are shared between *obj* and the copy.
 
-    ret = obj.__class__()
+    The copy is created without calling the constructor of *obj*'s class, all its attributes are taken from *obj*.
+    """
+
+    ret = obj.__class__.__new__(obj.__class__)
     for k in owncopy:
         ret.__dict__[k] = obj.__dict__[k].copy()
-    for k in obj.__dict__:
-        if k not in (without + owncopy):
-            ret.__dict__[k] = copy.deepcopy(obj.__dict__[k])
+    for k, v in obj.__dict__.items():
+        if k not in without and k not in owncopy:
+            ret.__dict__[k] = v if _immutable(v) else copy.deepcopy(v)
     return ret
 
 
+_atomic = frozenset((int, float, complex, bool, str, bytes, type(None)))
+
+def _immutable(value):
+    """Check if *value* is immutable and can be safely shared instead of copied."""
+    t = type(value)
+    return t in _atomic or (t is tuple and all(map(_atomic.__contains__, map(type, value))))
+
+
 #===========================================================================
 
 
@@ -1,13 +1,17 @@
+import contextlib
 import copy
 import functools
 import glob
 import inspect
+import mmap
 import operator
 import os
+import re
 import shutil
 import threading
 import time
 
+from collections import OrderedDict
 from os.path import join as opj
 from subprocess import PIPE
 
@@ -37,18 +41,24 @@ def _caller_name_and_arg(frame):
     return caller_name, caller_arg
 
 
+_privilege = threading.local()
+
 def _privileged_access():
-    """Analyze contents of the current stack to find out if privileged access to the |Results| methods should be granted.
+    """Check if privileged access to the |Results| methods should be granted.
 
-    Privileged access is granted to two |Job| methods: |postrun| and :meth:`~scm.plams.core.basejob.Job.check`, but only if they are called from :meth:`~scm.plams.core.basejob.Job._finalize` of the same |Job| instance.
+    Privileged access is granted to two |Job| methods: |postrun| and :meth:`~scm.plams.core.basejob.Job.check`, but only if they are called from :meth:`~scm.plams.core.basejob.Job._finalize`. The latter marks such calls with :func:`_privileged_section`, so this check costs just a lookup in a thread-local storage.
     """
-    from .basejob import Job
-    for frame in inspect.getouterframes(inspect.currentframe()):
-        cal, arg = _caller_name_and_arg(frame[0])
-        prev_cal, prev_arg = _caller_name_and_arg(frame[0].f_back)
-        if cal in ['postrun', 'check'] and prev_cal == '_finalize' and arg == prev_arg and isinstance(arg, Job):
-                return True
-    return False
+    return getattr(_privilege, 'depth', 0) > 0
+
+
+@contextlib.contextmanager
+def _privileged_section():
+    """Context manager granting privileged access to |Results| methods in the current thread, for the duration of the ``with`` block."""
+    _privilege.depth = getattr(_privilege, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _privilege.depth -= 1
 
 
 def _restrict(func):
@@ -114,12 +124,161 @@ def _restrict(func):
 
 
 
+def _grep_regex(pattern, flags):
+    """Return a compiled bytes regular expression finding the same lines as ``grep`` with *pattern* and *flags* (a string with single-letter ``grep`` flags), or ``None`` if such a search cannot be reproduced exactly in Python.
+
+    Only literal searches are translated: *pattern* used with ``-F``, or containing no special characters of basic (or extended, with ``-E``) regular expressions. Supported flags are ``-i``, ``-w``, ``-x``, ``-F`` and ``-E``. Non-ASCII patterns are not translated for ``-i`` and ``-w``, since the meaning of these flags depends on the locale for non-ASCII characters.
+    """
+    special = '.[]()*+?{}|^$\\' if 'E' in flags else '.[]*^$\\'
+    if not pattern or '\n' in pattern or not set(flags) <= set('iEFwx') or set('EF') <= set(flags):
+        return None
+    if 'F' not in flags and set(pattern) & set(special):
+        return None
+    if not pattern.isascii() and set('iw') & set(flags):
+        return None
+    regex = re.escape(pattern)
+    if 'x' in flags:
+        regex = r'^%s$' % regex
+    elif 'w' in flags:
+        regex = r'(?<!\w)%s(?!\w)' % regex
+    return re.compile(regex.encode(), re.MULTILINE | (re.IGNORECASE if 'i' in flags else 0))
+
+
+
+class _FileIndex:
+    """Positions of lines containing given strings (or matching given regular expressions) in a text file.
+
+    Positions are start offsets (in bytes) of lines. For each string or pattern the file is searched only once, the result is stored in ``lines`` dictionary and reused by all subsequent searches. Indices are shared by all |Results| instances and kept in memory for the most recently used ``_cache_size`` files. They are obtained with :meth:`get`, keyed by the absolute path, size and modification time of the file, so a modified file is always searched again.
+    """
+    _cache = OrderedDict()
+    _cache_size = 64
+    _lock = threading.Lock()
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self.lines = {}
+
+
+    @classmethod
+    def get(cls, path):
+        """Return the index of a file with *path*, creating it if needed."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        key = (path, st.st_size, st.st_mtime_ns)
+        with cls._lock:
+            if key in cls._cache:
+                cls._cache.move_to_end(key)
+                return cls._cache[key]
+            ret = cls._cache[key] = cls(path, st.st_size)
+            while len(cls._cache) > cls._cache_size:
+                cls._cache.popitem(last=False)
+        return ret
+
+
+    def find(self, markers):
+        """Return a dictionary with sorted lists of positions of lines containing each of *markers* (nonempty bytes strings without newlines). All markers not searched for before are found in a single pass over the memory-mapped file."""
+        missing = [m for m in markers if m not in self.lines]
+        if missing:
+            found = {m:[] for m in missing}
+            if self.size:
+                with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for m, ret in found.items():
+                        pos = mm.find(m)
+                        while pos != -1:
+                            ret.append(mm.rfind(b'\n', 0, pos) + 1)
+                            pos = mm.find(b'\n', pos)
+                            if pos == -1: break
+                            pos = mm.find(m, pos)
+            self.lines.update(found)
+        return {m:self.lines[m] for m in markers}
+
+
+    def search(self, regex):
+        """Return a list of positions of lines matching a compiled bytes regular expression *regex* (with ``re.MULTILINE`` flag)."""
+        if regex not in self.lines:
+            ret = []
+            if self.size:
+                with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    pos = 0
+                    while pos < len(mm):
+                        m = regex.search(mm, pos)
+                        if m is None: break
+                        start = mm.rfind(b'\n', 0, m.start()) + 1
+                        if start == len(mm): break
+                        stop = mm.find(b'\n', m.start())
+                        if stop == -1: stop = len(mm)
+                        #a match spanning multiple lines has to be confirmed within its first line
+                        if m.end() <= stop or regex.search(mm, start, stop):
+                            ret.append(start)
+                        pos = stop + 1
+            self.lines[regex] = ret
+        return self.lines[regex]
+
+
+    def read(self, positions):
+        """Return a list of lines (strings, without line terminators) starting at *positions*."""
+        ret = []
+        current = 0
+        with open(self.path, 'rb') as f:
+            for pos in positions:
+                if pos != current:
+                    f.seek(pos)
+                line = f.readline()
+                current = pos + len(line)
+                ret.append(_decode_line(line))
+        return ret
+
+
+
+class _FileList(list):
+    """List of files in a job folder. Membership tests (``in``) use a set built when needed and discarded whenever the list is modified."""
+    _set = None
+
+    def __contains__(self, item):
+        if self._set is None:
+            self._set = set(self)
+        return item in self._set
+
+    def __reduce__(self):
+        return (_FileList, (list(self),))
+
+
+
+def _discarding_set(method):
+    """Wrap a modifying *method* of :class:`list` so that it discards the membership set of a :class:`_FileList`."""
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        self._set = None
+        return method(self, *args)
+    return wrapper
+
+for _name in ['__setitem__', '__delitem__', '__iadd__', '__imul__', 'append', 'extend', 'insert', 'remove', 'pop', 'clear']:
+    setattr(_FileList, _name, _discarding_set(getattr(list, _name)))
+
+
+
+def _decode_line(line):
+    """Decode a line read from a binary file and strip its line terminator."""
+    line = line.decode()
+    if line.endswith('\n'): line = line[:-1]
+    if line.endswith('\r'): line = line[:-1]
+    return line
+
+
+
+#===========================================================================
+#===========================================================================
+#===========================================================================
+
+
+
 class _MetaResults(type):
-    """Metaclass for |Results|. During new |Results| instance creation it wraps all methods with :func:`_restrict` decorator ensuring proper synchronization and thread safety. Methods listed in ``_dont_restrict`` as well as "magic methods" are not wrapped."""
+    """Metaclass for |Results|. During new |Results| instance creation it wraps all methods with :func:`_restrict` decorator ensuring proper synchronization and thread safety. Methods listed in ``_dont_restrict``, static methods, class methods and "magic methods" are not wrapped."""
     _dont_restrict = ['refresh', 'collect', '_clean']
     def __new__(meta, name, bases, dct):
         for attr in dct:
-            if not (attr.endswith('__') and attr.startswith('__')) and callable(dct[attr]) and (attr not in _MetaResults._dont_restrict):
+            if not (attr.endswith('__') and attr.startswith('__')) and callable(dct[attr]) and not isinstance(dct[attr], (staticmethod, classmethod)) and (attr not in _MetaResults._dont_restrict):
                 dct[attr] = _restrict(dct[attr])
         return type.__new__(meta, name, bases, dct)
 
@@ -134,33 +293,67 @@ class _MetaResults(type):
 class Results(metaclass=_MetaResults):
     """General concrete class for job results.
 
-    ``job`` attribute stores a reference to associated job. ``files`` attribute is a list with contents of the job folder. ``_rename_map`` is a class attribute with the dictionary storing the default renaming scheme.
+    ``job`` attribute stores a reference to associated job. ``files`` attribute is a list with contents of the job folder. ``_rename_map`` is a class attribute with the dictionary storing the default renaming scheme. ``_index_markers`` is a class attribute with a list of strings whose positions are recorded during the first search in a text file (see :meth:`~Results.iter_file_chunk`), so later chunks delimited by these strings are read without scanning the file again.
 
     Bracket notation (``myresults[filename]`` can be used to obtain full absolute paths to files in the job folder.
 
     Instance methods are automatically wrapped with access guardian which ensures thread safety (see :ref:`parallel`).
     """
     _rename_map = {}
+    _index_markers = []
 
     def __init__(self, job):
         self.job = job
-        self.files = []
+        self.files = _FileList()
+        self._listing = {}
         self.finished = threading.Event()
         self.done = threading.Event()
 
 
     def refresh(self):
-        """Refresh the contents of ``files`` list. Traverse the job folder (and all its subfolders) and collect relative paths to all files found there, except files with ``.dill`` extension.
+        """Refresh the contents of ``files`` list. Traverse the job folder (and all its subfolders) and collect relative paths to all files found there, except files with ``.dill`` and ``.dill.hash`` extensions.
 
         This is a cheap and fast method that should be used every time there is some risk that contents of the job folder changed and ``files`` list is no longer up-to-date. For proper working of various PLAMS elements it is crucial that ``files`` always contains up-to-date information about contents of job folder.
 
         All functions and methods defined in PLAMS that could change the state of job folder take care about refreshing ``files``, so there is no need to manually call :meth:`~Results.refresh` after, for example, :meth:`~Results.rename`. If you are implementing new method of that kind, don't forget about refreshing.
+
+        The listing of each folder is remembered together with the folder's modification time and only folders modified since the previous call are read again. Folders modified less than a second before being read are always read again, since their modification time might not reflect further changes. :meth:`~Results.collect` discards remembered listings before calling this method, since a job executed on a different machine might have changed the job folder without updating its modification time visible to this machine.
         """
-        self.files = []
-        for pth, dirs, files in os.walk(self.job.path):
-            relpath = os.path.relpath(pth, self.job.path)
-            self.files += [opj(relpath, x) if relpath != '.' else x for x in files]
-        self.files = [x for x in self.files if not x.endswith('.dill')]
+        old = getattr(self, '_listing', None) or {}
+        new = {}
+        files = _FileList()
+
+        def scan(absdir, reldir):
+            try:
+                mtime = os.stat(absdir).st_mtime_ns
+            except OSError:
+                return
+            entry = old.get(absdir)
+            if entry is None or entry[0] != mtime or entry[1]:
+                names, dirs = [], []
+                try:
+                    with os.scandir(absdir) as it:
+                        for e in it:
+                            try:
+                                isdir = e.is_dir()
+                            except OSError:
+                                isdir = False
+                            if not isdir:
+                                names.append(opj(reldir, e.name) if reldir else e.name)
+                            elif not e.is_symlink():
+                                dirs.append(e.name)
+                except OSError:
+                    return
+                racy = time.time_ns() - mtime < 10**9
+                entry = (mtime, racy, [x for x in names if not x.endswith(('.dill', '.dill.hash'))], dirs)
+            new[absdir] = entry
+            files.extend(entry[2])
+            for d in entry[3]:
+                scan(opj(absdir, d), opj(reldir, d) if reldir else d)
+
+        scan(self.job.path, '')
+        self._listing = new
+        self.files = files
 
 
     def collect(self):
@@ -168,14 +361,13 @@ class Results(metaclass=_MetaResults):
 
         If you wish to override this function, you have to call the parent version at the beginning.
         """
+        self._listing = {}   #the folder may have been changed on a different machine, read it again
         self.refresh()
         for old, new in self.__class__._rename_map.items():
             old = old.replace('$JN', self.job.name)
             new = new.replace('$JN', self.job.name)
             if old in self.files:
-                os.rename(opj(self.job.path, old), opj(self.job.path, new))
-                self.files[self.files.index(old)] = new
-        self.refresh()
+                self._rename_file(old, new)
 
 
     def wait(self):
@@ -196,7 +388,18 @@ class Results(metaclass=_MetaResults):
         Additional ``grep`` flags can be passed with *options*, which should be a single string containing all flags, space separated.
 
         Returned value is a list of lines (strings). See ``man grep`` for details.
+
+        Literal searches (*pattern* without special characters of regular expressions, or any *pattern* with ``-F``) with no other flags than ``-i``, ``-w``, ``-x``, ``-E`` and ``-F`` are done in Python, without starting a ``grep`` process. Positions of matching lines are remembered, so repeating the same search in an unchanged file does not read the whole file again. Plain strings are looked up together with all ``_index_markers``. All other searches are passed to ``grep``.
         """
+        opts = options.split()
+        flags = ''.join(opt[1:] for opt in opts)
+        if all(opt[:1] == '-' for opt in opts):
+            if pattern and '\n' not in pattern and set(flags) <= set('F') and ('F' in flags or not set(pattern) & set('.[]*^$\\')):
+                return self._find_lines(filename, pattern)
+            regex = _grep_regex(pattern, flags)
+            if regex is not None:
+                index = _FileIndex.get(self[filename])
+                return index.read(index.search(regex))
         cmd = ['grep'] + [pattern] + options.split()
         return self._process_file(filename, cmd)
 
@@ -251,8 +454,7 @@ class Results(metaclass=_MetaResults):
         new = new.replace('$JN', self.job.name)
         self.refresh()
         if old in self.files:
-            os.rename(opj(self.job.path, old), opj(self.job.path, new))
-            self.files[self.files.index(old)] = new
+            self._rename_file(old, new)
         else:
             raise FileError('File %s not present in %s' % (old, self.job.path))
 
@@ -264,28 +466,56 @@ class Results(metaclass=_MetaResults):
 
         *begin* and *end* should be simple strings (no regular expressions allowed) or ``None`` (in that case matching is done from the very beginning or until the very end of the file). If multiple blocks delimited by *begin* end *end* are present in the file, *match* can be used to indicate which one should be printed (*match*=0 prints all of them). *inc_begin* and *inc_end* can be used to include/exclude the delimiting lines in the final result (by default they are excluded).
 
-        Returned value is a list of strings. *process* can be used to provide a function executed on each element of this list before returning it.
+        Returned value is a list of strings. *process* can be used to provide a function executed on each element of this list before returning it. Use :meth:`~Results.iter_file_chunk` to process large chunks line by line without keeping them in memory.
         """
-        current_match = 0
-        ret = []
-        switch = (begin == None)
+        ret = self.iter_file_chunk(filename, begin, end, match, inc_begin, inc_end)
+        return list(map(process, ret)) if process else list(ret)
 
-        append = lambda x: ret.append(x.rstrip('\n')) if (match in [0,current_match]) else None
 
-        with open(self[filename], 'r') as f:
-            for line in f:
-                if switch and end and (end in line):
+    def iter_file_chunk(self, filename, begin=None, end=None, match=0, inc_begin=False, inc_end=False):
+        """iter_file_chunk(filename, begin=None, end=None, match=0, inc_begin=False, inc_end=False)
+
+        Generator version of :meth:`~Results.get_file_chunk`, yielding lines of the chunk one by one.
+
+        Positions of lines containing *begin*, *end* and all ``_index_markers`` are found in a single pass over the file during the first search and remembered. Only the lines of the chunk are read from the file, so repeated requests for chunks of a large output are cheap.
+        """
+        path = self[filename]
+        markers = {m.encode() for m in [begin, end] + self._index_markers if m}
+        found = _FileIndex.get(path).find(markers)
+        begins = set(found[begin.encode()]) if begin else set()
+        ends = set(found[end.encode()]) if end else set()
+
+        current_match = 0
+        switch = (begin is None)
+        with open(path, 'rb') as f:
+            def lines(start, stop):
+                f.seek(start)
+                while start < stop:
+                    line = f.readline()
+                    if not line: return
+                    start += len(line)
+                    yield _decode_line(line)
+
+            start = 0
+            for pos in sorted(begins | ends):
+                if switch and match in [0,current_match]:
+                    yield from lines(start, pos)
+                f.seek(pos)
+                line = f.readline()
+                start = pos + len(line)
+                line = _decode_line(line)
+                if switch and pos in ends:
                     switch = False
-                    if inc_end: append(line)
-                    if match == current_match: break
-                if switch:
-                    append(line)
-                if (not switch) and begin and (begin in line):
+                    if inc_end and match in [0,current_match]: yield line
+                    if match == current_match: return
+                if switch and match in [0,current_match]:
+                    yield line
+                if (not switch) and pos in begins:
                     switch = True
                     current_match += 1
-                    if inc_begin: append(line)
-
-        return list(map(process, ret)) if process else ret
+                    if inc_begin and match in [0,current_match]: yield line
+            if switch and match in [0,current_match]:
+                yield from lines(start, float('inf'))
 
 
     def get_output_chunk(self, begin=None, end=None, match=0, inc_begin=False, inc_end=False, process=None):
@@ -298,6 +528,16 @@ class Results(metaclass=_MetaResults):
         return self.get_file_chunk(output, begin, end, match, inc_begin, inc_end, process)
 
 
+    def iter_output_chunk(self, begin=None, end=None, match=0, inc_begin=False, inc_end=False):
+        """iter_output_chunk(begin=None, end=None, match=0, inc_begin=False, inc_end=False)
+        Shortcut for :meth:`~Results.iter_file_chunk` on the output file."""
+        try:
+            output = self.job._filename('out')
+        except AttributeError:
+            raise ResultsError('Job %s is not an instance of SingleJob, it does not have an output' % self.job.name)
+        return self.iter_file_chunk(output, begin, end, match, inc_begin, inc_end)
+
+
 
 #=======================================================================
 
@@ -340,15 +580,28 @@ class Results(metaclass=_MetaResults):
         self.refresh()
 
 
+    def _rename_file(self, old, new):
+        """_rename_file(old, new)
+        Rename a file *old* from ``files`` to *new* and update ``files`` accordingly, without traversing the job folder again."""
+        os.rename(opj(self.job.path, old), opj(self.job.path, new))
+        i = self.files.index(old)
+        if new != old and new in self.files:
+            del self.files[i]
+        else:
+            self.files[i] = new
+
+
     def _copy_to(self, other):
         """_copy_to(other)
         Copy these results to *other*.
 
         This method is used when |RPM| discovers an attempt to run a job identical to the one previously run. Instead of execution, results of the previous job are copied/linked to the new one.
 
-        This method is called from results of old job and *other* should be results of new job. The goal is to faithfully recreate the state of ``self`` in ``other``. To achieve that all contents of jobs folder are copied (or hardlinked, if your platform allows that and ``self.settings.link_files`` is ``True``) to other's job folder. Moreover, all attributes of ``self`` (other than ``job`` and ``files``) are exported to *other* using :meth:`~Results._export_attribute` method.
+        This method is called from results of old job and *other* should be results of new job. The goal is to faithfully recreate the state of ``self`` in ``other``. To achieve that all contents of jobs folder are copied (or hardlinked, if your platform allows that and ``self.settings.link_files`` is ``True``) to other's job folder. Files with ``.dill`` and ``.dill.hash`` extensions are skipped, they describe the old job and the new one writes its own. Moreover, all attributes of ``self`` (other than ``job`` and ``files``) are exported to *other* using :meth:`~Results._export_attribute` method.
         """
         for name in self.files:
+            if name.endswith(('.dill', '.dill.hash')):
+                continue
             newname = Results._replace_job_name(name, self.job.name, other.job.name)
             args = (opj(self.job.path, name), opj(other.job.path, newname))
             if os.name == 'posix' and self.job.settings.link_files is True:
@@ -357,7 +610,7 @@ class Results(metaclass=_MetaResults):
                 shutil.copy(*args)
             other.files.append(newname)
         for k,v in self.__dict__.items():
-            if k in ['job', 'files', 'done', 'finished']: continue
+            if k in ['job', 'files', 'done', 'finished', '_listing']: continue
             other.__dict__[k] = self._export_attribute(v, other)
 
 
@@ -389,6 +642,16 @@ class Results(metaclass=_MetaResults):
 
 
 
+    def _find_lines(self, filename, string):
+        """_find_lines(filename, string)
+        Return a list of lines of *filename* containing *string*, using the index of the file. See :meth:`~Results.grep_file`.
+        """
+        index = _FileIndex.get(self[filename])
+        markers = {m.encode() for m in [string] + self._index_markers if m}
+        return index.read(index.find(markers)[string.encode()])
+
+
+
     def _process_file(self, filename, command):
         """_process_file(filename, command)
         Skeleton for all file processing methods. Execute *command* (should be a list of strings) on *filename* and return output as a list of lines.
@@ -1,3 +1,5 @@
+import hashlib
+
 __all__ = ['Settings']
 
 class Settings(dict):
@@ -38,9 +40,9 @@ class Settings(dict):
     """
     def __init__(self, *args, **kwargs):
         dict.__init__(self, *args, **kwargs)
-        for k,v in self.items():
+        for k,v in dict.items(self):
             if isinstance(v, dict):
-                self[k] = Settings(v)
+                dict.__setitem__(self, k, _tree(v))
 
 
 
@@ -54,15 +56,16 @@ class Settings(dict):
 
         will not work.
         """
-        self[name] = Settings()
-        return self[name]
+        ret = Settings()
+        dict.__setitem__(self, name, ret)
+        return ret
 
 
 
     def __setitem__(self, name, value):
-        """Like regular __setitem__, but if the value is a dict, convert it to |Settings|."""
+        """Like regular __setitem__, but if the value is a dict, convert it to |Settings|. The value is copied, like in :meth:`copy`, so the tree never shares nested |Settings| instances with other trees."""
         if isinstance(value, dict):
-            value = Settings(value)
+            value = _tree(value)
         dict.__setitem__(self, name, value)
 
 
@@ -144,13 +147,7 @@ class Settings(dict):
 
         This method is also used when :func:`python3:copy.copy` is called.
         """
-        ret = Settings()
-        for name in self:
-            if isinstance(self[name], Settings):
-                ret[name] = self[name].copy()
-            else:
-                ret[name] = self[name]
-        return ret
+        return _tree(self, sort=True)
 
 
 
@@ -186,13 +183,15 @@ class Settings(dict):
         Shortcut ``A += B`` can be used instead of ``A.soft_update(B)``.
         """
         for name in other:
-            if isinstance(other[name], Settings):
-                if name not in self:
-                    self[name] = other[name].copy()
-                elif isinstance(self[name], Settings):
-                    self[name].soft_update(other[name])
-            elif name not in self:
-                self[name] = other[name]
+            value = other[name]
+            mine = dict.get(self, name, _none)
+            if isinstance(value, Settings):
+                if mine is _none:
+                    dict.__setitem__(self, name, _tree(value, sort=True))
+                elif isinstance(mine, Settings) and mine is not value:
+                    mine.soft_update(value)
+            elif mine is _none:
+                self[name] = value
         return self
 
 
@@ -227,13 +226,15 @@ class Settings(dict):
         *Other* can also be a regular dictionary. Of course in that case only top level keys are updated.
         """
         for name in other:
-            if isinstance(other[name], Settings):
-                if name not in self or not isinstance(self[name], Settings):
-                    self[name] = other[name].copy()
-                else:
-                    self[name].update(other[name])
+            value = other[name]
+            if isinstance(value, Settings):
+                mine = dict.get(self, name)
+                if not isinstance(mine, Settings):
+                    dict.__setitem__(self, name, _tree(value, sort=True))
+                elif mine is not value:
+                    mine.update(value)
             else:
-                self[name] = other[name]
+                self[name] = value
 
 
 
@@ -271,10 +272,24 @@ class Settings(dict):
 
         """
         lowkey = key.lower()
-        for k in self:
-            if k.lower() == lowkey:
-                return k
-        return key
+        found = [k for k in dict.keys(self) if k.lower() == lowkey]
+        return min(found) if found else key
+
+
+
+    def content_hash(self, special=None):
+        """Return SHA256 hash (hexadecimal string) of the contents of this instance. The hash is calculated directly from keys and values, without producing any text representation.
+
+        Supported values are strings, numbers, booleans, ``None``, bytes, lists, tuples, dictionaries (including nested |Settings|) and numpy arrays. Other types can be handled with *special*, which should be a dictionary having types of objects as keys and functions translating these types to strings as values. If some value cannot be handled (or a function from *special* returns ``None``), ``None`` is returned.
+
+        Two instances have the same hash if their contents are equal and of the same types, regardless of the order in which keys were inserted.
+        """
+        h = hashlib.sha256()
+        try:
+            _feed(h, self, special or {})
+        except TypeError:
+            return None
+        return h.hexdigest()
 
 
 
@@ -295,3 +310,56 @@ class Settings(dict):
     __iadd__ = soft_update
     __add__ = merge
     __copy__ = copy
+
+
+
+_none = object()
+
+def _tree(d, sort=False):
+    """Return a new |Settings| instance with the same contents as dictionary *d*, with all nested dictionaries converted to new |Settings| instances.
+
+    Keys are inserted in the lexicographical order if *sort* is ``True``, otherwise in the order of *d*. Every nested dictionary is visited exactly once, so the cost is linear in the size of the tree.
+    """
+    ret = Settings()
+    for k in (sorted(dict.keys(d)) if sort else dict.keys(d)):
+        v = dict.__getitem__(d, k)
+        dict.__setitem__(ret, k, _tree(v, sort) if isinstance(v, dict) else v)
+    return ret
+
+
+
+def _feed(h, value, special):
+    """Update hash object *h* with *value*. Every value is preceded by a tag describing its type and, for sequences of unknown length, terminated, so different structures never produce the same stream of data. Raise :exc:`TypeError` for values that cannot be hashed reliably. See :meth:`Settings.content_hash`."""
+    t = type(value)
+    if t is str:
+        value = value.encode()
+        h.update(b's%d:' % len(value))
+        h.update(value)
+    elif t in (int, float, bool, complex, type(None)):
+        h.update(('%s:%r;' % (t.__name__, value)).encode())
+    elif t is bytes:
+        h.update(b'b%d:' % len(value))
+        h.update(value)
+    elif isinstance(value, dict):
+        h.update(b'{')
+        for k in (value if isinstance(value, Settings) else sorted(value)):
+            _feed(h, k, special)
+            _feed(h, dict.__getitem__(value, k), special)
+        h.update(b'}')
+    elif t in (list, tuple):
+        h.update(b'[' if t is list else b'(')
+        for v in value:
+            _feed(h, v, special)
+        h.update(b']')
+    elif hasattr(value, 'dtype') and hasattr(value, 'tobytes') and not value.dtype.hasobject:
+        h.update(('a%s%r:' % (value.dtype.str, value.shape)).encode())
+        h.update(value.tobytes())
+    else:
+        for spec_type, func in special.items():
+            if isinstance(value, spec_type):
+                value = func(value)
+                if value is None:
+                    break
+                h.update(b'x')
+                return _feed(h, str(value), special)
+        raise TypeError('{} cannot be hashed'.format(t.__name__))
@@ -0,0 +1,204 @@
+import copy
+import io
+import mmap
+import numpy as np
+import os
+
+from .basemol import Molecule
+from .errors import FileError
+
+__all__ = ['Trajectory']
+
+
+class Trajectory(object):
+    """A class representing a multi-frame ``xyz`` file, for example a molecular dynamics trajectory.
+
+    When a new instance is created, the whole file is scanned once and the position of every frame in the file is remembered. After that any frame can be read directly, without parsing all the frames before it::
+
+        >>> traj = Trajectory('md.xyz')
+        >>> len(traj)
+        50000
+        >>> mol = traj[12345]      #a |Molecule| with coordinates from frame 12346
+        >>> part = traj[1000::10]  #a |Trajectory| with every 10th frame, starting from frame 1001
+
+    All frames share the same topology, given by a template |Molecule| stored in the ``molecule`` attribute. By default the template is read from the first frame of the file, but any other |Molecule| with the same number (and order) of atoms can be supplied with *molecule* argument (for example, one with bonds already guessed). Molecules returned by indexing or iterating are copies of the template with coordinates (and lattice vectors, if present) taken from the corresponding frame. To process many frames without creating a new |Molecule| for each of them, use :meth:`iter_coords` (which keeps reusing a single numpy array) or :meth:`apply` (which updates an existing |Molecule| in place).
+
+    The file is read through a memory map, so only parts of the file that are actually needed are loaded into memory. Frames are indexed from 0, like any other Python sequence.
+    """
+
+    def __init__(self, filename, molecule=None):
+        self.filename = os.path.abspath(filename)
+        self._start, self._end, self._natoms = self._index()
+        if molecule is None and len(self) > 0:
+            molecule = Molecule()
+            molecule.readxyz(io.StringIO(self._frame_bytes(0).decode()), 1)
+        self.molecule = molecule
+
+
+    def __len__(self):
+        return len(self._start)
+
+
+    def __getitem__(self, key):
+        """Return a |Molecule| with the geometry from the frame *key*. If *key* is a slice, return a new |Trajectory| containing the selected frames (the file is not scanned again)."""
+        if isinstance(key, slice):
+            ret = copy.copy(self)
+            ret._start, ret._end, ret._natoms = self._start[key], self._end[key], self._natoms[key]
+            return ret
+        return self.apply(self._check_frame(key), self.molecule.copy())
+
+
+    def __iter__(self):
+        """Iterate over frames, yielding a new |Molecule| for each of them."""
+        if len(self) == 0:
+            return
+        with self._map() as mm:
+            for i in range(len(self)):
+                yield self._apply(mm, i, self.molecule.copy())
+
+
+    def apply(self, frame, molecule=None):
+        """Update coordinates, lattice vectors and the comment line of *molecule* with values from *frame*. If *molecule* is ``None``, the template ``molecule`` is updated. Return the updated |Molecule|."""
+        frame = self._check_frame(frame)
+        with self._map() as mm:
+            return self._apply(mm, frame, self.molecule if molecule is None else molecule)
+
+
+    def read_coords(self, frame, out=None):
+        """Return coordinates from *frame* as a numpy array of shape (N,3), expressed in angstroms. If *out* is supplied, it should be a numpy array of a proper shape, which is filled with coordinates and returned."""
+        frame = self._check_frame(frame)
+        with self._map() as mm:
+            return self._parse(mm, frame, out)[0]
+
+
+    def iter_coords(self, out=None):
+        """Iterate over all frames, yielding their coordinates as a numpy array of shape (N,3), expressed in angstroms.
+
+        The same array (*out*, or a new array allocated with the first frame) is filled and yielded for every frame. If you need to keep coordinates of some frame, make a copy of the array.
+
+            >>> traj = Trajectory('md.xyz')
+            >>> center = sum(xyz.mean(axis=0) for xyz in traj.iter_coords()) / len(traj)
+        """
+        if len(self) == 0:
+            return
+        with self._map() as mm:
+            for i in range(len(self)):
+                out = self._parse(mm, i, out)[0]
+                yield out
+
+
+    def _check_frame(self, frame):
+        if frame < 0:
+            frame += len(self)
+        if not 0 <= frame < len(self):
+            raise IndexError('Trajectory: frame {} out of range, {} contains {} frames'.format(frame, self.filename, len(self)))
+        return frame
+
+
+    def _map(self):
+        """Return a read-only memory map of the file."""
+        with open(self.filename, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+    def _frame_bytes(self, i, mm=None):
+        if mm is None:
+            with self._map() as mm:
+                return mm[self._start[i]:self._end[i]]
+        return mm[self._start[i]:self._end[i]]
+
+
+    def _apply(self, mm, i, molecule):
+        if len(molecule) != self._natoms[i]:
+            raise FileError('Trajectory: frame {} of {} has {} atoms, while the molecule has {}'.format(i, self.filename, self._natoms[i], len(molecule)))
+        xyz, lattice, comment = self._parse(mm, i)
+        molecule.from_array(xyz)
+        if lattice or molecule.lattice:
+            molecule.lattice = lattice
+        if comment:
+            molecule.properties.comment = comment
+        return molecule
+
+
+    def _parse(self, mm, i, out=None):
+        """Parse frame *i*. Return a tuple with coordinates (a numpy array, *out* if supplied), a list of lattice vectors and the comment line."""
+        n = self._natoms[i]
+        lines = self._frame_bytes(i, mm).splitlines()
+        comment = lines[1].decode().rstrip() if len(lines) > 1 else ''
+        atoms, vectors = lines[2:2+n], lines[2+n:]
+
+        tokens = b' '.join(atoms).split()
+        width = len(tokens) // n if n else 4
+        try:
+            if n and width * n == len(tokens) and width >= 4 and len(atoms[0].split()) == len(atoms[-1].split()) == width:
+                shift = 1 if (width > 4 and tokens[0] == b'1') else 0
+                xyz = np.array([list(map(float, tokens[1+shift+k::width])) for k in range(3)]).T
+            else:
+                xyz = []
+                for j, line in enumerate(atoms):
+                    lst = line.split()
+                    shift = 1 if (len(lst) > 4 and lst[0] == str(j+1).encode()) else 0
+                    xyz.append(list(map(float, lst[1+shift:4+shift])))
+                xyz = np.array(xyz).reshape(n, 3)
+        except ValueError:
+            raise FileError('Trajectory: frame {} of {} contains non-numerical coordinates'.format(i, self.filename))
+
+        if out is None:
+            out = np.ascontiguousarray(xyz)
+        else:
+            out[...] = xyz
+
+        lattice = [tuple(float(x) for x in vec.split()[1:4]) for vec in vectors if b'VEC' in vec.upper()]
+        return out, lattice, comment
+
+
+    def _index(self):
+        """Scan the file and return three numpy arrays: beginnings and ends of frames (byte offsets) and numbers of atoms in each frame."""
+        start, end, natoms = [], [], []
+        if os.path.getsize(self.filename) > 0:
+            with self._map() as mm:
+                size = len(mm)
+                pos, window = 0, 1<<16
+                while pos < size:
+                    line = _line(mm, pos)
+                    try:
+                        n = int(line)
+                    except ValueError:
+                        if line.strip() and not start:
+                            raise FileError('Trajectory: {} is not a multi-frame xyz file, the first line should contain the number of atoms'.format(self.filename))
+                        pos += len(line)
+                        continue
+                    frame = pos
+                    pos += len(line)
+
+                    #skip the comment line and n lines with atoms
+                    while True:
+                        newlines = np.flatnonzero(np.frombuffer(mm[pos:pos+window], dtype=np.uint8) == ord('\n'))
+                        if len(newlines) > n or pos + window >= size:
+                            break
+                        window *= 2
+                    if len(newlines) > n:
+                        pos += int(newlines[n]) + 1
+                    elif len(newlines) == n and mm[size-1:size] != b'\n':
+                        pos = size
+                    else:
+                        raise FileError('Trajectory: frame {} of {} is incomplete'.format(len(start)+1, self.filename))
+
+                    #lattice vectors
+                    while pos < size:
+                        line = _line(mm, pos)
+                        if b'VEC' not in line.upper():
+                            break
+                        pos += len(line)
+
+                    start.append(frame)
+                    end.append(pos)
+                    natoms.append(n)
+                    window = max(1<<16, 2*(pos-frame))
+        return np.array(start, dtype=np.int64), np.array(end, dtype=np.int64), np.array(natoms, dtype=np.int64)
+
+
+def _line(mm, pos):
+    """Return the line of memory map *mm* beginning at *pos* (including the newline character, if present)."""
+    end = mm.find(b'\n', pos)
+    return mm[pos:] if end < 0 else mm[pos:end+1]
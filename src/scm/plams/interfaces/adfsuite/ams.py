@@ -4,13 +4,14 @@ from os.path import join as opj
 
 from ...core.basejob import SingleJob
 from ...core.basemol import Molecule, Atom
-from ...core.errors import FileError
+from ...core.errors import FileError, ResultsError
 from ...core.functions import log
 from ...core.private import sha256
 from ...core.results import Results
 from ...core.settings import Settings
 from ...tools.kftools import KFFile
 from ...tools.units import Units
+from .scmjob import _fill_template, _history_arrays, _HistoryMolecules, _serialize_template
 
 
 
@@ -203,6 +204,32 @@ class AMSResults(Results):
         return self.get_molecule('Molecule', 'ams')
 
 
+    def get_history_arrays(self, unit='angstrom'):
+        """get_history_arrays(unit='angstrom')
+        Return all entries from the ``History`` section of ``ams.rkf`` file as a dictionary of numpy arrays.
+
+        The dictionary always contains ``coords``, an array of shape (nEntries, nAtoms, 3) with coordinates expressed in *unit*. If present in the ``.rkf`` file, it also contains ``lattices``, an array of shape (nEntries, nLatticeVectors, 3) with lattice vectors (also in *unit*) and ``energies``, an array of shape (nEntries,) with energies in hartree. All the entries are read in a single pass, without creating any |Molecule| instances.
+
+        If no ``History`` section is available, or if the number of atoms or lattice vectors changes between entries, |ResultsError| is raised.
+        """
+        def read(kf):
+            if not ('History', 'nEntries') in kf:
+                raise ResultsError("'History' section not present in {}".format(kf.path))
+            return _history_arrays(kf, unit)
+        return self._access_rkf(read, 'ams')
+
+
+    def get_history_molecules(self, lazy=False):
+        """get_history_molecules(lazy=False)
+        Return a list of |Molecule| instances with all geometries from the ``History`` section of ``ams.rkf`` file.
+
+        Molecules are copies of :meth:`get_input_molecule` with coordinates (and lattice vectors, if present) of subsequent entries. The whole ``History`` section is read at once with :meth:`get_history_arrays`. If *lazy* is ``True``, a read-only sequence is returned instead of a list and each |Molecule| is created only when the corresponding element of that sequence is accessed. Histories in which the number of atoms changes are not supported, |ResultsError| is raised for them.
+        """
+        arrays = self.get_history_arrays()
+        history = _HistoryMolecules(self.get_input_molecule(), arrays['coords'], arrays.get('lattices'))
+        return history if lazy else list(history)
+
+
     def get_engine_results(self, engine=None):
         """get_engine_results(file=None)
 
@@ -235,7 +262,7 @@ class AMSJob(SingleJob):
     def get_input(self):
         """Generate the input file.
 
-        This method is just a wrapper around :meth:`_serialize_input`.
+        This method is just a wrapper around :meth:`_serialize_input` (called through :meth:`_input_template`, so the serialized input is shared with :meth:`hash_input`).
 
         #TODO
         """
@@ -253,7 +280,7 @@ class AMSJob(SingleJob):
             KFFile: lambda x: x.path,
             tuple: lambda x: tuple2rkf(x)
         }
-        return self._serialize_input(special)
+        return _fill_template(*self._cached('input_template', self._input_template), special)
 
 
     def get_runscript(self):
@@ -293,13 +320,20 @@ class AMSJob(SingleJob):
         """Calculate the hash of the input file.
 
         All instances of |SCMJob| or |SCMResults| present as values in ``settings.input`` branch are replaced with hashes of corresponding job's inputs. Instances of |KFFile| are replaced with absolute paths to corresponding files.
+
+        The input is serialized only once (see :meth:`_input_template`), both this method and :meth:`get_input` fill the same template.
         """
         special = {
-            AMSJob: lambda x: x.hash_input(),
-            AMSResults: lambda x: x.job.hash_input(),
+            AMSJob: lambda x: x._cached('hash_input', x.hash_input),
+            AMSResults: lambda x: x.job._cached('hash_input', x.job.hash_input),
             KFFile: lambda x: x.path
         }
-        return sha256(self._serialize_input(special))
+        return sha256(_fill_template(*self._cached('input_template', self._input_template), special))
+
+
+    def _input_template(self):
+        """Serialize ``settings.input`` with all instances of |AMSJob|, |AMSResults|, |KFFile| and tuples replaced by placeholders. Returned value is a pair: the template and the list of replaced values."""
+        return _serialize_template(self, (AMSJob, AMSResults, KFFile, tuple))
 
 
     def _serialize_input(self, special):
@@ -21,6 +21,7 @@ class DensfJob(SCMJob):
     _result_type = DensfResults
     _command = 'densf'
     _top = ['inputfile', 'units']
+    _hash_attributes = ['inputjob']
 
     def __init__(self, inputjob=None, **kwargs):
         SCMJob.__init__(self, **kwargs)
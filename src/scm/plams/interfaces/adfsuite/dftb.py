@@ -1,4 +1,4 @@
-from .scmjob import SCMJob, SCMResults
+from .scmjob import SCMJob, SCMResults, _history_arrays, _HistoryMolecules
 from ...core.errors import ResultsError
 from ...core.functions import log
 from ...tools.units import Units
@@ -40,28 +40,50 @@ class DFTBResults(SCMResults):
         return self.get_main_molecule()
 
 
-    def get_history_molecules(self):
-        """get_history_molecules()
+    def get_history_arrays(self, unit='angstrom'):
+        """get_history_arrays(unit='angstrom')
+        Return all entries from the ``History`` section of the ``.rkf`` file as a dictionary of numpy arrays.
+
+        The dictionary always contains ``coords``, an array of shape (nEntries, nAtoms, 3) with coordinates expressed in *unit*. If present in the ``.rkf`` file, it also contains ``lattices``, an array of shape (nEntries, nLatticeVectors, 3) with lattice vectors (also in *unit*) and ``energies``, an array of shape (nEntries,) with energies in hartree. All the entries are read in a single pass, without creating any |Molecule| instances, which is much faster than reading them one by one for long histories.
+
+        All data used by this method is taken from ``$JN.rkf`` file. If no ``History`` section is available, or if the number of atoms or lattice vectors changes between entries, |ResultsError| is raised.
+        """
+        if not ('History', 'nEntries') in self._kf:
+            raise ResultsError("'History' section not present in {}".format(self._kfpath()))
+        return _history_arrays(self._kf, unit)
+
+
+    def get_history_molecules(self, lazy=False):
+        """get_history_molecules(lazy=False)
         Return a list of |Molecule| instances with all Structures from the ``History`` section of the ``.rkf`` file.
         If the structures have lattice information, it is written into the corresponding |Molecule| instance.
 
+        The whole ``History`` section is read at once with :meth:`get_history_arrays`. If *lazy* is ``True``, a read-only sequence is returned instead of a list and each |Molecule| is created only when the corresponding element of that sequence is accessed. If the number of atoms changes between entries, the entries are read one by one and a list is returned regardless of *lazy*.
+
         All data used by this method is taken from ``$JN.rkf`` file. If no ``History`` section is available an empty list is returned and a level 5 log entry appears.
         """
         if not ('History', 'nEntries') in self._kf:
             log('No History section found in rkf during get_history_molecules, returning an empty list.',level=5)
             return []
 
-        nEntries = self.readkf('History', 'nEntries')
-        #list of molecules to return
+        try:
+            arrays = self.get_history_arrays()
+        except ResultsError:
+            return self._history_molecules()
+        history = _HistoryMolecules(self.get_molecule('History', 'Coords(1)'), arrays['coords'], arrays.get('lattices'))
+        return history if lazy else list(history)
+
+
+    def _history_molecules(self):
+        """_history_molecules()
+        Return a list of |Molecule| instances with all entries from the ``History`` section, reading each entry separately. Used by :meth:`get_history_molecules` when entries cannot be read as arrays.
+        """
         history = []
-        #iterate over entries
-        for i in range(1,nEntries+1):
-            mol = self.get_molecule('History','Coords('+str(i)+')')
-            #read lattice if there is any
-            if ('History','LatticeVectors('+str(i)+')') in self._kf:
-                #LatticeVectors has to be length dimensions*3, so we can do this
-                lattice = Units.convert(self.readkf('History','LatticeVectors('+str(i)+')'), 'bohr', 'angstrom')
-                mol.lattice = [tuple(lattice[j:j+3]) for j in range(0,len(lattice),3)]
+        for i in range(1, self.readkf('History', 'nEntries')+1):
+            mol = self.get_molecule('History', 'Coords({})'.format(i))
+            if ('History', 'LatticeVectors({})'.format(i)) in self._kf:
+                lattice = Units.convert(self.readkf('History', 'LatticeVectors({})'.format(i)), 'bohr', 'angstrom')
+                mol.lattice = [tuple(lattice[j:j+3]) for j in range(0, len(lattice), 3)]
             history.append(mol)
         return history
 
@@ -22,6 +22,7 @@ class FCFJob(SCMJob):
     _result_type = FCFResults
     _command = 'fcf'
     _top = ['states', 'state1', 'state2']
+    _hash_attributes = ['inputjob1', 'inputjob2']
 
     def __init__(self, inputjob1=None, inputjob2=None, **kwargs):
         SCMJob.__init__(self,**kwargs)
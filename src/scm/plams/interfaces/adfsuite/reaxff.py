@@ -73,6 +73,8 @@ class ReaxFFJob(SingleJob):
         """
         return None
 
+    hash_structure = hash_input
+
 
     def _get_ready(self):
         """Prepare contents of the job folder for execution.
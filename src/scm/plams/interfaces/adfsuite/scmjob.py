@@ -1,5 +1,8 @@
+import numpy as np
 import os
+import re
 
+from collections.abc import Sequence
 from os.path import join as opj
 
 from ...core.basemol import Molecule, Atom
@@ -177,7 +180,7 @@ class SCMJob(SingleJob):
             SCMResults: lambda x: x._kfpath(),
             KFFile: lambda x: x.path
         }
-        return self._serialize_input(special)
+        return _fill_template(*self._cached('input_template', self._input_template), special)
 
 
     def get_runscript(self):
@@ -217,13 +220,20 @@ class SCMJob(SingleJob):
         """Calculate the hash of the input file.
 
         All instances of |SCMJob| or |SCMResults| present as values in ``settings.input`` branch are replaced with hashes of corresponding job's inputs.
+
+        The input is serialized only once (see :meth:`_input_template`), both this method and :meth:`get_input` fill the same template.
         """
         special = {
-            SCMJob: lambda x: x.hash_input(),
-            SCMResults: lambda x: x.job.hash_input(),
+            SCMJob: lambda x: x._cached('hash_input', x.hash_input),
+            SCMResults: lambda x: x.job._cached('hash_input', x.job.hash_input),
             KFFile: lambda x: x.path
         }
-        return sha256(self._serialize_input(special))
+        return sha256(_fill_template(*self._cached('input_template', self._input_template), special))
+
+
+    def _input_template(self):
+        """Serialize ``settings.input`` with all instances of |SCMJob|, |SCMResults| and |KFFile| replaced by placeholders. Returned value is a pair: the template and the list of replaced values (see :func:`_fill_template`)."""
+        return _serialize_template(self, (SCMJob, SCMResults, KFFile))
 
 
     def _serialize_input(self, special):
@@ -322,3 +332,83 @@ class SCMJob(SingleJob):
             smb = (smb+'.'+str(atom.properties.name)).lstrip('.')
         return smb
 
+
+
+def _serialize_template(job, types):
+    """Call ``_serialize_input`` of *job* with all values of *types* replaced by placeholders. Return the resulting template and the list of replaced values, in order of placeholders.
+
+    Values referring to other jobs are translated differently for the input file (paths of results files, which are known only once the other job is finished) and for the hash (hashes of other jobs' inputs). A template can be turned into both with :func:`_fill_template`, so the whole ``settings`` tree is serialized only once.
+    """
+    values = []
+    def placeholder(value):
+        values.append(value)
+        return '\0{}\0'.format(len(values)-1)
+    return job._serialize_input({t: placeholder for t in types}), values
+
+
+def _fill_template(template, values, special):
+    """Replace placeholders in *template* with corresponding elements of *values*, translated with *special* (a dictionary with the same meaning as for ``_serialize_input``). Values without a matching type in *special* are converted with :func:`str`."""
+    def fill(match):
+        value = values[int(match.group(1))]
+        for spec_type in special:
+            if isinstance(value, spec_type):
+                return str(special[spec_type](value))
+        return str(value)
+    return re.sub('\0(\\d+)\0', fill, template)
+
+
+
+def _history_arrays(kf, unit='angstrom'):
+    """Read all entries of ``History`` section of |KFFile| *kf*.
+
+    Return a dictionary with numpy arrays: ``coords`` of shape (nEntries, nAtoms, 3) and, if present in the file, ``lattices`` of shape (nEntries, nvectors, 3) and ``energies`` of shape (nEntries,). Coordinates and lattice vectors are converted from bohr to *unit*, energies are in hartree.
+
+    If the number of atoms or lattice vectors is not the same for all entries, |ResultsError| is raised.
+    """
+    n = kf.read('History', 'nEntries')
+    natoms = len(kf.read_array('History', 'Coords(1)')) // 3
+    ret = {'coords': np.empty((n, natoms, 3))}
+    optional = [('lattices', 'LatticeVectors({})', (-1, 3)), ('energies', 'Energy({})', ())]
+    optional = [(key, var, shape) for key, var, shape in optional if ('History', var.format(1)) in kf]
+
+    for key, var, shape in optional:
+        ret[key] = np.empty((n,) + kf.read_array('History', var.format(1)).reshape(shape).shape)
+    for i in range(n):
+        for key, var, shape in [('coords', 'Coords({})', (-1, 3))] + optional:
+            value = kf.read_array('History', var.format(i+1))
+            if value.size != ret[key][i].size:
+                raise ResultsError('History%{} in {} has {} elements, expected {} (as in the first entry). Entries of different sizes cannot be read as arrays'.format(var.format(i+1), kf.path, value.size, ret[key][i].size))
+            ret[key][i] = value.reshape(shape)
+
+    ratio = Units.conversion_ratio('bohr', unit)
+    ret['coords'] *= ratio
+    if 'lattices' in ret:
+        ret['lattices'] *= ratio
+    return ret
+
+
+
+class _HistoryMolecules(Sequence):
+    """A read-only sequence of molecules created on demand from arrays returned by :func:`_history_arrays`.
+
+    Indexing returns a copy of the *template* |Molecule| with coordinates (and lattice vectors, if present) of the corresponding entry. Slicing returns another sequence of the same kind.
+    """
+
+    def __init__(self, template, coords, lattices=None):
+        self.template = template
+        self.coords = coords
+        self.lattices = lattices
+
+
+    def __len__(self):
+        return len(self.coords)
+
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return _HistoryMolecules(self.template, self.coords[key], None if self.lattices is None else self.lattices[key])
+        ret = self.template.copy()
+        ret.from_array(self.coords[key])
+        if self.lattices is not None:
+            ret.lattice = [tuple(vec) for vec in self.lattices[key].tolist()]
+        return ret
@@ -25,6 +25,7 @@ class CrystalJob(SingleJob):
     _result_type = CrystalResults
     _command = 'crystal'
     _filenames = {'inp':'INPUT', 'run':'$JN.run', 'out':'$JN.out', 'err': '$JN.err'}
+    _hash_attributes = ['name']
 
     def get_input(self):
         """
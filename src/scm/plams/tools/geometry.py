@@ -1,6 +1,7 @@
+import itertools
 import numpy as np
 
-__all__ = ['rotation_matrix']
+__all__ = ['rotation_matrix', 'neighbor_pairs', 'minimum_image']
 
 def rotation_matrix(vec1, vec2):
     """
@@ -10,4 +11,112 @@ def rotation_matrix(vec1, vec2):
     b = np.array(vec2)/np.linalg.norm(vec2)
     v1,v2,v3 = np.cross(a,b)
     M = np.array([[0, -v3, v2], [v3, 0, -v1], [-v2, v1, 0]])
-    return (np.identity(3) + M + np.dot(M,M)/(1+np.dot(a,b)))
\ No newline at end of file
+    return (np.identity(3) + M + np.dot(M,M)/(1+np.dot(a,b)))
+
+
+def neighbor_pairs(xyz, cutoff, lattice=None):
+    """
+    Find all pairs of points from *xyz* (a numpy array of shape (N,3) or anything convertible to it) that are closer to each other than *cutoff*. Returns a tuple of three numpy arrays ``(i, j, d)``: indices of the first and the second point of each pair (always ``i < j``) and the distance between them. Pairs are sorted by *i* and then by *j*.
+
+    If *lattice* (a list of 1, 2 or 3 lattice vectors, like ``lattice`` of |Molecule|) is supplied, the system is treated as periodic in directions spanned by lattice vectors and the minimum image convention is used: every pair is reported at most once, with the shortest distance between any periodic images of two points. Pairs of a point with its own periodic image are not reported.
+
+    Points are sorted into a grid of cubic cells of size *cutoff* and only points from neighboring cells are compared, so the time and memory needed grow linearly with the number of points (for systems of constant density).
+    """
+    xyz = np.asarray(xyz, dtype=float).reshape(-1,3)
+    n = len(xyz)
+    orig = np.arange(n)
+
+    if lattice:
+        lattice = np.asarray(lattice, dtype=float).reshape(-1,3)
+        recip = np.linalg.pinv(lattice)
+        frac = xyz @ recip
+        xyz = xyz - np.floor(frac) @ lattice
+        frac -= np.floor(frac)
+        margin = cutoff * np.linalg.norm(recip, axis=0)
+        points, orig = [xyz], [orig]
+        for shift in itertools.product(*[range(-k, k+1) for k in np.ceil(margin).astype(int)]):
+            if any(shift):
+                f = frac + shift
+                mask = np.all((f > -margin) & (f < 1 + margin), axis=1)
+                points.append(xyz[mask] + np.array(shift, dtype=float) @ lattice)
+                orig.append(np.nonzero(mask)[0])
+        xyz, orig = np.concatenate(points), np.concatenate(orig)
+
+    i, j, d = [], [], []
+    for a, b in _cell_list_pairs(xyz, cutoff):
+        a, b = np.minimum(a, b), np.maximum(a, b)
+        mask = a < n
+        a, b = a[mask], b[mask]
+        dist = np.linalg.norm(xyz[a] - xyz[b], axis=1)
+        mask = dist < cutoff
+        i.append(orig[a[mask]])
+        j.append(orig[b[mask]])
+        d.append(dist[mask])
+
+    i, j, d = (np.concatenate(x) if x else np.zeros(0, dtype=t) for x,t in zip((i,j,d), (int,int,float)))
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    mask = i != j
+    i, j, d = i[mask], j[mask], d[mask]
+
+    order = np.lexsort((d, j, i))
+    i, j, d = i[order], j[order], d[order]
+    if len(i) > 1:
+        first = np.ones(len(i), dtype=bool)
+        first[1:] = (i[1:] != i[:-1]) | (j[1:] != j[:-1])
+        i, j, d = i[first], j[first], d[first]
+    return i, j, d
+
+
+def minimum_image(vectors, lattice):
+    """
+    Return the shortest periodic images of *vectors* (a numpy array of shape (N,3), or anything convertible to it) in a system periodic along 1, 2 or 3 vectors given in *lattice*. Returns a numpy array of shape (N,3). If *lattice* is empty, *vectors* are returned unchanged.
+
+    Vectors are first reduced with fractional coordinates rounded to nearest integers and then compared with their images in all neighboring cells, which gives the correct result for all cells that are not extremely skewed.
+    """
+    vectors = np.array(vectors, dtype=float).reshape(-1,3)
+    if not lattice:
+        return vectors
+    lattice = np.asarray(lattice, dtype=float).reshape(-1,3)
+    vectors -= np.round(vectors @ np.linalg.pinv(lattice)) @ lattice
+    best = vectors.copy()
+    bestdist = np.einsum('ij,ij->i', best, best)
+    for shift in itertools.product((-1,0,1), repeat=len(lattice)):
+        if any(shift):
+            image = vectors + np.array(shift, dtype=float) @ lattice
+            dist = np.einsum('ij,ij->i', image, image)
+            better = dist < bestdist
+            best[better], bestdist[better] = image[better], dist[better]
+    return best
+
+
+def _cell_list_pairs(xyz, cellsize, chunk=1<<22):
+    """Yield candidate pairs of points from *xyz* that belong to the same or to neighboring cubic cells of size *cellsize*. Every unordered pair is yielded exactly once, as a tuple of two index arrays, in chunks of roughly *chunk* pairs."""
+    if len(xyz) < 2:
+        return
+    cells = np.floor((xyz - xyz.min(axis=0)) / cellsize).astype(np.int64) + 1
+    dims = cells.max(axis=0) + 2
+    key = (cells[:,0] * dims[1] + cells[:,1]) * dims[2] + cells[:,2]
+    order = np.argsort(key, kind='stable')
+    cellkeys, start, count = np.unique(key[order], return_index=True, return_counts=True)
+
+    half_shell = [(0,0,0)] + [s for s in itertools.product((-1,0,1), repeat=3) if s > (0,0,0)]
+    for shift in half_shell:
+        other = cellkeys + (shift[0] * dims[1] + shift[1]) * dims[2] + shift[2]
+        pos = np.minimum(np.searchsorted(cellkeys, other), len(cellkeys)-1)
+        ca = np.nonzero(cellkeys[pos] == other)[0]
+        cb = pos[ca]
+        na, nb = count[ca], count[cb]
+        sizes = na * nb
+        bounds = np.searchsorted(np.cumsum(sizes), np.arange(chunk, sizes.sum(), chunk), side='right')
+        for sel in np.split(np.arange(len(ca)), bounds):
+            if len(sel) == 0:
+                continue
+            tot = sizes[sel]
+            pair = np.repeat(sel, tot)
+            local = np.arange(tot.sum()) - np.repeat(np.cumsum(tot) - tot, tot)
+            ia = start[ca[pair]] + local // nb[pair]
+            ib = start[cb[pair]] + local % nb[pair]
+            if shift == (0,0,0):
+                mask = ia < ib
+                ia, ib = ia[mask], ib[mask]
+            yield order[ia], order[ib]
@@ -1,6 +1,10 @@
+import mmap
 import os
 import shutil
 import struct
+import threading
+
+import numpy as np
 
 from bisect import bisect
 from collections import OrderedDict
@@ -11,7 +15,7 @@ from ..core.errors import FileError
 from ..core.functions import log
 
 
-__all__ = ['KFFile', 'KFReader']
+__all__ = ['KFFile', 'KFReader', 'KFWriter']
 
 
 
@@ -26,13 +30,24 @@ class KFReader(object):
 
     Organization of data inside KF file can depend on a machine on which this file was produced. Two parameters can vary: the length of integer (32 or 64 bit) and endian (little or big). These parameters have to be determined before any reading can take place, otherwise the results will have no sense. If the constructor argument *autodetect* is ``True``, the constructor attempts to automatically detect the format of a given KF file, allowing to read files created on a machine with different endian or integer length. This automatic detection is enabled by default and it is advised to leave it that way. If you wish to disable it, you should set ``endian`` and ``word`` attributes manually before reading anything (see the code for details).
 
+    The file is accessed through a read-only memory map, created when the first variable is read, and its index is built only once. :meth:`~KFReader.read_array` returns numerical data as NumPy arrays which, whenever a variable is stored in a contiguous fragment of the file, are just views of the mapped file (no data is copied). :meth:`~KFReader.read` returns plain Python values and lists, like it always did.
+
+    .. warning ::
+
+        Memory maps assume that the file does not change while it is being read. |KFFile| drops cached maps of a file before writing to it, but nothing can detect changes made by other processes. Do not use |KFReader| for a KF file that is still being written (for example, by a running job) and copy arrays returned by :meth:`~KFReader.read_array` if the file may be modified or truncated while they are in use. Accessing a mapped fragment of a file that was truncated in the meantime crashes the Python interpreter with ``SIGBUS``.
+
     .. note ::
 
-        This class consists of quite technical, low level code. If you don't need to modify or extend |KFReader|, you can safely ignore all private methods, all you need is :meth:`~KFReader.read` and occasionally :meth:`~KFReader.__iter__`
+        This class consists of quite technical, low level code. If you don't need to modify or extend |KFReader|, you can safely ignore all private methods, all you need is :meth:`~KFReader.read` and occasionally :meth:`~KFReader.read_array` and :meth:`~KFReader.__iter__`
 
     """
 
     _sizes = {'s':1,'i':4,'d':8,'q':8}
+    _index_cache = OrderedDict()
+    _index_cache_size = 256
+    _index_lock = threading.Lock()
+    _map_cache = OrderedDict()
+    _map_cache_size = 16
 
     def __init__(self, path, blocksize=4096, autodetect=True):
         if os.path.isfile(path):
@@ -44,6 +59,7 @@ class KFReader(object):
         self.endian = '<'   # endian: '<' = little, '>' = big
         self.word = 'i'     # length of int: 'i' = 4 bits, 'q' = 8 bits
         self._sections = None
+        self._stamp = None
         if autodetect:
             self._autodetect()
 
@@ -53,32 +69,37 @@ class KFReader(object):
 
         For single-value numerical or boolean variables returned value is a single number or bool. For longer variables this method returns a list of values. For string variables a single string is returned.
         """
+        ret = self.read_array(section, variable)
+        if isinstance(ret, str):
+            return ret[0] if len(ret) == 1 else ret
+        ret = ret.tolist()
+        return ret[0] if len(ret) == 1 else ret
 
-        if self._sections is None:
-            self._create_index()
 
-        try:
-            tmp = self._sections[section]
-        except KeyError:
-            raise FileError('Section {} not present in {}'.format(section, self.path))
-        try:
-            vtype, vlb, vstart, vlen = tmp[variable]
-        except KeyError:
-            raise FileError('Variable {} not present in section {} of {}'.format(variable, section, self.path))
+    def read_array(self, section, variable):
+        """Extract and return data for a *variable* located in a *section* as a one-dimensional NumPy array (even for single-value variables). For string variables a single string is returned.
 
-        ret = []
-        first = True
-        with open(self.path, 'rb') as f:
-            for i in KFReader._datablocks(self._data[section], vlb):
-                if first:
-                    ret = self._get_data(self._read_block(f,i))[vtype-1][vstart-1:]
-                    first = False
-                else:
-                    ret += self._get_data(self._read_block(f,i))[vtype-1]
-                if len(ret) >= vlen:
-                    ret = ret[:vlen]
-                    if len(ret) == 1: return ret[0]
-                    return ret
+        If the variable is stored in a contiguous fragment of the file, the returned array is a read-only view of the memory mapped file (which keeps the file mapped as long as the array exists). Otherwise the fragments are copied into a new array. Boolean variables are always copied, since KF files store them as integers.
+        """
+        vtype, segments = self._locate(section, variable)
+        mm = self._map()
+        if vtype == 3:
+            return KFReader._decode(b''.join(mm[off:off+n] for off, n in segments))
+
+        dtype = np.dtype(self.endian + ('f8' if vtype == 2 else self.word))
+        arrays = [np.frombuffer(mm, dtype=dtype, count=n, offset=off) for off, n in segments]
+        ret = arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+        if vtype == 4:
+            return ret != 0
+        return ret
+
+
+    def __contains__(self, name):
+        """Check if a pair *(section, variable)* is present in this KF file."""
+        if self._sections is None:
+            self._create_index()
+        section, variable = name
+        return section in self._sections and variable in self._sections[section]
 
 
     def __iter__(self):
@@ -113,10 +134,38 @@ class KFReader(object):
                 log(('Format of {0} detected to {'+self.word+'} and {'+self.endian+'}').format(self.path, **d), 7)
 
 
-    def _read_block(self, f, pos):
-        """Read a single block of binary data from posistion *pos* in file *f*."""
-        f.seek((pos-1)*self._blocksize)
-        return f.read(self._blocksize)
+    def _map(self):
+        """Return a read-only memory map of this KF file.
+
+        Memory maps are shared by all instances and only the ``_map_cache_size`` most recently used ones are kept, so reading many KF files does not keep a file descriptor open for each of them. A map is keyed by the path, size and modification time of the file the index was created for (see :meth:`_create_index`). Maps removed from the cache are not closed explicitly, they are released as soon as no array returned by :meth:`read_array` refers to them.
+        """
+        if self._stamp is None:
+            st = os.stat(self.path)
+            self._stamp = (st.st_size, st.st_mtime_ns)
+        key = (self.path,) + self._stamp
+        with KFReader._index_lock:
+            if key in KFReader._map_cache:
+                KFReader._map_cache.move_to_end(key)
+                return KFReader._map_cache[key]
+            with open(self.path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            KFReader._map_cache[key] = mm
+            while len(KFReader._map_cache) > KFReader._map_cache_size:
+                KFReader._map_cache.popitem(last=False)
+        return mm
+
+
+    @staticmethod
+    def _unmap(path):
+        """Remove all memory maps of the file *path* from the cache."""
+        with KFReader._index_lock:
+            for key in [k for k in KFReader._map_cache if k[0] == path]:
+                del KFReader._map_cache[key]
+
+
+    def _read_block(self, pos):
+        """Read a single block of binary data from posistion *pos*."""
+        return self._map()[(pos-1)*self._blocksize : pos*self._blocksize]
 
 
     def _parse(self, block, format):   #format = [(32,'s'),(4,'i'),(2,'d')]
@@ -132,30 +181,60 @@ class KFReader(object):
             step += a * self._sizes[t]
             formatstring += str(a) + t
 
-        ret = []
-        if step > 0:
-            while step <= len(block):
-                new = struct.unpack(str(formatstring), block[:step])
-                try:
-                    new = tuple(map(lambda x: x.decode() if isinstance(x,bytes) else x, new))
-                except UnicodeDecodeError:
-                    new = tuple(map(lambda x: x.decode("Latin-1") if isinstance(x,bytes) else x, new))
-                ret.append(new)
-                block = block[step:]
-        return ret
+        if step == 0:
+            return []
+        block = block[:len(block) - len(block) % step]
+        return [tuple(KFReader._decode(x) if isinstance(x,bytes) else x for x in new) for new in struct.iter_unpack(formatstring, block)]
 
 
-    def _get_data(self, datablock):
-        """Extract all data from a single data block. Returned value is a 4-tuple of lists, one list for each data type (respectively: int, float, str, bool).
+    @staticmethod
+    def _decode(b):
+        """Decode bytes *b* to a string, falling back to Latin-1 for non-UTF-8 contents."""
+        try:
+            return b.decode()
+        except UnicodeDecodeError:
+            return b.decode('Latin-1')
+
+
+    def _locate(self, section, variable):
+        """Find the data of *variable* in *section*. Returned value is a pair: the type of the variable (1 for int, 2 for float, 3 for string, 4 for bool) and a list of pairs *(offset, count)* describing the location (byte offset in the file and the number of elements) of each contiguous fragment of the data.
+
+        Data blocks of the section are visited in the logical order, but only their 4-word headers are read. Fragments placed one after another in the file (a variable spanning consecutive physical blocks, with no data of other types in between) are merged.
         """
-        hlen = 4 * self._sizes[self.word]
-        i,d,s,b = self._parse(datablock[:hlen],[(4,self.word)])[0]
-        contents = self._parse(datablock[hlen:], zip((i,d,s,b),(self.word,'d','s',self.word)))
-        if contents:
-            ret = list(contents[0])
-            return ret[:i], ret[i:i+d], ret[i+d], list(map(bool,ret[i+d+1:]))
-        else:
-            return [], [], [], []
+        if self._sections is None:
+            self._create_index()
+
+        try:
+            tmp = self._sections[section]
+        except KeyError:
+            raise FileError('Section {} not present in {}'.format(section, self.path))
+        try:
+            vtype, vlb, vstart, vlen = tmp[variable]
+        except KeyError:
+            raise FileError('Variable {} not present in section {} of {}'.format(variable, section, self.path))
+
+        mm = self._map()
+        w = self._sizes[self.word]
+        size = (w, 8, 1, w)[vtype-1]
+        header = struct.Struct(self.endian + '4' + self.word)
+        segments = []
+        skip = vstart - 1
+        left = vlen
+        for i in KFReader._datablocks(self._data[section], vlb):
+            pos = (i-1)*self._blocksize
+            ni, nd, ns, nb = header.unpack_from(mm, pos)
+            offset = pos + header.size + (0, ni*w, ni*w+nd*8, ni*w+nd*8+ns)[vtype-1] + skip*size
+            n = min((ni, nd, ns, nb)[vtype-1] - skip, left)
+            skip = 0
+            if n > 0:
+                if segments and segments[-1][0] + segments[-1][1]*size == offset:
+                    segments[-1] = (segments[-1][0], segments[-1][1] + n)
+                else:
+                    segments.append((offset, n))
+                left -= n
+            if left <= 0:
+                break
+        return vtype, segments
 
 
     def _create_index(self):
@@ -164,41 +243,70 @@ class KFReader(object):
         Two dictionaries are populated during this process. ``_data`` contains, for each section, a list of triples describing how logical blocks of data are mapped into physical ones. For example, ``_data['General'] = [(3,6,12), (9,40,45)]`` means that logical blocks 3-8 of section ``General`` are located in physical blocks 6-11 and logical blocks 9-13 in physical blocks 40-44. This list is always sorted via first tuple elements allowing efficient access to arbitrary logical block of each section.
 
         The second dictionary, ``_sections``, is used to locate each variable within its section. For each section, it contains another dictionary of each variable of this section. So ``_section[sec][var]`` contains all information needed to extract variable ``var`` from section ``sec``. This is a 4-tuple containing the following information: variable type, logic block in which the variable first occurs, position within this block where its data start and the length of the variable. Combining this information with mapping stored in ``_data`` allows to extract each single variable.
+
+        Parsed indices are cached in memory (shared by all instances) for the most recently used ``_index_cache_size`` KF files. The cache is keyed by the absolute path, size and modification time of the file, so a modified file is always indexed again.
         """
 
+        st = os.stat(self.path)
+        self._stamp = (st.st_size, st.st_mtime_ns)
+        cachekey = (self.path, st.st_size, st.st_mtime_ns, self.endian, self.word, self._blocksize)
+        with KFReader._index_lock:
+            if cachekey in KFReader._index_cache:
+                KFReader._index_cache.move_to_end(cachekey)
+                self._data, self._sections = KFReader._index_cache[cachekey]
+                return
+
         hlen = 32 + 7 * self._sizes[self.word]   #length of index block header
 
-        with open(self.path, 'rb') as f:
-            superlist = self._parse(self._read_block(f, 1), [(32,'s'),(4,self.word)])
-            nextsuper = superlist[0][4]
-            while nextsuper != 1:
-                nsl = self._parse(self._read_block(f, nextsuper), [(32,'s'),(4,self.word)])
-                nextsuper = nsl[0][4]
-                superlist += nsl
-
-            self._data = {}   #list of triples to convert logical to physical block numbers
-            self._sections = {}
-            for key, pb, lb, le, ty in superlist:   #pb=physical block, lb=logical block, le=length, ty=type (3 for index, 4 for data)
-                key = key.rstrip(' ')
-                if key in ['SUPERINDEX', 'EMPTY']: continue
-                if ty == 4:   #data block
-                    if key not in self._data:
-                        self._data[key] = []
-                    self._data[key].append((lb, pb, pb+le))
-                elif ty == 3:   #index block
-                    if key not in self._sections:
-                        self._sections[key] = {}
-                    for i in range(le):
-                        indexblock = self._read_block(f, pb+i)
-                        header = self._parse(indexblock[:hlen],[(32,'s'),(7,self.word)])[0]
-                        body = self._parse(indexblock[hlen:],[(32,'s'),(6,self.word)])
-                        for var, vlb, vstart, vlen, _xx1, _xx2, vtype in body:
-                            var = var.rstrip(' ')
-                            if var == 'EMPTY': continue
-                            self._sections[key][var] = (vtype, vlb, vstart, vlen)
-
-            for k,v in self._data.items():
-                self._data[k] = sorted(v)
+        superlist = self._parse(self._read_block(1), [(32,'s'),(4,self.word)])
+        nextsuper = superlist[0][4]
+        while nextsuper != 1:
+            nsl = self._parse(self._read_block(nextsuper), [(32,'s'),(4,self.word)])
+            nextsuper = nsl[0][4]
+            superlist += nsl
+
+        data = {}   #list of triples to convert logical to physical block numbers
+        sections = {}
+        for key, pb, lb, le, ty in superlist:   #pb=physical block, lb=logical block, le=length, ty=type (3 for index, 4 for data)
+            key = key.rstrip(' ')
+            if key in ['SUPERINDEX', 'EMPTY']: continue
+            if ty == 4:   #data block
+                if key not in data:
+                    data[key] = []
+                data[key].append((lb, pb, pb+le))
+            elif ty == 3:   #index block
+                if key not in sections:
+                    sections[key] = {}
+                for i in range(le):
+                    indexblock = self._read_block(pb+i)
+                    header = self._parse(indexblock[:hlen],[(32,'s'),(7,self.word)])[0]
+                    body = self._parse(indexblock[hlen:],[(32,'s'),(6,self.word)])
+                    for var, vlb, vstart, vlen, _xx1, _xx2, vtype in body:
+                        var = var.rstrip(' ')
+                        if var == 'EMPTY': continue
+                        sections[key][var] = (vtype, vlb, vstart, vlen)
+
+        for k,v in data.items():
+            data[k] = sorted(v)
+        self._set_index(data, sections, cachekey)
+
+
+    def _set_index(self, data, sections, cachekey=None):
+        """Use *data* and *sections* (see :meth:`_create_index`) as the index of this KF file and store them in the index cache.
+
+        This method is also used by |KFWriter| to update the index after modifying the file, instead of parsing it again. In that case the stamp of the file is updated as well, so that the next read maps the file with its new size.
+        """
+        if cachekey is None:
+            st = os.stat(self.path)
+            self._stamp = (st.st_size, st.st_mtime_ns)
+            cachekey = (self.path, st.st_size, st.st_mtime_ns, self.endian, self.word, self._blocksize)
+        self._data = data
+        self._sections = sections   #assigned last, so other threads never see an incomplete index
+
+        with KFReader._index_lock:
+            KFReader._index_cache[cachekey] = (data, sections)
+            while len(KFReader._index_cache) > KFReader._index_cache_size:
+                KFReader._index_cache.popitem(last=False)
 
 
     @staticmethod
@@ -216,6 +324,329 @@ class KFReader(object):
                 _, ret, last = lst[i]
 
 
+#===========================================================================
+#===========================================================================
+#===========================================================================
+
+
+
+class KFWriter(object):
+    """A class for Python-native writing of binary files in KF format.
+
+    This class is a counterpart of |KFReader|: it modifies KF files on Python level, without using any Fortran binaries. The constructor argument *reader* should be a |KFReader| instance for an existing KF file (use :meth:`create` to create a new, empty file). The file format (block size, integer length and endian) is taken from *reader*.
+
+    Data is never overwritten in place. New values are always written to new data blocks appended at the end of the file and only index and superindex blocks are modified in place (or appended, when they are full). When an existing variable is written again, its old data stays in the file but is no longer referenced by the index, so the file grows by at least one block with every :meth:`write` and the space is never reclaimed. After every modification the index of *reader* is updated directly, so the file does not need to be parsed again.
+
+    Files written by this class are read correctly by |KFReader|, but the layout of index blocks (header words and unused fields of index records) follows the files produced by ADFSuite only as far as |KFReader| needs it. It has not been validated against ADFSuite's own KF library.
+
+    The layout of the superindex and of index blocks is parsed when needed and remembered between subsequent writes, as long as the file is not modified by anyone else (its size and modification time are checked).
+
+    Usually there is no need to use this class directly, |KFFile| uses it to save its data.
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self._stamp = None
+
+
+    @staticmethod
+    def create(path, endian='<', word='i', blocksize=4096):
+        """Create a new, empty KF file in *path*, with a single superindex block. *endian* and *word* have the same meaning as in |KFReader|."""
+        rec = struct.Struct(endian + '32s4' + word)
+        block = bytearray(blocksize)
+        KFWriter._new_superindex(block, rec, 1)
+        KFReader._unmap(os.path.abspath(path))
+        with open(path, 'wb') as f:
+            f.write(block)
+
+
+    def write(self, data):
+        """Write *data* to the file. *data* should be a dictionary of dictionaries: ``data[section][variable] = value``.
+
+        Each value can be a single int, float, bool or string, a list of ints, floats or bools, or a NumPy array of such numbers (multidimensional arrays are flattened). Variables present in the file are overwritten.
+        """
+        r = self.reader
+        self._load()
+        for section in data:
+            KFWriter._name(section)
+        encoded = [(section, self._pack(variables)) for section, variables in data.items() if variables]
+        blockmap = dict(r._data)
+        sections = dict(r._sections)
+        blocks = {}    #physical block number -> contents
+        superblocks = {}
+
+        try:
+            for section, (entries, datablocks) in encoded:
+                lb = max((lb+end-pb for lb, pb, end in blockmap.get(section, [])), default=1)
+                pb = self._append(blocks, datablocks)
+                self._add_record(superblocks, (section, pb, lb, len(datablocks), 4))
+                blockmap[section] = sorted(blockmap.get(section, []) + [(lb, pb, pb+len(datablocks))])
+                entries = {var: (vtype, lb+k, vstart, vlen) for var, (vtype, k, vstart, vlen) in entries.items()}
+                self._write_index(section, entries, blocks, superblocks)
+                sections[section] = dict(sections.get(section, {}))
+                sections[section].update(entries)
+            self._flush(blocks, superblocks)
+        except:
+            self._stamp = None   #the remembered layout may not match the file anymore
+            raise
+        r._set_index(blockmap, sections)
+
+
+    def delete_section(self, section):
+        """Delete the entire *section* from the file. Only superindex records of *section* are removed, its data and index blocks stay in the file, unreferenced."""
+        r = self.reader
+        self._load()
+        superblocks = {}
+        for (pb, i), record in list(self._records.items()):
+            if record[0] == section:
+                self._pack_record(superblocks, pb, i, ('EMPTY', 0, 0, 0, 0))
+                del self._records[pb, i]
+                self._free.append((pb, i))
+        self._free.sort(reverse=True)
+        self._indices.pop(section, None)
+        if superblocks:
+            try:
+                self._flush(superblocks)
+            except:
+                self._stamp = None
+                raise
+            blockmap = {k:v for k,v in r._data.items() if k != section}
+            sections = {k:v for k,v in r._sections.items() if k != section}
+            r._set_index(blockmap, sections)
+
+
+    @staticmethod
+    def _name(name):
+        """Encode *name* as a 32 characters long, space padded, byte string."""
+        ret = name.encode()
+        if len(ret) > 32:
+            raise ValueError('Names of sections and variables in KF files cannot be longer than 32 characters: {}'.format(name))
+        return ret.ljust(32)
+
+
+    @staticmethod
+    def _new_superindex(block, rec, pb):
+        """Fill *block* with an empty superindex located in physical block *pb*. The first record points to the next superindex block, 1 means there is none."""
+        rec.pack_into(block, 0, KFWriter._name(''), 0, 0, 0, 1)
+        rec.pack_into(block, rec.size, KFWriter._name('SUPERINDEX'), pb, 1, 1, 1)
+        for i in range(2, len(block) // rec.size):
+            rec.pack_into(block, i*rec.size, KFWriter._name('EMPTY'), 0, 0, 0, 0)
+
+
+    def _load(self):
+        """Make sure the index of the reader and the layout of the superindex are up to date. Both are refreshed only if the file was modified since the last write."""
+        r = self.reader
+        st = os.stat(r.path)
+        if self._stamp == (st.st_size, st.st_mtime_ns):
+            return
+
+        r._sections = None   #the index is taken from the cache, unless the file was modified
+        r._create_index()
+
+        self._nblocks = -(-st.st_size // r._blocksize)
+        self._rec = struct.Struct(r.endian + '32s4' + r.word)
+        self._head = struct.Struct(r.endian + '32s7' + r.word)
+        self._irec = struct.Struct(r.endian + '32s6' + r.word)
+        self._supers = []
+        self._records = {}    #(superindex block, position) -> record, for all used records
+        self._free = []       #empty records of the superindex, in reversed order
+        self._indices = {}    #section -> parsed index, see _section_index
+
+        pb = 1
+        while True:
+            records = r._parse(r._read_block(pb), [(32,'s'),(4,r.word)])
+            self._supers.append(pb)
+            for i, (name, *rest) in enumerate(records[1:], 1):
+                name = name.rstrip(' ')
+                if name == 'EMPTY':
+                    self._free.append((pb, i))
+                else:
+                    self._records[pb, i] = (name,) + tuple(rest)
+            pb = records[0][4]
+            if pb == 1:
+                break
+        self._free.reverse()
+
+
+    def _section_index(self, section):
+        """Return the parsed index of *section*: a list containing the header of its index blocks, the list of its index blocks, a dictionary with the position *(block, record)* of each variable and a list of empty positions (in reversed order)."""
+        if section not in self._indices:
+            r = self.reader
+            header = None
+            indexblocks = []
+            slots = {}
+            free = []
+            for name, pb, lb, le, ty in sorted(rec for rec in self._records.values() if rec[0] == section and rec[4] == 3):
+                for pb in range(pb, pb+le):
+                    block = r._read_block(pb)
+                    header = header or block[:self._head.size]
+                    indexblocks.append(pb)
+                    for i, (var, *_) in enumerate(r._parse(block[self._head.size:], [(32,'s'),(6,r.word)])):
+                        var = var.rstrip(' ')
+                        if var == 'EMPTY':
+                            free.append((pb, i))
+                        else:
+                            slots[var] = (pb, i)
+            free.reverse()
+            self._indices[section] = [header, indexblocks, slots, free]
+        return self._indices[section]
+
+
+    def _pack(self, variables):
+        """Encode *variables* (a dictionary) into a list of data blocks.
+
+        Returned value is a pair: a dictionary with a tuple *(type, block, start, length)* for each variable, where *block* is counted from 0 for the first of new data blocks, and the list of data blocks, as bytes. Data of each type is placed one after another, filling each block in the order: integers, floats, strings, bools.
+        """
+        r = self.reader
+        w = r._sizes[r.word]
+        sizes = (w, 8, 1, w)
+        streams = [[], [], [], []]
+        lengths = [0, 0, 0, 0]
+        entries = {}
+        for var, value in variables.items():
+            KFWriter._name(var)
+            vtype, raw = self._encode(value)
+            n = len(raw) // sizes[vtype-1]
+            entries[var] = (vtype, lengths[vtype-1], n)
+            streams[vtype-1].append(raw)
+            lengths[vtype-1] += n
+        streams = [b''.join(i) for i in streams]
+
+        header = struct.Struct(r.endian + '4' + r.word)
+        blocks = []
+        starts = []
+        pos = [0, 0, 0, 0]
+        while not blocks or pos != lengths:
+            free = r._blocksize - header.size
+            counts = []
+            for t in range(4):
+                n = min(lengths[t] - pos[t], free // sizes[t])
+                counts.append(n)
+                free -= n * sizes[t]
+            body = header.pack(*counts) + b''.join(streams[t][pos[t]*sizes[t] : (pos[t]+counts[t])*sizes[t]] for t in range(4))
+            blocks.append(body.ljust(r._blocksize, b'\0'))
+            starts.append(pos)
+            pos = [p+c for p,c in zip(pos, counts)]
+
+        starts = list(zip(*starts))
+        ret = {}
+        for var, (vtype, offset, n) in entries.items():
+            k = bisect(starts[vtype-1], offset) - 1
+            ret[var] = (vtype, k, offset - starts[vtype-1][k] + 1, n)
+        return ret, blocks
+
+
+    def _encode(self, value):
+        """Return a pair: KF type (1 for int, 2 for float, 3 for string, 4 for bool) and binary representation of *value*."""
+        if isinstance(value, str):
+            return 3, value.encode()
+        r = self.reader
+        arr = np.asarray(value)
+        itype = np.dtype(r.endian + r.word)
+        if arr.dtype.kind == 'b':
+            return 4, arr.astype(itype).tobytes()
+        if arr.dtype.kind in 'iu':
+            info = np.iinfo(itype)
+            if arr.size and (arr.min() < info.min or arr.max() > info.max):
+                raise ValueError('Integer value too large to be stored in {} with {} bytes integers'.format(r.path, itype.itemsize))
+            return 1, arr.astype(itype).tobytes()
+        if arr.dtype.kind == 'f':
+            return 2, arr.astype(r.endian + 'f8').tobytes()
+        raise ValueError('Trying to store improper value in KFFile')
+
+
+    def _block(self, blocks, pb):
+        """Return a modifiable copy of the physical block *pb*, stored in *blocks*."""
+        if pb not in blocks:
+            blocks[pb] = bytearray(self.reader._read_block(pb))
+        return blocks[pb]
+
+
+    def _append(self, blocks, new):
+        """Append a list of *new* blocks at the end of the file, storing them in *blocks*. Return the physical number of the first one."""
+        first = self._nblocks + 1
+        for b in new:
+            self._nblocks += 1
+            blocks[self._nblocks] = b
+        return first
+
+
+    def _pack_record(self, blocks, pb, i, record):
+        """Write superindex *record* as *i*-th record of superindex block *pb*."""
+        name, *rest = record
+        self._rec.pack_into(self._block(blocks, pb), i*self._rec.size, KFWriter._name(name), *rest)
+
+
+    def _add_record(self, blocks, record):
+        """Put a new *record* in the first empty place of the superindex. If the superindex is full, a new superindex block is appended to the file."""
+        if not self._free:
+            last = self._supers[-1]
+            block = bytearray(self.reader._blocksize)
+            pb = self._append(blocks, [block])
+            KFWriter._new_superindex(block, self._rec, pb)
+            name, *rest = self._rec.unpack_from(self._block(blocks, last), 0)
+            self._rec.pack_into(self._block(blocks, last), 0, name, *(rest[:3] + [pb]))
+            self._supers.append(pb)
+            self._free = [(pb, i) for i in reversed(range(2, len(block) // self._rec.size))]
+        pb, i = self._free.pop()
+        self._pack_record(blocks, pb, i, record)
+        self._records[pb, i] = record
+
+
+    def _write_index(self, section, entries, blocks, superblocks):
+        """Put index records of *entries* of *section* in index blocks of that section, reusing records of overwritten variables and empty records. New index blocks are appended when needed."""
+        r = self.reader
+        header, indexblocks, slots, free = self._section_index(section)
+        new = []
+        for var in entries:
+            if var not in slots:
+                if not free:
+                    new.append(var)
+                    continue
+                slots[var] = free.pop()
+            pb, i = slots[var]
+            self._block(blocks, pb)[self._head.size + i*self._irec.size : self._head.size + (i+1)*self._irec.size] = self._index_record(var, entries[var])
+
+        if new:
+            if header is None:
+                header = self._head.pack(KFWriter._name(section), 0, 0, 0, 0, 0, 0, 0)
+                self._indices[section][0] = header
+            nrec = (r._blocksize - self._head.size) // self._irec.size
+            empty = self._irec.pack(KFWriter._name('EMPTY'), 0, 0, 0, 0, 0, 0)
+            newblocks = []
+            for k in range(0, len(new), nrec):
+                chunk = [self._index_record(var, entries[var]) for var in new[k:k+nrec]]
+                newblocks.append((bytes(header) + b''.join(chunk) + empty*(nrec-len(chunk))).ljust(r._blocksize, b'\0'))
+            pb = self._append(blocks, newblocks)
+            self._add_record(superblocks, (section, pb, len(indexblocks)+1, len(newblocks), 3))
+            for k, var in enumerate(new):
+                slots[var] = (pb + k//nrec, k % nrec)
+            last = len(new) % nrec
+            if last:
+                free[:0] = [(pb+len(newblocks)-1, i) for i in reversed(range(last, nrec))]
+            indexblocks += range(pb, pb+len(newblocks))
+
+
+    def _index_record(self, var, entry):
+        """Return an index record for variable *var* described by *entry*, a tuple *(type, logical block, start, length)*."""
+        vtype, vlb, vstart, vlen = entry
+        return self._irec.pack(KFWriter._name(var), vlb, vstart, vlen, vlen, vlen, vtype)
+
+
+    def _flush(self, *blocks):
+        """Write blocks to the file. Each element of *blocks* is a dictionary mapping physical block numbers to their contents. Dictionaries are written in the given order, so that the superindex can be updated only after the data it refers to is in place."""
+        r = self.reader
+        KFReader._unmap(r.path)
+        with open(r.path, 'r+b') as f:
+            for b in blocks:
+                for pb in sorted(b):
+                    f.seek((pb-1) * r._blocksize)
+                    f.write(b[pb])
+        st = os.stat(r.path)
+        self._stamp = (st.st_size, st.st_mtime_ns)
+
+
+
 
 #===========================================================================
 #===========================================================================
@@ -226,7 +657,7 @@ class KFReader(object):
 class KFFile(object):
     """A class for reading and writing binary files in KF format.
 
-    This class acts as a wrapper around |KFReader| collecting all the data written by user in some "temporary zone" and using Fortran binaries ``udmpkf`` and ``cpkf`` to write this data to the physical file when needed.
+    This class acts as a wrapper around |KFReader| and |KFWriter| collecting all the data written by user in some "temporary zone" and writing this data to the physical file when needed.
 
     The constructor argument *path* should be a string with a path to an existing KF file or a new KF file that you wish to create. If a path to existing file is passed, new |KFReader| instance is created allowing to read all the data from this file.
 
@@ -234,7 +665,12 @@ class KFFile(object):
 
     Other methods like :meth:`~KFFile.read` or :meth:`~KFFile.delete_section` are aware of ``tmpdata`` and work flawlessly, regardless if :meth:`~KFFile.save` was called or not.
 
-    By default, :meth:`~KFFile.save` is automatically invoked after each :meth:`~KFFile.write`, so physical file on a disk is always "actual". This behavior can be adjusted with *autosave* constructor parameter. Having autosave enabled is usually a good idea, however, if you need to write a lot of small pieces of data to your file, the overhead of calling ``udmpkf`` and ``cpkf`` after *every* :meth:`~KFFile.write` can lead to significant delays. In such a case it is advised to disable autosave and call :meth:`~KFFile.save` manually, when needed.
+    By default, :meth:`~KFFile.save` is automatically invoked after each :meth:`~KFFile.write`, so physical file on a disk is always "actual". This behavior can be adjusted with *autosave* constructor parameter. Having autosave enabled is usually a good idea, however, if you need to write a lot of small pieces of data to your file, it is more efficient to disable autosave and call :meth:`~KFFile.save` manually, when needed, or to use :meth:`~KFFile.write_section` to write many variables at once.
+
+    By default the data is written using Fortran binaries ``udmpkf`` and ``cpkf`` from ADFSuite. If *native* is ``True``, |KFWriter| is used instead: the data is written on Python level, which is much faster and does not require ADFSuite. Files written that way are read back correctly by |KFReader|, but they have not been validated against ADFSuite's own KF library yet, so do not use native writing for files that are later processed by ADFSuite programs.
+
+    .. note::
+        |KFWriter| never reuses space in the file. Every :meth:`save` that writes anything appends at least one new data block (4 kB for files created by PLAMS) and overwritten values stay in the file, unreferenced. With native writing and *autosave* enabled, writing many small variables one by one makes the file grow by at least 4 kB per :meth:`write`. Use :meth:`write_section` or disable *autosave* to limit that.
 
     Dictionary-like bracket notation can be used as a shortcut to read and write variables::
 
@@ -256,11 +692,13 @@ class KFFile(object):
              bool : (4, 80, lambda x: 'T' if x else 'F')}
 
 
-    def __init__(self, path, autosave=True):
+    def __init__(self, path, autosave=True, native=False):
         self.autosave = autosave
+        self.native = native
         self.path = os.path.abspath(path)
         self.tmpdata = OrderedDict()
         self.reader = KFReader(self.path) if os.path.isfile(self.path) else None
+        self._kfwriter = None
 
 
     def read(self, section, variable):
@@ -269,13 +707,55 @@ class KFFile(object):
         For single-value numerical or boolean variables returned value is a single number or bool. For longer variables this method returns a list of values. For string variables a single string is returned.
         """
         if section in self.tmpdata and variable in self.tmpdata[section]:
-            return self.tmpdata[section][variable]
+            val = self.tmpdata[section][variable]
+            if isinstance(val, np.ndarray):
+                val = val.ravel().tolist()
+                return val[0] if len(val) == 1 else val
+            return val
         return self.reader.read(section, variable)
 
 
+    def read_array(self, section, variable):
+        """Extract and return data for a *variable* located in a *section* as a NumPy array. See :meth:`KFReader.read_array` for details."""
+        if section in self.tmpdata and variable in self.tmpdata[section]:
+            val = self.tmpdata[section][variable]
+            return val if isinstance(val, str) else np.ravel(np.array(val))
+        return self.reader.read_array(section, variable)
+
+
     def write(self, section, variable, value):
-        """Write a *variable* with a *value* in a *section* . If such a variable already exists in this section, the old value is overwritten."""
-        if not isinstance(value, (int,bool,float,str,list)):
+        """Write a *variable* with a *value* in a *section* . If such a variable already exists in this section, the old value is overwritten.
+
+        *value* can be a single int, float, bool or string, a non-empty list of ints, floats or bools, or a non-empty NumPy array of such numbers (multidimensional arrays are flattened).
+        """
+        self._store(section, variable, value)
+        if self.autosave:
+            self.save()
+
+
+    def write_section(self, section, values):
+        """Write all variables from *values* (a dictionary mapping variable names to values) in a *section*. Values have to follow the rules described in :meth:`write`.
+
+        Regardless of *autosave*, the file is saved at most once, after all the variables are stored.
+        """
+        for variable, value in values.items():
+            self._store(section, variable, value)
+        if self.autosave:
+            self.save()
+
+
+    def _store(self, section, variable, value):
+        """Check if *value* can be stored in a KF file and put it in ``tmpdata``."""
+        if len(section.encode()) > 32 or len(variable.encode()) > 32:
+            raise ValueError('Names of sections and variables in KFFile cannot be longer than 32 characters')
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, np.ndarray):
+            if value.dtype.kind not in 'biuf':
+                raise ValueError('Only arrays of int, float or bool can be stored in KFFile')
+            if value.size == 0:
+                raise ValueError('Cannot store empty arrays in KFFile')
+        elif not isinstance(value, (int,bool,float,str,list)):
             raise ValueError('Trying to store improper value in KFFile')
         if isinstance(value, list):
             if len(value) == 0:
@@ -289,28 +769,46 @@ class KFFile(object):
             self.tmpdata[section] = OrderedDict()
         self.tmpdata[section][variable] = value
 
-        if self.autosave:
-            self.save()
-
 
     def save(self):
         """Save all changes stored in ``tmpdata`` to physical file on a disk."""
         if len(self.tmpdata) > 0 and any(len(i) > 0 for i in self.tmpdata.values()):
-            txt = ''
-            newvars = []
-            for section in self.tmpdata:
-                for variable in self.tmpdata[section]:
-                    val = self.tmpdata[section][variable]
-                    txt += '{}\n{}\n{}\n'.format(section, variable, KFFile._str(val))
-                    newvars.append(section+'%'+variable)
-            self.tmpdata = OrderedDict()
-
-            tmpfile = self.path+'.tmp' if self.reader else self.path
-            saferun(['udmpkf', tmpfile], input=txt.encode(), stdout=DEVNULL, stderr=DEVNULL)
-            if self.reader:
-                saferun(['cpkf', tmpfile, self.path] + newvars, stdout=DEVNULL, stderr=DEVNULL)
-                os.remove(tmpfile)
+            data, self.tmpdata = self.tmpdata, OrderedDict()
+            if self.native:
+                self._writer(create=True).write(data)
+            else:
+                self._save_external(data)
+
+
+    def _writer(self, create=False):
+        """Return a |KFWriter| for this file. If the file does not exist yet and *create* is ``True``, a new, empty KF file is created."""
+        if self.reader is None and create:
+            KFWriter.create(self.path)
             self.reader = KFReader(self.path)
+        if self._kfwriter is None or self._kfwriter.reader is not self.reader:
+            self._kfwriter = KFWriter(self.reader)
+        return self._kfwriter
+
+
+    def _save_external(self, data):
+        """Save *data* using ``udmpkf`` and ``cpkf``."""
+        txt = ''
+        newvars = []
+        for section in data:
+            for variable in data[section]:
+                val = data[section][variable]
+                if isinstance(val, np.ndarray):
+                    val = val.ravel().tolist()
+                txt += '{}\n{}\n{}\n'.format(section, variable, KFFile._str(val))
+                newvars.append(section+'%'+variable)
+
+        tmpfile = self.path+'.tmp' if self.reader else self.path
+        KFReader._unmap(os.path.abspath(self.path))   #cpkf rewrites the file in place
+        saferun(['udmpkf', tmpfile], input=txt.encode(), stdout=DEVNULL, stderr=DEVNULL)
+        if self.reader:
+            saferun(['cpkf', tmpfile, self.path] + newvars, stdout=DEVNULL, stderr=DEVNULL)
+            os.remove(tmpfile)
+        self.reader = KFReader(self.path)
 
 
     def delete_section(self, section):
@@ -321,10 +819,14 @@ class KFFile(object):
             if not self.reader._sections:
                 self.reader._create_index()
             if section in self.reader._sections:
-                tmpfile = self.path+'.tmp'
-                saferun(['cpkf', self.path, tmpfile, '-rm', section], stdout=DEVNULL, stderr=DEVNULL)
-                shutil.move(tmpfile, self.path)
-                self.reader = KFReader(self.path)
+                if self.native:
+                    self._writer().delete_section(section)
+                else:
+                    tmpfile = self.path+'.tmp'
+                    KFReader._unmap(os.path.abspath(self.path))
+                    saferun(['cpkf', self.path, tmpfile, '-rm', section], stdout=DEVNULL, stderr=DEVNULL)
+                    shutil.move(tmpfile, self.path)
+                    self.reader = KFReader(self.path)
 
 
     def sections(self):
@@ -368,6 +870,17 @@ class KFFile(object):
         self.write(section, variable, value)
 
 
+    def __contains__(self, name):
+        """Allow to use ``('section','variable') in mykf`` or ``'section%variable' in mykf`` to check if a variable is present, without iterating over all variables."""
+        try:
+            section, variable = KFFile._split(name)
+        except ValueError:
+            return False
+        if section in self.tmpdata and variable in self.tmpdata[section]:
+            return True
+        return self.reader is not None and (section, variable) in self.reader
+
+
     def __iter__(self):
         """Iteration yields pairs of section name and variable name."""
         ret = set()
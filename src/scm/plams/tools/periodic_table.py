@@ -1,3 +1,5 @@
+import numpy as np
+
 from ..core.errors import PTError
 
 __all__ = ['PeriodicTable', 'PT']
@@ -11,6 +13,8 @@ class PeriodicTable(object):
 
     Atomic radius and number of connectors are used by :meth:`~scm.plams.core.basemol.Molecule.guess_bonds`. Note that values or radii are neither atomic radii nor covalent radii. They are someway "emprically optimized" for bond guessing algorithm.
 
+    Masses, radii and numbers of connectors of all elements are also available as numpy arrays indexed by atomic number: ``mass_array``, ``radius_array`` and ``connectors_array``. They are meant for vectorized operations on many atoms at once, see :meth:`masses`, :meth:`radii` and :meth:`connectors`. These arrays are built from ``data``, so if ``data`` is modified, :meth:`update_arrays` has to be called.
+
     .. note::
 
         This class is visible in the main namespace as both ``PeriodicTable`` and ``PT``.
@@ -139,6 +143,11 @@ class PeriodicTable(object):
     data[118] = ['Og', 294.00000, 2.00 ,  8]
 
     symtonum = {d[0]:i for i,d in enumerate(data)}
+    _symcache = dict(symtonum)
+
+    mass_array = np.array([d[1] for d in data], dtype=float)
+    radius_array = np.array([d[2] for d in data], dtype=float)
+    connectors_array = np.array([d[3] for d in data], dtype=int)
 
 
     def __init__(self):
@@ -148,10 +157,15 @@ class PeriodicTable(object):
     @classmethod
     def get_atomic_number(cls, symbol):
         """Convert atomic symbol to atomic number."""
+        try:
+            return cls._symcache[symbol]
+        except KeyError:
+            pass
         try:
             number = cls.symtonum[symbol.capitalize()]
         except KeyError:
             raise PTError('trying to convert incorrect atomic symbol')
+        cls._symcache[symbol] = number
         return number
 
 
@@ -183,17 +197,52 @@ class PeriodicTable(object):
         return cls._get_property(arg, 3)
 
 
+    @classmethod
+    def masses(cls, atnums):
+        """Return a numpy array with atomic masses of elements with atomic numbers *atnums* (any sequence of integers or an integer numpy array)."""
+        return cls._get_array(cls.mass_array, atnums)
+
+
+    @classmethod
+    def radii(cls, atnums):
+        """Return a numpy array with radii of elements with atomic numbers *atnums* (any sequence of integers or an integer numpy array)."""
+        return cls._get_array(cls.radius_array, atnums)
+
+
+    @classmethod
+    def connectors(cls, atnums):
+        """Return a numpy array with numbers of connectors of elements with atomic numbers *atnums* (any sequence of integers or an integer numpy array)."""
+        return cls._get_array(cls.connectors_array, atnums)
+
+
+    @classmethod
+    def update_arrays(cls):
+        """Rebuild ``mass_array``, ``radius_array`` and ``connectors_array`` from ``data``. Call this method after modifying ``data``."""
+        cls.mass_array = np.array([d[1] for d in cls.data], dtype=float)
+        cls.radius_array = np.array([d[2] for d in cls.data], dtype=float)
+        cls.connectors_array = np.array([d[3] for d in cls.data], dtype=int)
+        cls.symtonum = {d[0]:i for i,d in enumerate(cls.data)}
+        cls._symcache = dict(cls.symtonum)
+
+
+    @classmethod
+    def _get_array(cls, array, atnums):
+        """Index *array* with *atnums*. Skeleton method for :meth:`masses`, :meth:`radii` and :meth:`connectors`."""
+        atnums = np.asarray(atnums, dtype=int)
+        if atnums.size and (atnums.min() < 0 or atnums.max() >= len(array)):
+            raise PTError('trying to convert incorrect atomic number')
+        return array[atnums]
+
+
     @classmethod
     def _get_property(cls, arg, prop):
         """Get property of element described by either symbol or atomic number. Skeleton method for :meth`get_radius`, :meth`get_mass` and  :meth`get_connectors`."""
         if isinstance(arg, str):
-            pr = cls.data[cls.get_atomic_number(arg)][prop]
-        elif isinstance(arg, int):
-            try:
-                pr = cls.data[arg][prop]
-            except KeyError:
-                raise PTError('trying to convert incorrect atomic number')
-        return pr
+            arg = cls.get_atomic_number(arg)
+        try:
+            return cls.data[arg][prop]
+        except (IndexError, TypeError):
+            raise PTError('trying to convert incorrect atomic number')
 
 
 
@@ -1,4 +1,4 @@
-import collections
+import collections.abc
 import math
 import numpy as np
 
@@ -115,30 +115,57 @@ class Units(object):
     dicts['reciprocal distance'] = rec_distance
 
 
+    _table = None
+    _ratios = {}
+
+
     def __init__(self):
         raise UnitsError('Instances of Units cannot be created')
 
 
+    @classmethod
+    def _lookup(cls):
+        """Return a dictionary mapping lowercase unit names to ``{quantity: unit}`` dictionaries, as returned by :meth:`find_unit`.
+
+        The dictionary is built once, on the first use, together with an empty cache of conversion ratios. If units are added to :attr:`dicts` after that, :meth:`clear_cache` has to be called.
+        """
+        if cls._table is None:
+            table = {}
+            for quantity in cls.dicts:
+                for k in cls.dicts[quantity]:
+                    table.setdefault(k.lower(), {})[quantity] = k
+            cls._table = table
+            cls._ratios = {}
+        return cls._table
+
+
+    @classmethod
+    def clear_cache(cls):
+        """Forget the unit lookup table and all cached conversion ratios. Call this method after adding or changing units in :attr:`dicts`."""
+        cls._table = None
+        cls._ratios = {}
+
+
     @classmethod
     def find_unit(cls, unit):
-        ret = {}
-        for quantity in cls.dicts:
-            for k in cls.dicts[quantity]:
-                if k.lower() == unit.lower():
-                    ret[quantity] = k
-        return ret
+        return dict(cls._lookup().get(unit.lower(), {}))
 
 
     @classmethod
     def conversion_ratio(cls, inp, out):
         """Return conversion ratio from unit *inp* to *out*."""
+        try:
+            return cls._ratios[inp, out]
+        except KeyError:
+            pass
         inps = cls.find_unit(inp)
         outs = cls.find_unit(out)
         common = set(inps.keys()) & set(outs.keys())
         if len(common) > 0:
             quantity = common.pop()
             d = cls.dicts[quantity]
-            return d[outs[quantity]]/d[inps[quantity]]
+            ret = cls._ratios[inp, out] = d[outs[quantity]]/d[inps[quantity]]
+            return ret
         else:
             if len(inps) == 0 and len(outs) == 0:
                 raise UnitsError("Unsupported units: '{}' and '{}'".format(inp, out))
@@ -159,17 +186,26 @@ class Units(object):
     def convert(cls, value, inp, out):
         """Convert *value* from unit *inp* to *out*.
 
-        *value* can be a single number or a container (list, tuple, numpy.array etc.). In the latter case a container of the same type and length is returned. Conversion happens recursively, so this method can be used to convert, for example, a list of lists of numbers, or any other hierarchical container structure. Conversion is applied on all levels, to all values that are numbers (also numpy number types). All other values (strings, bools etc.) remain unchanged.
+        *value* can be a single number or a container (list, tuple, numpy.array etc.). In the latter case a container of the same type and length is returned. Conversion happens recursively, so this method can be used to convert, for example, a list of lists of numbers, or any other hierarchical container structure. Conversion is applied on all levels, to all values that are numbers (also numpy number types). All other values (strings, bools etc.) remain unchanged. Numerical numpy arrays are multiplied by the conversion ratio as a whole, without iterating over their elements.
+
+        The conversion ratio is looked up only when there is a number to convert, so values without any numbers (like empty containers) are returned even if *inp* and *out* are not valid units.
         """
         if value is None or isinstance(value, (bool, str)):
             return value
-        if isinstance(value, collections.Iterable):
-            t = type(value)
-            if t == np.ndarray:
-                t = np.array
-            v = [cls.convert(i, inp, out) for i in value]
-            return t(v)
+        return cls._convert(value, inp, out)
+
+
+    @classmethod
+    def _convert(cls, value, inp, out):
+        """Multiply all numbers in *value* by the conversion ratio from *inp* to *out*, following the rules described in :meth:`convert`."""
+        if value is None or isinstance(value, (bool, str)):
+            return value
+        if isinstance(value, np.ndarray):
+            if value.dtype.kind in 'iufc':
+                return value * cls.conversion_ratio(inp, out) if value.size else value.copy()
+            return np.array([cls._convert(i, inp, out) for i in value])
+        if isinstance(value, collections.abc.Iterable):
+            return type(value)([cls._convert(i, inp, out) for i in value])
         if isinstance(value, (int, float, np.generic)):
-            return value * cls.conversion_ratio(inp,out)
+            return value * cls.conversion_ratio(inp, out)
         return value
-
@@ -0,0 +1,54 @@
+"""Memory and time needed to create, copy and pickle a big |Molecule|.
+
+The molecule is a cubic box of water molecules with all O-H bonds. Run from the root of the repository::
+
+    PYTHONPATH=src python tests/benchmarks/bench_molecule.py [number of water molecules]
+
+To compare two versions of PLAMS, run the script with the same argument in both trees.
+"""
+
+import copy
+import pickle
+import sys
+import time
+import tracemalloc
+
+from scm.plams.core.basemol import Atom, Bond, Molecule
+
+
+def water_box(n):
+    side = int(round(n ** (1/3))) + 1
+    mol = Molecule()
+    for i in range(n):
+        x, y, z = 3.0 * (i % side), 3.0 * (i // side % side), 3.0 * (i // side // side)
+        o = Atom(symbol='O', coords=(x, y, z))
+        h1 = Atom(symbol='H', coords=(x + 0.76, y + 0.59, z))
+        h2 = Atom(symbol='H', coords=(x - 0.76, y + 0.59, z))
+        for at in (o, h1, h2):
+            mol.add_atom(at)
+        mol.add_bond(Bond(o, h1))
+        mol.add_bond(Bond(o, h2))
+    return mol
+
+
+def measure(label, func):
+    tracemalloc.start()
+    t = time.perf_counter()
+    ret = func()
+    t = time.perf_counter() - t
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print('{:<16}{:>10.2f} s{:>12.1f} MB{:>12.1f} MB'.format(label, t, current / 2**20, peak / 2**20))
+    return ret
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    print('{} atoms, {} bonds'.format(3*n, 2*n))
+    print('{:<16}{:>12}{:>15}{:>15}'.format('', 'time', 'retained', 'peak'))
+    mol = measure('create', lambda: water_box(n))
+    measure('Molecule.copy', mol.copy)
+    measure('deepcopy', lambda: copy.deepcopy(mol))
+    data = measure('pickle.dumps', lambda: pickle.dumps(mol))
+    measure('pickle.loads', lambda: pickle.loads(data))
+    print('pickle size: {:.1f} MB'.format(len(data) / 2**20))
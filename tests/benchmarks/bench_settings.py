@@ -0,0 +1,63 @@
+"""Time spent in |Settings| operations performed for every job of a big campaign.
+
+Every job copies its settings, soft-updates them with ``config.job`` from ``plams_defaults`` and looks up keys in the result. A numerical gradient job additionally copies ``settings.child`` for each of its children. Run from the root of the repository::
+
+    PYTHONPATH=src python tests/benchmarks/bench_settings.py [number of jobs]
+
+To compare two versions of PLAMS, run the script with the same argument in both trees.
+"""
+
+import os
+import sys
+import timeit
+
+import scm.plams.core.functions
+from scm.plams.core.settings import Settings
+
+
+def load_defaults():
+    path = os.path.join(os.path.dirname(os.path.dirname(scm.plams.core.functions.__file__)), 'plams_defaults')
+    cfg = Settings()
+    with open(path) as f:
+        exec(compile(f.read(), path, 'exec'), {'__name__': 'scm.plams.core.functions', '__package__': 'scm.plams.core', 'config': cfg})
+    return cfg
+
+
+def job_settings():
+    s = Settings()
+    s.input.basis.type = 'TZ2P'
+    s.input.basis.core = 'None'
+    s.input.xc.gga = 'PBE'
+    s.input.xc.dispersion = 'Grimme3 BJDAMP'
+    s.input.numericalquality = 'Good'
+    s.input.scf.iterations = 300
+    s.input.scf.converge = 1e-8
+    s.input.geometry.optim = 'delocal'
+    s.input.geometry.iterations = 100
+    s.input.relativity.level = 'scalar'
+    s.input.symmetry = 'nosym'
+    s.runscript.nproc = 16
+    s.runscript.pre = 'module load adf'
+    s.child = s.input.copy()
+    return s
+
+
+def one_job(settings, defaults):
+    s = settings.copy()
+    s.soft_update(defaults)
+    s.input.find_case('XC')
+    return s.runscript.shebang, s.input.basis.type, s.pickle
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    defaults = load_defaults().job
+    settings = job_settings()
+    for label, stmt in [
+        ('copy', lambda: settings.copy()),
+        ('soft_update', lambda: settings.copy().soft_update(defaults)),
+        ('child copy', lambda: settings.child.copy()),
+        ('whole job', lambda: one_job(settings, defaults)),
+    ]:
+        t = min(timeit.repeat(stmt, number=n, repeat=5))
+        print('{:<14}{:>10.1f} us per job{:>10.3f} s for {} jobs'.format(label, 1e6 * t / n, t, n))
@@ -0,0 +1,32 @@
+import builtins
+import os
+
+import pytest
+
+import scm.plams.core.functions
+from scm.plams.core.jobmanager import JobManager
+from scm.plams.core.settings import Settings
+
+
+DEFAULTS = os.path.join(os.path.dirname(os.path.dirname(scm.plams.core.functions.__file__)), 'plams_defaults')
+
+
+@pytest.fixture
+def plams_config(monkeypatch, tmp_path):
+    """Global ``config`` populated from ``plams_defaults``, like after ``init()``, but without a |JobManager| and with logging to stdout disabled."""
+    cfg = Settings()
+    monkeypatch.setattr(builtins, 'config', cfg, raising=False)
+    with open(DEFAULTS) as f:
+        code = compile(f.read(), DEFAULTS, 'exec')
+    exec(code, {'__name__': 'scm.plams.core.functions', '__package__': 'scm.plams.core', 'config': cfg})
+    cfg.log.stdout = 0
+    cfg.log.file = 0
+    return cfg
+
+
+@pytest.fixture
+def jobmanager(plams_config, tmp_path):
+    """|JobManager| with its main folder in *tmp_path*. Hashing is disabled, so identical test jobs are all executed instead of being copied."""
+    plams_config.sleepstep = 0.05
+    plams_config.jobmanager.hashing = None
+    return JobManager(plams_config.jobmanager, path=str(tmp_path))
@@ -0,0 +1,35 @@
+import threading
+import time
+
+from scm.plams.core.basejob import MultiJob, SingleJob
+from scm.plams.core.jobrunner import JobRunner
+
+
+class EmptyJob(SingleJob):
+    def get_input(self):
+        return ''
+
+    def get_runscript(self):
+        return 'true\n'
+
+    def check(self):
+        return True
+
+
+def tree(depth):
+    if depth == 0:
+        return EmptyJob(name='leaf')
+    return MultiJob(name='multi', children=[tree(depth - 1) for _ in range(2)])
+
+
+def test_nested_multijob_finishes_without_polling(plams_config, jobmanager):
+    plams_config.sleepstep = 5
+    job = tree(3)
+    start = time.time()
+    t = threading.Thread(target=lambda: job.run(jobrunner=JobRunner(parallel=True), jobmanager=jobmanager).wait(), daemon=True)
+    t.start()
+    t.join(60)
+    assert not t.is_alive(), 'job did not finish'
+    assert job.status == 'successful'
+    assert all(child.status == 'successful' for child in job)
+    assert time.time() - start < plams_config.sleepstep   #each level used to wait at least one sleepstep
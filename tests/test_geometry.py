@@ -0,0 +1,102 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from scm.plams.core.basemol import Atom, Bond, Molecule
+from scm.plams.tools.geometry import neighbor_pairs
+
+
+def brute_force_pairs(xyz, cutoff, lattice=None):
+    """Reference implementation of :func:`neighbor_pairs` comparing every pair of points, with all periodic images up to two cells away."""
+    xyz = np.asarray(xyz, dtype=float)
+    lattice = np.asarray(lattice or np.zeros((0,3)), dtype=float).reshape(-1,3)
+    shifts = np.array([np.dot(shift, lattice) for shift in itertools.product(range(-2,3), repeat=len(lattice))])
+    i, j, d = [], [], []
+    for a in range(len(xyz)):
+        for b in range(a+1, len(xyz)):
+            dist = np.linalg.norm(xyz[b] - xyz[a] + shifts, axis=1).min()
+            if dist < cutoff:
+                i.append(a)
+                j.append(b)
+                d.append(dist)
+    return np.array(i, dtype=int), np.array(j, dtype=int), np.array(d)
+
+
+LATTICES = {
+    'molecule': None,
+    'chain': [[10.0, 0.0, 0.0]],
+    'slab': [[10.0, 0.0, 0.0], [3.0, 9.0, 0.0]],
+    'bulk': [[10.0, 0.0, 0.0], [3.0, 9.0, 0.0], [1.0, 2.0, 11.0]],
+}
+
+
+@pytest.mark.parametrize('lattice', LATTICES.values(), ids=LATTICES.keys())
+@pytest.mark.parametrize('cutoff', [0.5, 2.0, 4.5])
+def test_neighbor_pairs_same_as_brute_force(lattice, cutoff):
+    rng = np.random.default_rng(12345)
+    xyz = rng.uniform(-5.0, 15.0, size=(150,3))   #partially outside the periodic cell
+    i, j, d = neighbor_pairs(xyz, cutoff, lattice)
+    ri, rj, rd = brute_force_pairs(xyz, cutoff, lattice)
+    assert np.array_equal(i, ri)
+    assert np.array_equal(j, rj)
+    assert np.allclose(d, rd)
+
+
+def test_neighbor_pairs_few_points():
+    for xyz in [np.zeros((0,3)), [[0.0, 0.0, 0.0]]]:
+        i, j, d = neighbor_pairs(xyz, 1.0)
+        assert len(i) == len(j) == len(d) == 0
+    i, j, d = neighbor_pairs([[0.0, 0.0, 0.0], [0.0, 0.0, 0.9]], 1.0)
+    assert i.tolist() == [0] and j.tolist() == [1] and np.allclose(d, [0.9])
+
+
+def benzene(shift=(0.0, 0.0, 0.0)):
+    atoms = []
+    for radius, symbol in [(1.39, 'C'), (2.47, 'H')]:
+        for k in range(6):
+            angle = k * np.pi / 3
+            atoms.append(Atom(symbol=symbol, coords=tuple(np.array([radius * np.cos(angle), radius * np.sin(angle), 0.0]) + shift)))
+    return atoms
+
+
+def methanol(shift=(0.0, 0.0, 0.0)):
+    coords = [('C', (0.0, 0.0, 0.0)), ('O', (1.43, 0.0, 0.0)), ('H', (1.75, 0.9, 0.0)),
+              ('H', (-0.36, 1.03, 0.0)), ('H', (-0.36, -0.51, 0.89)), ('H', (-0.36, -0.51, -0.89))]
+    return [Atom(symbol=s, coords=tuple(np.array(c) + shift)) for s, c in coords]
+
+
+def bond_set(mol):
+    return {(mol.atoms.index(b.atom1), mol.atoms.index(b.atom2), b.order) for b in mol.bonds}
+
+
+def build(atoms, lattice=None):
+    mol = Molecule()
+    for at in atoms:
+        mol.add_atom(at)
+    mol.lattice = lattice or []
+    return mol
+
+
+def test_guess_bonds_same_as_brute_force(monkeypatch):
+    atoms = benzene() + methanol((6.0, 0.0, 0.0)) + benzene((0.0, 6.0, 0.5)) + methanol((6.0, 6.0, -0.5))
+    mol = build(atoms)
+    mol.guess_bonds()
+    assert len(mol.bonds) == 2*12 + 2*5
+    assert sum(b.order == Bond.AR for b in mol.bonds) == 12
+    fast = bond_set(mol)
+
+    monkeypatch.setattr('scm.plams.core.basemol.neighbor_pairs', brute_force_pairs)
+    mol.guess_bonds()
+    assert bond_set(mol) == fast
+
+
+def test_guess_bonds_across_cell_boundary():
+    lattice = [[8.0, 0.0, 0.0], [0.0, 8.0, 0.0], [0.0, 0.0, 8.0]]
+    reference = build(benzene((4.0, 4.0, 4.0)) + methanol((4.0, 4.0, 7.0)))
+    reference.guess_bonds()
+    wrapped = build(benzene() + methanol((0.0, 0.0, 3.0)), lattice)   #both molecules cut by the boundary of the cell
+    for at in wrapped:
+        at.coords = tuple(np.mod(at.coords, 8.0))
+    wrapped.guess_bonds()
+    assert bond_set(wrapped) == bond_set(reference)
@@ -0,0 +1,109 @@
+import os
+import stat
+import threading
+
+import pytest
+
+from scm.plams.core.jobrunner import GridRunner
+
+
+def fake_command(bindir, name, body):
+    path = bindir / name
+    path.write_text('#!/bin/sh\n' + body)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+
+
+@pytest.fixture
+def bindir(tmp_path, monkeypatch):
+    """A folder with fake scheduler commands, put in front of ``PATH``. Every command keeps track of how many times it was called in ``[command].calls``."""
+    d = tmp_path / 'bin'
+    d.mkdir()
+    monkeypatch.setenv('PATH', str(d) + os.pathsep + os.environ['PATH'])
+    return d
+
+
+def counter(bindir, name):
+    """Shell snippet incrementing the call counter of *name* and storing its value in ``$n``."""
+    f = bindir / (name + '.calls')
+    return 'n=$(($(cat {0} 2>/dev/null || echo 0) + 1)); echo $n > {0}\n'.format(f)
+
+
+def run_call(runner, tmp_path):
+    """Call *runner* for a dummy runscript in a separate thread and return the exit code (or fail if it takes too long)."""
+    ret = []
+    t = threading.Thread(target=lambda: ret.append(runner.call('job.run', str(tmp_path), None, 'job.err', {})), daemon=True)
+    t.start()
+    t.join(20)
+    assert ret, 'GridRunner.call did not return'
+    return ret[0]
+
+
+QSTAT_LIST = '''
+torque01:
+                                                                                  Req'd       Req'd       Elap
+Job ID                  Username    Queue    Jobname          SessID  NDS   TSK   Memory      Time    S   Time
+----------------------- ----------- -------- ---------------- ------ ----- ------ --------- --------- - ---------
+1234.torque01           user        batch    job.run           12345     1      1       --   01:00:00 {} 00:00:01
+'''
+
+QSTAT_FULL = '''Job Id: 1234.torque01
+    Job_Name = job.run
+    job_state = C
+    exit_status = 3
+'''
+
+
+def test_pbs_exit_code(plams_config, bindir, tmp_path):
+    (bindir / 'list1').write_text(QSTAT_LIST.format('R'))
+    (bindir / 'list2').write_text(QSTAT_LIST.format('C'))
+    (bindir / 'full').write_text(QSTAT_FULL)
+    fake_command(bindir, 'qsub', 'echo 1234.torque01\n')
+    fake_command(bindir, 'qstat', counter(bindir, 'qstat') +
+        'case "$*" in *-f*) cat {0}/full;; *) if [ $n -eq 1 ]; then cat {0}/list1; else cat {0}/list2; fi;; esac\n'.format(bindir))
+
+    runner = GridRunner(grid='pbs', sleepstep=0.05)
+    assert run_call(runner, tmp_path) == 3
+    assert int((bindir / 'qstat.calls').read_text()) == 3   #two listings and one accounting
+
+
+def test_slurm_exit_code(plams_config, bindir, tmp_path):
+    fake_command(bindir, 'sbatch', 'echo Submitted batch job 42\n')
+    fake_command(bindir, 'squeue', counter(bindir, 'squeue') + 'if [ $n -eq 1 ]; then echo 42; fi\n')
+    fake_command(bindir, 'sacct', counter(bindir, 'sacct') + 'echo "42|FAILED|7:0"\n')
+
+    runner = GridRunner(grid='slurm', sleepstep=0.05)
+    assert run_call(runner, tmp_path) == 7
+    assert int((bindir / 'sacct.calls').read_text()) == 1
+
+
+def test_unknown_exit_code(plams_config, bindir, tmp_path):
+    fake_command(bindir, 'sbatch', 'echo Submitted batch job 43\n')
+    fake_command(bindir, 'squeue', 'true\n')
+    fake_command(bindir, 'sacct', 'true\n')
+
+    runner = GridRunner(grid='slurm', sleepstep=0.05)
+    assert run_call(runner, tmp_path) == 0
+
+
+def test_array_submit_failure(plams_config, bindir, tmp_path):
+    fake_command(bindir, 'sbatch', 'echo Submitted batch job 44\n')
+    fake_command(bindir, 'squeue', 'true\n')
+    fake_command(bindir, 'sacct', 'true\n')
+    def arraytaskid(jobid, index):
+        raise ValueError('broken arraytaskid')
+    plams_config.gridrunner.slurm.commands.arraytaskid = arraytaskid
+
+    runner = GridRunner(grid='slurm', sleepstep=0.05, arraywindow=0.5)
+    ret = {}
+    def call(i):
+        try:
+            ret[i] = runner.call('job{}.run'.format(i), str(tmp_path), None, 'job{}.err'.format(i), {})
+        except ValueError:
+            ret[i] = 'raised'
+    threads = [threading.Thread(target=call, args=(i,), daemon=True) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(20)
+    assert sorted(ret.values(), key=str) == [1, 1, 'raised']
+    assert not list(tmp_path.glob('*.array'))
@@ -0,0 +1,58 @@
+import builtins
+
+import pytest
+
+from scm.plams.core.basemol import Atom, Molecule
+from scm.plams.core.settings import Settings
+from scm.plams.interfaces.adfsuite.adf import ADFJob
+from scm.plams.interfaces.adfsuite.densf import DensfJob
+from scm.plams.interfaces.adfsuite.fcf import FCFJob
+
+
+@pytest.fixture(autouse=True)
+def config(monkeypatch):
+    cfg = Settings()
+    cfg.job.pickle = True
+    cfg.job.keep = 'all'
+    cfg.job.save = 'all'
+    cfg.job.runscript.shebang = '#!/bin/sh'
+    cfg.job.runscript.stdout_redirect = False
+    cfg.job.link_files = True
+    cfg.jobmanager.hashing = 'structural'
+    monkeypatch.setattr(builtins, 'config', cfg, raising=False)
+    return cfg
+
+
+def densf_settings():
+    s = Settings()
+    s.input.grid = 'medium'
+    s.input.density = 'scf'
+    return s
+
+
+def test_structural_hash_includes_densf_inputjob():
+    j1 = DensfJob(inputjob='/first/job.t21', settings=densf_settings())
+    j2 = DensfJob(inputjob='/second/job.t21', settings=densf_settings())
+    assert j1.hash_input() != j2.hash_input()
+    assert j1.hash_structure() != j2.hash_structure()
+    j3 = DensfJob(inputjob='/first/job.t21', settings=densf_settings())
+    assert j1.hash_structure() == j3.hash_structure()
+
+
+def test_structural_hash_includes_fcf_inputjobs():
+    j1 = FCFJob(inputjob1='/a.t21', inputjob2='/b.t21')
+    j2 = FCFJob(inputjob1='/a.t21', inputjob2='/c.t21')
+    assert j1.hash() != j2.hash()
+
+
+def test_structural_hash_with_parametrized_coordinates():
+    mol = Molecule()
+    mol.add_atom(Atom(symbol='H', coords=(0, 0, 0)))
+    mol.add_atom(Atom(symbol='H', coords=(0, 0, 'd1')))
+    s = Settings()
+    s.input.geovar.d1 = 0.74
+    j1 = ADFJob(molecule=mol, settings=s)
+    assert j1.hash() is not None
+    mol[2].coords = (0, 0, 'd2')
+    j2 = ADFJob(molecule=mol, settings=s)
+    assert j1.hash() != j2.hash()
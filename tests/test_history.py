@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from scm.plams.core.errors import ResultsError
+from scm.plams.interfaces.adfsuite.dftb import DFTBJob
+from scm.plams.tools.kftools import KFFile
+
+
+def dftb_results(plams_config, tmp_path, natoms, lattice=True):
+    """Results of a fake DFTB job with a ``History`` section of four entries. *natoms* is a list with the number of atoms in each entry."""
+    rng = np.random.default_rng(7)
+    kf = KFFile(str(tmp_path / 'dftb.rkf'), native=True)
+    kf.write_section('Molecule', {'AtomicNumbers': [6, 1, 1, 1, 1, 8][:natoms[0]], 'Coords': rng.uniform(-3, 3, 3*natoms[0]), 'Charge': 0.0})
+    history = {'nEntries': len(natoms)}
+    for i, n in enumerate(natoms, 1):
+        history['Coords({})'.format(i)] = rng.uniform(-3, 3, 3*n)
+        history['Energy({})'.format(i)] = -1.0 - 0.1*i
+        if lattice:
+            history['LatticeVectors({})'.format(i)] = [20.0 + i, 0.0, 0.0, 0.0, 21.0, 0.0]
+    kf.write_section('History', history)
+
+    job = DFTBJob(name='job')   #dftb.rkf is renamed to job.rkf
+    job.path = str(tmp_path)
+    job.status = 'successful'
+    job.results.collect()
+    return job.results
+
+
+def assert_same_molecules(new, old):
+    assert len(new) == len(old)
+    for m1, m2 in zip(new, old):
+        assert [at.atnum for at in m1] == [at.atnum for at in m2]
+        assert np.allclose(m1.as_array(), m2.as_array(), rtol=1e-12, atol=1e-12)
+        assert np.allclose(m1.lattice, m2.lattice, rtol=1e-12, atol=1e-12) and len(m1.lattice) == len(m2.lattice)
+
+
+@pytest.mark.parametrize('lattice', [True, False])
+def test_history_same_as_per_entry(plams_config, tmp_path, lattice):
+    results = dftb_results(plams_config, tmp_path, [5, 5, 5, 5], lattice)
+    old = results._history_molecules()
+    assert_same_molecules(results.get_history_molecules(), old)
+    lazy = results.get_history_molecules(lazy=True)
+    assert_same_molecules(lazy, old)
+    assert_same_molecules(lazy[1:3], old[1:3])
+
+    arrays = results.get_history_arrays(unit='bohr')
+    assert arrays['coords'].shape == (4, 5, 3)
+    assert np.allclose(arrays['coords'][2].ravel(), results.readkf('History', 'Coords(3)'))
+    assert np.allclose(arrays['energies'], [-1.1, -1.2, -1.3, -1.4])
+    assert ('lattices' in arrays) == lattice
+    if lattice:
+        assert arrays['lattices'].shape == (4, 2, 3)
+
+
+def test_history_with_changing_atom_count(plams_config, tmp_path):
+    results = dftb_results(plams_config, tmp_path, [5, 5, 4, 5])
+    with pytest.raises(ResultsError):
+        results.get_history_arrays()
+    history = results.get_history_molecules(lazy=True)
+    assert_same_molecules(history, results._history_molecules())
+    assert [len(mol) for mol in history] == [5, 5, 4, 5]
@@ -0,0 +1,132 @@
+import os
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from scm.plams.tools.kftools import KFFile, KFReader, KFWriter
+
+
+def sample_data():
+    return {
+        'General': {
+            'title': 'round trip',
+            'natoms': 3,
+            'energy': -1.25e-3,
+            'converged': True,
+            'flags': [True, False, True],
+        },
+        'Geometry': {
+            'xyz': np.linspace(-5.0, 5.0, 3000),          #spans several data blocks
+            'atnums': list(range(1, 1500)),
+            'labels': 'C'*5000,
+        },
+        'Many': {'var%d' % i: i for i in range(300)},    #does not fit in a single index block
+    }
+
+
+def check(read, data):
+    for section, variables in data.items():
+        for variable, value in variables.items():
+            ret = read(section, variable)
+            if isinstance(value, np.ndarray):
+                assert np.array_equal(ret, value.tolist())
+            else:
+                assert ret == value
+                assert type(ret) == type(value)
+
+
+def write_native(path, data, endian='<', word='i'):
+    KFWriter.create(path, endian=endian, word=word)
+    kf = KFFile(path, native=True)
+    for section, variables in data.items():
+        kf.write_section(section, variables)
+    return kf
+
+
+@pytest.mark.parametrize('endian', ['<', '>'])
+@pytest.mark.parametrize('word', ['i', 'q'])
+def test_native_round_trip(tmp_path, endian, word):
+    path = str(tmp_path / 'test.kf')
+    data = sample_data()
+    kf = write_native(path, data, endian, word)
+    check(kf.read, data)
+    check(KFReader(path).read, data)
+    KFReader._index_cache.clear()
+    check(KFReader(path).read, data)
+
+
+def test_native_overwrite_and_delete(tmp_path):
+    path = str(tmp_path / 'test.kf')
+    data = sample_data()
+    kf = write_native(path, data)
+    kf.write('General', 'natoms', 5)
+    kf.write('General', 'title', 'changed')
+    kf.delete_section('Many')
+    data['General']['natoms'] = 5
+    data['General']['title'] = 'changed'
+    del data['Many']
+
+    KFReader._index_cache.clear()
+    reader = KFReader(path)
+    check(reader.read, data)
+    assert ('Many', 'var0') not in reader
+
+
+def test_native_many_sections(tmp_path):
+    path = str(tmp_path / 'test.kf')
+    data = {'Section%d' % i: {'value': float(i)} for i in range(200)}   #does not fit in a single superindex block
+    kf = KFFile(path, native=True)
+    for section, variables in data.items():
+        kf.write_section(section, variables)
+    KFReader._index_cache.clear()
+    check(KFReader(path).read, data)
+
+
+@pytest.mark.skipif(shutil.which('dmpkf') is None or shutil.which('udmpkf') is None, reason='dmpkf and udmpkf from ADFSuite are not available')
+def test_native_file_read_by_adfsuite(tmp_path):
+    path = str(tmp_path / 'native.kf')
+    copy = str(tmp_path / 'copy.kf')
+    data = sample_data()
+    write_native(path, data)
+    dump = subprocess.run(['dmpkf', path], stdout=subprocess.PIPE, check=True).stdout
+    subprocess.run(['udmpkf', copy], input=dump, check=True)
+    check(KFReader(copy).read, data)
+
+
+def mapped(path):
+    return [key for key in KFReader._map_cache if key[0] == os.path.abspath(path)]
+
+
+def test_maps_dropped_before_native_write(tmp_path):
+    path = str(tmp_path / 'test.kf')
+    kf = write_native(path, sample_data())
+    kf.read_array('Geometry', 'xyz')
+    assert mapped(path)
+    kf.write('General', 'natoms', 5)
+    assert not mapped(path)
+    assert KFReader(path).read('General', 'natoms') == 5
+    kf.read_array('Geometry', 'xyz')
+    KFWriter.create(path)
+    assert not mapped(path)
+
+
+def test_maps_dropped_before_external_write(tmp_path, monkeypatch):
+    path = str(tmp_path / 'test.kf')
+    write_native(path, sample_data())
+    kf = KFFile(path)
+    kf.read_array('Geometry', 'xyz')
+    calls = []
+    def saferun(args, **kwargs):
+        calls.append(args[0])
+        assert not mapped(path), '{} called while {} is mapped'.format(args[0], path)
+        if args[0] == 'udmpkf':
+            open(args[1], 'wb').close()
+        elif '-rm' in args:
+            shutil.copy(args[1], args[2])
+    monkeypatch.setattr('scm.plams.tools.kftools.saferun', saferun)
+    kf.write('General', 'natoms', 5)
+    kf.read_array('Geometry', 'xyz')
+    kf.delete_section('Many')
+    assert calls == ['udmpkf', 'cpkf', 'cpkf']
@@ -0,0 +1,114 @@
+import copy
+import pickle
+
+import pytest
+
+from scm.plams.core.basemol import Atom, Bond, Molecule
+from scm.plams.core.private import smart_copy
+from scm.plams.core.settings import Settings
+
+
+@pytest.fixture
+def water():
+    mol = Molecule()
+    o = Atom(symbol='O', coords=(0.0, 0.0, 0.0))
+    h1 = Atom(symbol='H', coords=(0.76, 0.59, 0.0))
+    h2 = Atom(symbol='H', coords=(-0.76, 0.59, 0.0))
+    for at in (o, h1, h2):
+        mol.add_atom(at)
+    mol.add_bond(Bond(o, h1))
+    mol.add_bond(Bond(o, h2))
+    return mol
+
+
+@pytest.mark.parametrize('duplicate', [Molecule.copy, copy.copy, copy.deepcopy, lambda m: pickle.loads(pickle.dumps(m))], ids=['copy', 'copy.copy', 'deepcopy', 'pickle'])
+def test_custom_attributes(water, duplicate):
+    water[1].charge = -0.8
+    water.bonds[0].label = 'OH'
+    water[2].properties.name = 'H1'
+    new = duplicate(water)
+    assert new[1].charge == -0.8
+    assert new.bonds[0].label == 'OH'
+    assert new[2].properties.name == 'H1'
+    assert not hasattr(new[2], 'charge')
+    assert 'charge' not in new[1].properties
+
+
+def describe(mol):
+    """Contents of *mol* as nested Python objects that can be compared with ``==``."""
+    def props(obj):
+        return obj.properties.as_dict() if isinstance(obj.properties, Settings) else obj.properties
+    atoms = [(at.atnum, at.coords, props(at), at.__getstate__().get('charge')) for at in mol]
+    bonds = [(mol.atoms.index(b.atom1), mol.atoms.index(b.atom2), b.order, props(b)) for b in mol.bonds]
+    return atoms, bonds, mol.lattice, mol.properties.as_dict()
+
+
+@pytest.fixture
+def decorated(water):
+    water.lattice = [[10.0, 0.0, 0.0]]
+    water.properties.charge = 0
+    water.properties.tags = ['solvent']
+    water[1].properties.name = 'O'
+    water[1].properties.basis.type = 'DZP'
+    water[1].properties.history = [1, 2]
+    water[2].charge = 0.4
+    water.bonds[1].properties.kind = 'polar'
+    water.add_atom(Atom(symbol='Na', coords=(5.0, 0.0, 0.0)))
+    return water
+
+
+def test_copy_same_as_deepcopy(decorated):
+    new, reference = decorated.copy(), copy.deepcopy(decorated)
+    assert describe(new) == describe(reference) == describe(decorated)
+    for at in new:
+        assert at.mol is new
+        assert all(b in new.bonds for b in at.bonds)
+    for b in new.bonds:
+        assert b.mol is new
+        assert b.atom1 in new.atoms and b.atom2 in new.atoms and b in b.atom1.bonds and b in b.atom2.bonds
+
+
+def test_copy_is_independent(decorated):
+    before = describe(decorated)
+    new = decorated.copy()
+    new[1].properties.basis.type = 'TZ2P'
+    new[1].properties.history.append(3)
+    new[1].translate((1.0, 0.0, 0.0))
+    new.properties.tags.append('ion')
+    new.lattice[0][0] = 20.0
+    new.bonds[0].order = 2
+    new.delete_atom(new[4])
+    assert describe(decorated) == before
+
+
+def test_copy_part(decorated):
+    part = decorated.copy(atoms=[decorated[1], decorated[3], decorated[4]])
+    assert [at.symbol for at in part] == ['O', 'H', 'Na']
+    assert len(part.bonds) == 1
+    assert {part.bonds[0].atom1, part.bonds[0].atom2} == {part[1], part[2]}
+    assert part.bonds[0].properties.kind == 'polar'
+
+
+class Container(object):
+    created = 0
+
+    def __init__(self):
+        Container.created += 1
+        self.name = 'container'
+        self.coords = (1.0, 2.0)
+        self.data = {'a': [1, 2]}
+        self.settings = Settings({'x': {'y': 1}})
+        self.skipped = [0]
+
+
+def test_smart_copy_same_as_deepcopy():
+    obj = Container()
+    created = Container.created
+    new = smart_copy(obj, owncopy=['settings'], without=['skipped'])
+    assert Container.created == created   #the constructor is not called
+    reference = copy.deepcopy(obj)
+    del reference.skipped
+    assert new.__dict__ == reference.__dict__
+    assert new.name is obj.name and new.coords is obj.coords
+    assert new.data is not obj.data and new.data['a'] is not obj.data['a']
+    assert new.settings is not obj.settings and new.settings.x is not obj.settings.x
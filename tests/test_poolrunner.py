@@ -0,0 +1,63 @@
+import threading
+
+from scm.plams.core.basejob import MultiJob, SingleJob
+from scm.plams.core.jobrunner import PoolRunner
+
+
+class ShellJob(SingleJob):
+    """Job writing to a shared *logfile* when its runscript starts and ends."""
+    logfile = None
+
+    def get_input(self):
+        return ''
+
+    def get_runscript(self):
+        return 'echo start >> {0}\nsleep 0.1\necho end >> {0}\n'.format(self.logfile)
+
+    def check(self):
+        return True
+
+
+class WaitingJob(ShellJob):
+    """Job whose |prerun| waits for results of another job."""
+    def prerun(self):
+        self.other.results.wait()
+
+
+def run_all(jobs, runner, jobmanager):
+    """Run *jobs* and wait for all of them to finish (or fail if it takes too long)."""
+    def target():
+        for job in jobs:
+            job.run(jobrunner=runner, jobmanager=jobmanager)
+        for job in jobs:
+            job.results.wait()
+    t = threading.Thread(target=target, daemon=True)
+    t.start()
+    t.join(60)
+    assert not t.is_alive(), 'jobs did not finish'
+
+
+def max_running(logfile):
+    running = peak = 0
+    with open(logfile) as f:
+        for line in f:
+            running += 1 if line.strip() == 'start' else -1
+            peak = max(peak, running)
+    return peak
+
+
+def test_more_jobs_than_maxjobs(jobmanager, tmp_path, monkeypatch):
+    monkeypatch.setattr(ShellJob, 'logfile', str(tmp_path / 'running.log'))
+    jobs = [ShellJob(name='single') for _ in range(10)]
+    waiting = []
+    for i in range(4):   #more jobs waiting in prerun than jobs allowed to run
+        job = WaitingJob(name='waiting')
+        job.other = jobs[-1 - i]
+        waiting.append(job)
+    multi = MultiJob(name='multi', children=[ShellJob(name='child') for _ in range(3)])
+
+    run_all(waiting + [multi] + jobs, PoolRunner(maxjobs=2, pollstep=0.05), jobmanager)
+
+    for job in jobs + waiting + multi.children + [multi]:
+        assert job.status == 'successful'
+    assert max_running(ShellJob.logfile) <= 2
@@ -0,0 +1,174 @@
+import os
+import shutil
+import subprocess
+import threading
+
+import pytest
+
+from scm.plams.core.basejob import SingleJob
+from scm.plams.core.results import Results, _grep_regex, _privileged_access, _privileged_section
+
+
+OUTPUT = '''\
+ ADF 2019.301  RunTime: Jan01-2020 00:00:00
+ Total Used :  cpu=       1.23  system=       0.04  elapsed=       1.30
+ Total Energy (hartree)         -1.2345
+ total energy (hartree)         -1.2346
+ TotalEnergy: -1.0
+ exit           :   normal
+ * JOB ENDED NORMALLY *
+ ** JOB ENDED NORMALLY **
+ Total_Used : 1
+Total Used
+ ERROR! something went wrong
+ ERROR!! twice
+ NORMAL TERMINATION
+ ORCA TERMINATED NORMALLY
+ EXECUTION OF GAMESS TERMINATED NORMALLY
+ energy: 1.0 a.u. (or [eV]) with $HOME and ^caret
+ Zoë  naïve
+ PROGRAM STOPPED IN
+'''
+
+CASES = [
+    ('Total Used', ''),
+    (' Total Used : ', ''),
+    ('Total Energy (hartree)', ''),
+    ('total energy', '-i'),
+    ('Total Used', '-x'),
+    ('Total', '-w'),
+    ('Total', '-w -i'),
+    ('Used', '-iw'),
+    ('Total Used', '-x -w'),
+    ('ERROR!', ''),
+    ('ERROR!', '-w'),
+    ('* JOB ENDED NORMALLY *', ''),
+    ('* JOB ENDED NORMALLY *', '-F'),
+    ('exit           :', ''),
+    ('TERMINATED NORMALLY', '-F -x'),
+    ('[eV]', '-F'),
+    ('[eV]', ''),
+    ('(or', '-E'),
+    ('(or', ''),
+    ('$HOME', '-F'),
+    ('^caret', ''),
+    ('T.tal', ''),
+    ('Energy|Used', '-E'),
+    ('Energy\\|Used', ''),
+    ('naïve', ''),
+    ('NAÏVE', '-i'),
+    ('zoë', '-i -F'),
+    ('Used', '-c'),
+    ('PROGRAM', '-A 1'),
+    ('', ''),
+    ('nothing like that', ''),
+]
+
+
+@pytest.fixture
+def results(plams_config, tmp_path):
+    (tmp_path / 'job.out').write_text(OUTPUT)
+    job = SingleJob(name='job')
+    job.path = str(tmp_path)
+    job.status = 'successful'
+    job.results.files = ['job.out']
+    return job.results
+
+
+@pytest.mark.skipif(shutil.which('grep') is None, reason='grep not available')
+@pytest.mark.parametrize('pattern,options', CASES)
+def test_grep_file_same_as_grep(results, pattern, options):
+    expected = subprocess.run(['grep', pattern] + options.split() + ['job.out'], cwd=results.job.path, stdout=subprocess.PIPE).stdout.decode().splitlines()
+    assert results.grep_file('job.out', pattern, options) == expected
+    assert results.grep_file('job.out', pattern, options) == expected   #second search uses the index
+
+
+def test_grep_regex_literal_only():
+    assert _grep_regex('Total Used', '') is not None
+    assert _grep_regex('Total Energy (hartree)', '') is not None
+    assert _grep_regex('[eV]', 'F') is not None
+    for pattern, flags in [('T.tal', ''), ('(or', 'E'), ('Energy\\|Used', ''), ('', ''), ('x', 'c'), ('x', 'EF'), ('naïve', 'w')]:
+        assert _grep_regex(pattern, flags) is None
+
+
+def test_copy_skips_pickles(plams_config, tmp_path):
+    old, new = tmp_path / 'old', tmp_path / 'new'
+    old.mkdir()
+    new.mkdir()
+    for name in ['old.out', 'old.dill', 'old.dill.hash']:
+        (old / name).write_text(name)
+    job1, job2 = SingleJob(name='old'), SingleJob(name='new')
+    job1.path, job2.path = str(old), str(new)
+    job1.status = 'successful'
+    job1.results.files = ['old.out', 'old.dill', 'old.dill.hash']
+    job1.results._copy_to(job2.results)
+    assert job2.results.files == ['new.out']
+    assert sorted(os.listdir(new)) == ['new.out']
+
+
+def test_privileged_section():
+    assert not _privileged_access()
+    with _privileged_section():
+        with _privileged_section():
+            assert _privileged_access()
+        assert _privileged_access()
+        ret = []
+        t = threading.Thread(target=lambda: ret.append(_privileged_access()))
+        t.start()
+        t.join()
+        assert ret == [False]
+    assert not _privileged_access()
+
+
+def test_privileged_access_denied_in_other_thread(results):
+    results.job.status = 'finished'
+    with _privileged_section():
+        results.wait()   #returns before the job is done
+        t = threading.Thread(target=results.wait, daemon=True)
+        t.start()
+        t.join(0.5)
+        assert t.is_alive()
+    results.done.set()
+    t.join(5)
+    assert not t.is_alive()
+
+
+def test_collect_reads_folder_again(plams_config, tmp_path):
+    class MyResults(Results):
+        _rename_map = {'out.txt': '$JN.out'}
+        def refresh(self):   #overridden without arguments, like in many Results subclasses
+            Results.refresh(self)
+    class MyJob(SingleJob):
+        _result_type = MyResults
+
+    job = MyJob(name='job')
+    job.path = str(tmp_path)
+    job.status = 'successful'
+    job.results.refresh()
+    assert job.results.files == []
+    mtime = os.stat(tmp_path).st_mtime_ns - 5 * 10**9
+    os.utime(tmp_path, ns=(mtime, mtime))
+    job.results.refresh()   #remembers the folder as not racy
+    (tmp_path / 'out.txt').write_text('x')
+    os.utime(tmp_path, ns=(mtime, mtime))   #change not visible in the modification time
+    job.results.refresh()
+    assert job.results.files == []
+    job.results.collect()
+    assert job.results.files == ['job.out']
+
+
+def test_collect_rename_to_same_name(plams_config, tmp_path):
+    class MyResults(Results):
+        _rename_map = {'job.out': '$JN.out', 'a.txt': 'b.txt'}
+    class MyJob(SingleJob):
+        _result_type = MyResults
+
+    (tmp_path / 'job.out').write_text('x')
+    (tmp_path / 'a.txt').write_text('new')
+    (tmp_path / 'b.txt').write_text('old')
+    job = MyJob(name='job')
+    job.path = str(tmp_path)
+    job.status = 'successful'
+    job.results.collect()
+    assert sorted(job.results.files) == ['b.txt', 'job.out']
+    assert (tmp_path / 'b.txt').read_text() == 'new'
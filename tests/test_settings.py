@@ -0,0 +1,62 @@
+import copy
+
+from scm.plams.core.settings import Settings
+
+
+def sample():
+    s = Settings()
+    s.input.basis.type = 'DZP'
+    s.input.xc.gga = 'PBE'
+    s.input.scf.iterations = 100
+    s.runscript.nproc = 4
+    s.atoms = [1, 2]
+    return s
+
+
+def test_copy_is_independent():
+    s = sample()
+    for c in [s.copy(), copy.copy(s)]:
+        assert c == s
+        assert c.input is not s.input and c.input.basis is not s.input.basis
+        node = c.input.xc
+        node.gga = 'BLYP'
+        c.input.basis.core = 'None'
+        assert s.input.xc.gga == 'PBE'
+        assert 'core' not in s.input.basis
+        assert c.atoms is s.atoms   #values other than Settings are not copied
+
+
+def test_soft_update_and_update_do_not_share():
+    s, defaults = Settings(), sample()
+    s.input.xc.gga = 'BLYP'
+    s.soft_update(defaults)
+    assert s.input.xc.gga == 'BLYP'
+    assert s.input.basis == defaults.input.basis and s.input.basis is not defaults.input.basis
+    s.input.basis.type = 'TZ2P'
+    s.runscript.nproc = 1
+    assert defaults.input.basis.type == 'DZP' and defaults.runscript.nproc == 4
+
+    t = Settings()
+    t.update(defaults)
+    assert t == defaults and t.input is not defaults.input
+    t.soft_update(t)
+    t.update(t)
+    assert t == defaults
+
+
+def test_assignment_copies_nested_settings():
+    s, t = sample(), Settings()
+    t.input = s.input
+    t.input.xc.gga = 'BLYP'
+    assert s.input.xc.gga == 'PBE'
+    u = Settings({'a': {'b': {'c': 1}}})
+    assert isinstance(u.a.b, Settings)
+
+
+def test_find_case():
+    s = Settings()
+    s.System.key1 = 1
+    assert s.find_case('system') == 'System'
+    assert s.find_case('other') == 'other'
+    s.system.key2 = 2
+    assert s.find_case('SYSTEM') == 'System'
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from scm.plams.core.errors import UnitsError
+from scm.plams.tools.units import Units
+
+
+PAIRS = [('bohr', 'angstrom'), ('hartree', 'kcal/mol'), ('deg', 'rad'), ('Angstrom', 'nm')]
+
+
+@pytest.mark.parametrize('inp,out', PAIRS)
+def test_ndarray_same_as_scalars(inp, out):
+    values = np.array([[0.5, -1.25, 3.0], [1e-3, 2.0, 0.0]])
+    ret = Units.convert(values, inp, out)
+    assert isinstance(ret, np.ndarray) and ret.shape == values.shape
+    expected = [[Units.convert(float(x), inp, out) for x in row] for row in values]
+    assert np.allclose(ret, expected, rtol=1e-15, atol=0)
+    assert np.allclose(Units.convert(values.astype(int), inp, out), Units.convert(values.astype(int).tolist(), inp, out), rtol=1e-15, atol=0)
+    assert np.array_equal(values, [[0.5, -1.25, 3.0], [1e-3, 2.0, 0.0]])   #input is not modified
+
+
+@pytest.mark.parametrize('inp,out', PAIRS)
+def test_containers_same_as_scalars(inp, out):
+    ratio = Units.conversion_ratio(inp, out)
+    assert Units.convert(2, inp, out) == 2 * ratio
+    assert Units.convert(np.float32(2.0), inp, out) == np.float32(2.0) * ratio
+    ret = Units.convert([1.0, (2, 3.0), [[4.0]], 'x', True, None], inp, out)
+    assert ret == [ratio, (2*ratio, 3.0*ratio), [[4.0*ratio]], 'x', True, None]
+    assert type(ret[1]) is tuple
+
+
+def test_nothing_to_convert():
+    for value in [[], (), {}, np.zeros((0,3)), ['x', True, None], 'x', None]:
+        ret = Units.convert(value, 'foo', 'bar')
+        assert type(ret) is type(value)
+        if isinstance(value, np.ndarray):
+            assert ret.shape == value.shape
+        else:
+            assert ret == value
+    with pytest.raises(UnitsError):
+        Units.convert([[], [1.0]], 'foo', 'bar')
+    with pytest.raises(UnitsError):
+        Units.convert(np.ones(2), 'bohr', 'hartree')